@@ -0,0 +1,518 @@
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from enums import TradeAction
+from fill_model import FillModel
+
+
+BUY = TradeAction.BUY.value
+SELL = TradeAction.SELL.value
+SHORT = TradeAction.SHORT.value
+COVER = TradeAction.COVER.value
+
+
+@dataclass
+class BacktestResult:
+    """Output of ``run_backtest``: a trade log plus per-bar state, as arrays."""
+
+    trade_index: np.ndarray
+    action: np.ndarray
+    price: np.ndarray
+    position: np.ndarray
+    balance: np.ndarray
+    long_position: np.ndarray
+    short_position: np.ndarray
+    cash: np.ndarray
+    equity: np.ndarray
+    fee: np.ndarray
+
+    @property
+    def trade_count(self) -> int:
+        return len(self.trade_index)
+
+    @property
+    def final_balance(self) -> float:
+        return float(self.cash[-1]) if len(self.cash) else 0.0
+
+    @property
+    def final_equity(self) -> float:
+        return float(self.equity[-1]) if len(self.equity) else 0.0
+
+
+def signal_codes(signal: np.ndarray) -> np.ndarray:
+    """Map a signal column onto int8 codes: 1 buy, -1 sell, 0 hold."""
+    signal = np.asarray(signal)
+    return np.select([signal == 1, signal == -1], [1, -1], 0).astype(np.int8)
+
+
+def _drop_repeated_events(
+    events: np.ndarray, directions: np.ndarray, long_position: float
+) -> np.ndarray:
+    # Without shorting a repeated buy (or sell) cannot change the position, so
+    # only the events that flip the direction need to go through the loop.
+    previous = np.empty_like(directions)
+    previous[0] = 1 if long_position > 0 else -1
+    previous[1:] = directions[:-1]
+    return events[directions != previous]
+
+
+def run_backtest(
+    signal: np.ndarray,
+    close: np.ndarray,
+    initial_balance: float,
+    allow_short: bool = False,
+    long_position: float = 0.0,
+    short_position: float = 0.0,
+    fill_model: Optional[FillModel] = None,
+    open_: Optional[np.ndarray] = None,
+    high: Optional[np.ndarray] = None,
+    low: Optional[np.ndarray] = None,
+) -> BacktestResult:
+    """Replay the BaseStrategy long/short/cover state machine over arrays.
+
+    Only bars with a non-zero signal are visited, and the state updates use
+    the same arithmetic as ``BaseStrategy.buy``/``sell`` so balances match the
+    row-by-row loop exactly. Positions and equity are then expanded back to
+    one value per bar with array operations.
+
+    A ``fill_model`` adds fees, slippage and intrabar exits (see
+    ``FillModel``), which need the bars' ``open_``, ``high`` and ``low``.
+    """
+    codes = signal_codes(signal)
+    close = np.asarray(close, dtype=np.float64)
+    if fill_model is not None:
+        if open_ is None or high is None or low is None:
+            raise ValueError("A fill model needs the open, high and low prices")
+        if long_position > 0 and short_position > 0:
+            raise ValueError("A fill model needs at most one open position")
+        if fill_model.has_exits:
+            if allow_short:
+                raise ValueError("Stop-loss and take-profit exits are long-only")
+            index, action, fill, fee_rate = _exit_trades(
+                codes,
+                np.asarray(open_, dtype=np.float64),
+                np.asarray(high, dtype=np.float64),
+                np.asarray(low, dtype=np.float64),
+                close,
+                initial_balance,
+                long_position,
+                fill_model,
+            )
+        else:
+            # Without exits the trades happen on the same bars as without
+            # costs; only their prices and amounts change.
+            trades = _signal_trades(
+                codes,
+                close,
+                initial_balance,
+                allow_short,
+                long_position,
+                short_position,
+            )
+            index = np.asarray(trades[0], dtype=np.int64)
+            action = np.asarray(trades[1], dtype=np.int8)
+            buys = (action == BUY) | (action == COVER)
+            slippage = fill_model.slippage.rates(
+                np.asarray(high, dtype=np.float64)[index],
+                np.asarray(low, dtype=np.float64)[index],
+                close[index],
+            )
+            fill = close[index] * np.where(buys, 1 + slippage, 1 - slippage)
+            fee_rate = np.full(len(index), fill_model.taker_fee)
+        return _result(
+            _costed_trades(
+                index,
+                action,
+                fill,
+                fee_rate,
+                initial_balance,
+                long_position,
+                short_position,
+            ),
+            close,
+            initial_balance,
+            long_position,
+            short_position,
+        )
+
+    trades = _signal_trades(
+        codes, close, initial_balance, allow_short, long_position, short_position
+    )
+    return _result(trades, close, initial_balance, long_position, short_position)
+
+
+# Per-trade columns, as lists or arrays: index, action, price, position,
+# balance, long and short position after the trade, and fee paid.
+Trades = Tuple[
+    Sequence[int],
+    Sequence[int],
+    Sequence[float],
+    Sequence[float],
+    Sequence[float],
+    Sequence[float],
+    Sequence[float],
+    Sequence[float],
+]
+
+
+def _signal_trades(
+    codes: np.ndarray,
+    close: np.ndarray,
+    initial_balance: float,
+    allow_short: bool,
+    long_position: float,
+    short_position: float,
+) -> Trades:
+    events = np.flatnonzero(codes)
+
+    if (
+        len(events)
+        and not allow_short
+        and short_position == 0
+        and initial_balance > 0
+        and np.all(close[events] > 0)
+    ):
+        events = _drop_repeated_events(events, codes[events], long_position)
+
+    balance = initial_balance
+    long = long_position
+    short = short_position
+    prices = close[events].tolist()
+    directions = codes[events].tolist()
+
+    trade_index: List[int] = []
+    actions: List[int] = []
+    trade_prices: List[float] = []
+    positions: List[float] = []
+    balances: List[float] = []
+    longs: List[float] = []
+    shorts: List[float] = []
+
+    def record(index: int, action: int, price: float, position: float) -> None:
+        trade_index.append(index)
+        actions.append(action)
+        trade_prices.append(price)
+        positions.append(position)
+        balances.append(balance)
+        longs.append(long)
+        shorts.append(short)
+
+    for index, direction, price in zip(events.tolist(), directions, prices):
+        if direction == 1:
+            if short > 0:
+                if long > 0:
+                    balance = long * price
+                    long = 0
+                    record(index, SELL, price, long)
+                else:
+                    balance = short * price
+                    short = 0
+                    record(index, COVER, price, short)
+            if long == 0:
+                long = balance / price
+                balance = 0
+                record(index, BUY, price, long)
+        elif long > 0:
+            balance = long * price
+            long = 0
+            record(index, SELL, price, long)
+        elif allow_short:
+            if short == 0:
+                short = balance / price
+                balance = 0
+                record(index, SHORT, price, short)
+            elif short > 0:
+                balance = short * price
+                short = 0
+                record(index, COVER, price, short)
+
+    return (
+        trade_index,
+        actions,
+        trade_prices,
+        positions,
+        balances,
+        longs,
+        shorts,
+        [0.0] * len(trade_index),
+    )
+
+
+def _result(
+    trades: Trades,
+    close: np.ndarray,
+    initial_balance: float,
+    long_position: float,
+    short_position: float,
+) -> BacktestResult:
+    trade_index, actions, trade_prices, positions, balances, longs, shorts, fees = (
+        trades
+    )
+    trade_index_array = np.asarray(trade_index, dtype=np.int64)
+    # Number of trades up to and including each bar.
+    after_trade = np.cumsum(np.bincount(trade_index_array, minlength=len(close)))
+    long_by_bar = np.concatenate(([long_position], longs)).astype(np.float64)
+    short_by_bar = np.concatenate(([short_position], shorts)).astype(np.float64)
+    cash_by_bar = np.concatenate(([initial_balance], balances)).astype(np.float64)
+    long_by_bar = long_by_bar[after_trade]
+    short_by_bar = short_by_bar[after_trade]
+    cash_by_bar = cash_by_bar[after_trade]
+
+    return BacktestResult(
+        trade_index=trade_index_array,
+        action=np.asarray(actions, dtype=np.int8),
+        price=np.asarray(trade_prices, dtype=np.float64),
+        position=np.asarray(positions, dtype=np.float64),
+        balance=np.asarray(balances, dtype=np.float64),
+        long_position=long_by_bar,
+        short_position=short_by_bar,
+        cash=cash_by_bar,
+        equity=cash_by_bar + (long_by_bar + short_by_bar) * close,
+        fee=np.asarray(fees, dtype=np.float64),
+    )
+
+
+# Bars after each possible entry checked for exits in one vectorized sweep;
+# positions held longer are scanned on their own when they are entered.
+EXIT_SWEEP_BARS = 64
+EXIT_SWEEP_BLOCK = 8
+
+
+def _costed_trades(
+    index: np.ndarray,
+    action: np.ndarray,
+    fill: np.ndarray,
+    fee_rate: np.ndarray,
+    initial_balance: float,
+    long_position: float,
+    short_position: float,
+) -> Trades:
+    """Trade log of ``index``/``action`` filled at ``fill`` and paying fees.
+
+    Every trade turns everything held into the other form: an open turns
+    the balance, less its fee, into units at the fill price, and a close
+    turns the units into a balance, less its fee. So the amount held after
+    each trade is the starting amount times a running product of per-trade
+    factors, with no loop.
+    """
+    if not len(index):
+        return ([], [], [], [], [], [], [], [])
+    opens = (action == BUY) | (action == SHORT)
+    factor = np.where(opens, (1 - fee_rate) / fill, fill * (1 - fee_rate))
+    if opens[0]:
+        start = initial_balance
+    else:
+        start = long_position if action[0] == SELL else short_position
+    held = start * np.cumprod(factor)
+    before = np.concatenate(([start], held[:-1]))
+    fee = before * np.where(opens, 1.0, fill) * fee_rate
+    return (
+        index,
+        action,
+        fill,
+        np.where(opens, held, 0.0),
+        np.where(opens, 0.0, held),
+        np.where(action == BUY, held, 0.0),
+        np.where(action == SHORT, held, 0.0),
+        fee,
+    )
+
+
+@dataclass
+class _Exits:
+    """Stop and take-profit levels of the long each entry bar would open."""
+
+    model: FillModel
+    open_: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    entries: np.ndarray
+    bounds: np.ndarray
+    stop: np.ndarray
+    take: np.ndarray
+
+    @classmethod
+    def build(
+        cls,
+        model: FillModel,
+        open_: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        entries: np.ndarray,
+        prices: np.ndarray,
+        sells: np.ndarray,
+    ) -> "_Exits":
+        # A long is closed by the next sell signal at the latest.
+        bounds = np.append(sells, len(open_) - 1)[sells.searchsorted(entries, "right")]
+        stop = (
+            prices * (1 - model.stop_loss)
+            if model.stop_loss is not None
+            else np.full(len(entries), -np.inf)
+        )
+        take = (
+            prices * (1 + model.take_profit)
+            if model.take_profit is not None
+            else np.full(len(entries), np.inf)
+        )
+        return cls(model, open_, high, low, close, entries, bounds, stop, take)
+
+    def _fills(
+        self, bars: np.ndarray, which, stop_hit: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        # A bar that opens past a level fills at its open. Stops become market
+        # orders that slip; take-profits rest as limit orders.
+        opened = self.open_[bars]
+        slippage = self.model.slippage.rates(
+            self.high[bars], self.low[bars], self.close[bars]
+        )
+        stop = np.minimum(self.stop[which], opened) * (1 - slippage)
+        take = np.maximum(self.take[which], opened)
+        fee = np.where(stop_hit, self.model.taker_fee, self.model.maker_fee)
+        return np.where(stop_hit, stop, take), fee
+
+    def sweep(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Exit (bar, price, fee rate) for every entry found within
+        ``EXIT_SWEEP_BARS``; bar -1 means none before the bound and -2 that
+        the rest of the position has to be scanned by ``scan``."""
+        count = len(self.entries)
+        bar = np.full(count, -1, dtype=np.int64)
+        price = np.zeros(count)
+        fee = np.zeros(count)
+        pending = np.arange(count)
+        for first in range(1, EXIT_SWEEP_BARS + 1, EXIT_SWEEP_BLOCK):
+            # The next block of bars after every pending entry, as a matrix.
+            offsets = np.arange(first, first + EXIT_SWEEP_BLOCK)
+            bars = self.entries[pending, None] + offsets
+            inside = bars <= self.bounds[pending, None]
+            bars = np.minimum(bars, len(self.low) - 1)
+            stop_hit = self.low[bars] <= self.stop[pending, None]
+            hits = (stop_hit | (self.high[bars] >= self.take[pending, None])) & inside
+            column = hits.argmax(axis=1)
+            hit = hits[np.arange(len(pending)), column]
+            found = pending[hit]
+            found_bars = bars[hit, column[hit]]
+            bar[found] = found_bars
+            price[found], fee[found] = self._fills(
+                found_bars, found, stop_hit[hit, column[hit]]
+            )
+            pending = pending[~hit & inside[:, -1]]
+            if not len(pending):
+                break
+        unscanned = self.entries[pending] + EXIT_SWEEP_BARS < self.bounds[pending]
+        bar[pending[unscanned]] = -2
+        return bar, price, fee
+
+    def scan(self, which: int) -> Tuple[int, float, float]:
+        """Exit of entry ``which`` after the sweep's bars, up to its bound."""
+        start = int(self.entries[which]) + EXIT_SWEEP_BARS + 1
+        bars = slice(start, int(self.bounds[which]) + 1)
+        stop_hit = self.low[bars] <= self.stop[which]
+        hits = stop_hit | (self.high[bars] >= self.take[which])
+        first = int(hits.argmax())
+        if not hits[first]:
+            return -1, 0.0, 0.0
+        price, fee = self._fills(
+            np.array([start + first]), which, stop_hit[first : first + 1]
+        )
+        return start + first, float(price[0]), float(fee[0])
+
+
+def _exit_trades(
+    codes: np.ndarray,
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    initial_balance: float,
+    long_position: float,
+    model: FillModel,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """(bar, action, fill price, fee rate) of the longs a signal trades
+    with stop-loss and take-profit exits.
+
+    Each buy bar's long ends at its exit or at the next sell, whichever
+    comes first, and the next long opens on the first buy from there (an
+    exit's own bar included). Both are found for all buy bars at once, so
+    only following the chain from long to long is a loop, and it is one
+    list lookup per long. A position held at the start has no entry price
+    and only closes on a sell.
+    """
+    events = np.flatnonzero(codes)
+    buys = events[codes[events] == 1]
+    sells = events[codes[events] == -1]
+    nothing = (np.empty(0, np.int64), np.empty(0, np.int8), np.empty(0), np.empty(0))
+
+    index, action, fill, fee_rate = [], [], [], []
+    first_buy = 0
+    if long_position > 0:
+        if not len(sells):
+            return nothing
+        sell = int(sells[0])
+        slippage = model.slippage.rates(high[[sell]], low[[sell]], close[[sell]])
+        index.append(sell)
+        action.append(SELL)
+        fill.append(float(close[sell] * (1 - slippage[0])))
+        fee_rate.append(model.taker_fee)
+        first_buy = int(buys.searchsorted(sell))
+    elif initial_balance <= 0:
+        return nothing
+
+    buy_slippage = model.slippage.rates(high[buys], low[buys], close[buys])
+    entry_price = close[buys] * (1 + buy_slippage)
+    table = _Exits.build(model, open_, high, low, close, buys, entry_price, sells)
+    exit_bar, exit_price, exit_fee = table.sweep()
+
+    # Without an exit a long closes at its bound if that is a sell bar. The
+    # exits still to be scanned start out as that too.
+    bounds = table.bounds
+    by_sell = (exit_bar < 0) & (codes[bounds] == -1)
+    sell_slippage = model.slippage.rates(high[bounds], low[bounds], close[bounds])
+    closed_at = np.where(by_sell, bounds, exit_bar)
+    closed_price = np.where(by_sell, close[bounds] * (1 - sell_slippage), exit_price)
+    closed_fee = np.where(by_sell, model.taker_fee, exit_fee)
+    following = np.where(
+        closed_at >= 0, buys.searchsorted(closed_at), len(buys)
+    ).tolist()
+    pending = (exit_bar == -2).tolist()
+
+    entries: List[int] = []
+    row = first_buy
+    while row < len(buys):
+        entries.append(row)
+        if pending[row]:
+            bar, price, fee = table.scan(row)
+            if bar >= 0:
+                closed_at[row], closed_price[row], closed_fee[row] = bar, price, fee
+                following[row] = int(buys.searchsorted(bar))
+        row = following[row]
+
+    rows = np.asarray(entries, dtype=np.int64)
+    closes = closed_at[rows] >= 0
+    count = len(rows) + int(closes.sum())
+    trade_index = np.empty(count, dtype=np.int64)
+    trade_action = np.empty(count, dtype=np.int8)
+    trade_fill = np.empty(count)
+    trade_fee = np.empty(count)
+    # Each long's entry, then its close if it has one (only the last can
+    # stay open).
+    entry_at = np.arange(len(rows)) * 2
+    trade_index[entry_at] = buys[rows]
+    trade_action[entry_at] = BUY
+    trade_fill[entry_at] = entry_price[rows]
+    trade_fee[entry_at] = model.taker_fee
+    close_at = entry_at[closes] + 1
+    trade_index[close_at] = closed_at[rows][closes]
+    trade_action[close_at] = SELL
+    trade_fill[close_at] = closed_price[rows][closes]
+    trade_fee[close_at] = closed_fee[rows][closes]
+
+    return (
+        np.concatenate((index, trade_index)).astype(np.int64),
+        np.concatenate((action, trade_action)).astype(np.int8),
+        np.concatenate((fill, trade_fill)),
+        np.concatenate((fee_rate, trade_fee)),
+    )
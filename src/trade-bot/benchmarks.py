@@ -0,0 +1,392 @@
+import argparse
+import datetime
+import inspect
+import json
+import platform
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Sequence, Type
+
+import numpy as np
+import pandas
+import ta
+
+import signals
+import strategies
+from data_classes import KLine, KLines
+from enums import Interval
+from performance import batch_metrics, metrics
+from resample import resample
+
+
+PARSING_SIZES = (10_000, 100_000, 1_000_000)
+DEFAULT_CANDLES = 10_000
+DEFAULT_REPEAT = 3
+REGRESSION_TOLERANCE = 0.10
+
+Result = Dict[str, Any]
+
+
+def synthetic_rows(
+    count: int,
+    seed: int = 0,
+    start_time: int = 1_599_955_200_000,
+    interval_ms: int = 60_000,
+) -> List[List[Any]]:
+    """Random-walk candles in the exact shape of a Binance klines response."""
+    columns = synthetic_klines(count, seed, start_time, interval_ms).columns()
+    floats = {
+        name: [f"{value:.8f}" for value in column.tolist()]
+        for name, column in columns.items()
+        if column.dtype == np.float64
+    }
+    return [
+        [
+            open_time,
+            floats["open"][i],
+            floats["high"][i],
+            floats["low"][i],
+            floats["close"][i],
+            floats["volume"][i],
+            close_time,
+            floats["quote_asset_volume"][i],
+            trades,
+            floats["taker_buy_base_asset_volume"][i],
+            floats["taker_buy_quote_asset_volume"][i],
+            "0",
+        ]
+        for i, (open_time, close_time, trades) in enumerate(
+            zip(
+                columns["open_time"].tolist(),
+                columns["close_time"].tolist(),
+                columns["number_of_trades"].tolist(),
+            )
+        )
+    ]
+
+
+def synthetic_klines(
+    count: int,
+    seed: int = 0,
+    start_time: int = 1_599_955_200_000,
+    interval_ms: int = 60_000,
+) -> KLines:
+    """Reproducible random-walk KLines of ``count`` candles."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, count)))
+    open_ = np.concatenate((close[:1], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.001, count)) * close
+    volume = rng.gamma(2.0, 50.0, count)
+    open_time = start_time + interval_ms * np.arange(count, dtype=np.int64)
+
+    return KLines.from_columns(
+        {
+            "open_time": open_time,
+            "open": open_,
+            "high": np.maximum(open_, close) + spread,
+            "low": np.minimum(open_, close) - spread,
+            "close": close,
+            "volume": volume,
+            "close_time": open_time + interval_ms - 1,
+            "quote_asset_volume": volume * close,
+            "number_of_trades": rng.integers(1, 1000, count),
+            "taker_buy_base_asset_volume": volume / 2,
+            "taker_buy_quote_asset_volume": volume * close / 2,
+        }
+    )
+
+
+def measure(
+    benchmark: str,
+    method: str,
+    candles: int,
+    function: Callable[[Any], Any],
+    setup: Callable[[], Any] = lambda: None,
+    repeat: int = DEFAULT_REPEAT,
+) -> Result:
+    """Best-of-``repeat`` wall time plus the peak traced memory of one run.
+
+    ``setup`` runs outside the timed section before every call, so each run
+    starts cold (e.g. with a fresh feature cache). Memory is measured in a
+    separate run because tracing slows the code down.
+    """
+    timings = []
+    for _ in range(repeat):
+        argument = setup()
+        started = time.perf_counter()
+        function(argument)
+        timings.append(time.perf_counter() - started)
+
+    argument = setup()
+    tracemalloc.start()
+    try:
+        function(argument)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    seconds = min(timings)
+    return {
+        "benchmark": benchmark,
+        "method": method,
+        "candles": candles,
+        "seconds": seconds,
+        "candles_per_second": candles / seconds if seconds else float("inf"),
+        "peak_memory_bytes": peak,
+    }
+
+
+def _concrete_subclasses(module: Any, base: Type) -> List[Type]:
+    return [
+        value
+        for value in vars(module).values()
+        if inspect.isclass(value)
+        and issubclass(value, base)
+        and value is not base
+        and value.__module__ == module.__name__
+        and not inspect.isabstract(value)
+    ]
+
+
+def strategy_classes() -> List[Type[strategies.BaseStrategy]]:
+    return [
+        strategy
+        for strategy in _concrete_subclasses(strategies, strategies.BaseStrategy)
+        if strategy is not strategies.CombinedStrategy
+    ]
+
+
+def benchmark_parsing(
+    sizes: Sequence[int] = PARSING_SIZES, repeat: int = DEFAULT_REPEAT
+) -> List[Result]:
+    """Time each way of turning a klines response into candles."""
+    results = []
+    for size in sizes:
+        rows = synthetic_rows(size)
+        payload = json.dumps(rows, separators=(",", ":")).encode()
+        methods = {
+            "KLine per row": lambda _: [KLine(row) for row in rows],
+            "json.loads + KLines(data)": lambda _: KLines(data=json.loads(payload)),
+            "KLines(data)": lambda _: KLines(data=rows),
+            "KLines.from_json": lambda _: KLines.from_json(payload),
+        }
+        for method, function in methods.items():
+            results.append(measure("parsing", method, size, function, repeat=repeat))
+    return results
+
+
+def benchmark_klines(klines: KLines, repeat: int = DEFAULT_REPEAT) -> List[Result]:
+    """Time signals, strategies and conversions on cold copies of ``klines``."""
+    candles = len(klines)
+    columns = klines.columns()
+
+    def fresh() -> KLines:
+        return KLines.from_columns(columns)
+
+    results = [
+        measure(
+            "conversion",
+            "KLines.to_dataframe",
+            candles,
+            lambda k: k.to_dataframe(),
+            fresh,
+            repeat,
+        ),
+        measure(
+            "conversion",
+            "resample 1m -> 1h",
+            candles,
+            lambda k: resample(k, Interval.HOUR_1),
+            fresh,
+            repeat,
+        ),
+    ]
+
+    for signal_class in _concrete_subclasses(signals, signals.BaseSignal):
+        for method in ("generate", "votes"):
+            results.append(
+                measure(
+                    "signal",
+                    f"{signal_class.__name__}.{method}",
+                    candles,
+                    lambda k: getattr(signal_class(k), method)(),
+                    fresh,
+                    repeat,
+                )
+            )
+
+    def apply(strategy_class: Type, vectorized: bool) -> Callable[[KLines], Any]:
+        def run(k: KLines) -> None:
+            strategy = strategy_class(klines=k, initial_balance=10000)
+            strategy.apply_strategy(vectorized=vectorized)
+
+        return run
+
+    for strategy_class in strategy_classes():
+        for vectorized, suffix in ((False, "apply_strategy"), (True, "vectorized")):
+            results.append(
+                measure(
+                    "strategy",
+                    f"{strategy_class.__name__}.{suffix}",
+                    candles,
+                    apply(strategy_class, vectorized),
+                    fresh,
+                    repeat,
+                )
+            )
+
+    def combined(n_jobs: Optional[int]) -> Callable[[KLines], Any]:
+        def run(k: KLines) -> None:
+            members = [
+                strategy_class(klines=k, initial_balance=10000)
+                for strategy_class in strategy_classes()
+            ]
+            strategies.CombinedStrategy(
+                klines=k, initial_balance=10000, strategies=members, n_jobs=n_jobs
+            ).apply_combined_strategy()
+
+        return run
+
+    for n_jobs, suffix in ((1, ""), (None, " (all CPUs)")):
+        results.append(
+            measure(
+                "strategy",
+                f"CombinedStrategy.apply_combined_strategy{suffix}",
+                candles,
+                combined(n_jobs),
+                fresh,
+                repeat,
+            )
+        )
+
+    backtests = [
+        strategy_class(klines=klines, initial_balance=10000).apply_vectorized_strategy()
+        for strategy_class in strategy_classes()
+    ]
+    results.extend(
+        [
+            measure(
+                "metrics",
+                "metrics (each strategy)",
+                candles,
+                lambda _: [metrics(result, 10000) for result in backtests],
+                repeat=repeat,
+            ),
+            measure(
+                "metrics",
+                "batch_metrics (all strategies)",
+                candles,
+                lambda _: batch_metrics(backtests, 10000),
+                repeat=repeat,
+            ),
+        ]
+    )
+    return results
+
+
+def run_suite(
+    candles: int = DEFAULT_CANDLES,
+    repeat: int = DEFAULT_REPEAT,
+    parsing_sizes: Sequence[int] = PARSING_SIZES,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    results = benchmark_parsing(parsing_sizes, repeat)
+    results += benchmark_klines(synthetic_klines(candles, seed), repeat)
+    return {
+        "metadata": {
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "candles": candles,
+            "repeat": repeat,
+            "seed": seed,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pandas.__version__,
+            "ta": getattr(ta, "__version__", "unknown"),
+            "machine": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def _result_key(result: Result) -> tuple:
+    return result["benchmark"], result["method"], result["candles"]
+
+
+def compare_results(
+    report: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = REGRESSION_TOLERANCE,
+) -> List[Result]:
+    """Pair each result with its baseline run; ``ratio`` > 1 means slower."""
+    previous = {_result_key(result): result for result in baseline["results"]}
+    comparisons = []
+    for result in report["results"]:
+        before = previous.get(_result_key(result))
+        if before is None:
+            continue
+        ratio = result["seconds"] / before["seconds"]
+        comparisons.append(
+            {
+                **result,
+                "baseline_seconds": before["seconds"],
+                "ratio": ratio,
+                "regression": ratio > 1 + tolerance,
+            }
+        )
+    return comparisons
+
+
+def save_report(path: str, report: Dict[str, Any]) -> None:
+    with open(path, "w") as file:
+        json.dump(report, file, indent=2)
+
+
+def load_report(path: str) -> Dict[str, Any]:
+    with open(path) as file:
+        return json.load(file)
+
+
+def print_results(results: List[Result]) -> None:
+    for result in results:
+        line = (
+            f"{result['benchmark']:<10} {result['method']:<44} "
+            f"{result['candles']:>9,} {result['seconds'] * 1000:>10.1f} ms "
+            f"{result['candles_per_second']:>14,.0f} candles/s "
+            f"{result['peak_memory_bytes'] / 2**20:>8.1f} MiB"
+        )
+        if "ratio" in result:
+            flag = "  REGRESSION" if result["regression"] else ""
+            line += f" {result['ratio']:>6.2f}x{flag}"
+        print(line)
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Trade bot benchmark suite")
+    parser.add_argument("--candles", type=int, default=DEFAULT_CANDLES)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--parsing-sizes", type=int, nargs="*", default=list(PARSING_SIZES)
+    )
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against this JSON file")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+    options = parser.parse_args(arguments)
+
+    report = run_suite(
+        options.candles, options.repeat, options.parsing_sizes, options.seed
+    )
+    results = report["results"]
+    if options.baseline:
+        results = compare_results(
+            report, load_report(options.baseline), options.tolerance
+        )
+    print_results(results)
+
+    if options.output:
+        save_report(options.output, report)
+    return 1 if any(result.get("regression") for result in results) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -14,6 +14,26 @@ BINANCE_TESTNET_API_SECRET = os.getenv("BINANCE_TESTNET_API_SECRET")
 # Currency Constants
 BINANCE_TRADE_CURRENCY = "USDC"
 
+# Market Data Constants
+BINANCE_KLINES_LIMIT = 1000
+BINANCE_KLINES_WEIGHT = 2
+BINANCE_REQUEST_WEIGHT_LIMIT = 6000  # per minute
+KLINE_STORE_PATH = os.getenv("KLINE_STORE_PATH", "data/klines")
+STREAM_RECONNECT_BACKOFF_SECONDS = 1.0  # doubled per failed reconnect
+STREAM_MAX_BACKOFF_SECONDS = 60.0
+
+# Live Trading Constants
+LIVE_HISTORY_CANDLES = 500
+LIVE_MAX_CONCURRENCY = 8
+LIVE_REQUEST_TIMEOUT_SECONDS = 10.0
+LIVE_SETTLE_DELAY_SECONDS = 1.0  # wait after a candle closes before fetching it
+LIVE_CYCLE_BUDGET_SECONDS = 5.0  # from candle close to orders placed
+
+# Instrumentation Constants
+INSTRUMENTATION_ENABLED = os.getenv("TRADE_BOT_INSTRUMENTATION", "0") == "1"
+
 # Endpoint Constants
 BINANCE_TESTNET_BASE_URL = "https://testnet.binance.vision"
-BINANCE_TESTNET_DATA_URL = "https://data-api.binance.vision"
\ No newline at end of file
+BINANCE_TESTNET_DATA_URL = "https://data-api.binance.vision"
+BINANCE_STREAM_URL = "wss://stream.binance.com:9443"
+BINANCE_TESTNET_STREAM_URL = "wss://stream.testnet.binance.vision"
\ No newline at end of file
@@ -1,8 +1,92 @@
 import datetime
-from dataclasses import dataclass, field
-from typing import List, Any, Dict
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import List, Any, Dict, Iterator, Optional, Union
 
-from pandas import Series, DataFrame
+import numpy as np
+from pandas import Series, DataFrame, DatetimeIndex
+
+from exceptions import APIError
+from feature_cache import FeatureCache
+from instrumentation import timed
+
+
+KLINE_COLUMNS: Dict[str, np.dtype] = {
+    "open_time": np.dtype(np.int64),
+    "open": np.dtype(np.float64),
+    "high": np.dtype(np.float64),
+    "low": np.dtype(np.float64),
+    "close": np.dtype(np.float64),
+    "volume": np.dtype(np.float64),
+    "close_time": np.dtype(np.int64),
+    "quote_asset_volume": np.dtype(np.float64),
+    "number_of_trades": np.dtype(np.int64),
+    "taker_buy_base_asset_volume": np.dtype(np.float64),
+    "taker_buy_quote_asset_volume": np.dtype(np.float64),
+}
+
+
+def _block_columns(block: np.ndarray) -> Dict[str, np.ndarray]:
+    if block.ndim != 2 or block.shape[1] < len(KLINE_COLUMNS):
+        raise ValueError(f"Expected kline rows of {len(KLINE_COLUMNS)}+ fields")
+
+    # One transpose gives every column a contiguous row; the float columns are
+    # used as they are and only the integer columns are converted.
+    block = np.ascontiguousarray(block[:, : len(KLINE_COLUMNS)].T)
+    return {
+        name: block[position].astype(dtype, copy=False)
+        for position, (name, dtype) in enumerate(KLINE_COLUMNS.items())
+    }
+
+
+def parse_klines(rows: List[List[Any]]) -> Dict[str, np.ndarray]:
+    """Parse a klines response into typed columns without per-row objects.
+
+    NumPy converts the numeric strings straight into one float64 block, which
+    holds Binance millisecond timestamps and trade counts exactly.
+    """
+    if not rows:
+        return _block_columns(np.empty((0, len(KLINE_COLUMNS))))
+    return _block_columns(np.array(rows, dtype=np.float64))
+
+
+def parse_klines_json(payload: Union[bytes, str]) -> Dict[str, np.ndarray]:
+    """Parse the raw JSON body of a klines response into typed columns.
+
+    Brackets and quotes are stripped so the body becomes one comma-separated
+    list of numbers, converted to float64 in a single C pass. An error body
+    (a JSON object such as ``{"code": -1121, "msg": "Invalid symbol."}``)
+    raises ``APIError``; anything else that is not an array of kline rows
+    raises ``ValueError``.
+    """
+    if isinstance(payload, str):
+        payload = payload.encode()
+    body = payload.lstrip()
+    if body.startswith(b"{"):
+        raise APIError(f"Klines request failed: {body.decode(errors='replace')}")
+    if not body.startswith(b"["):
+        raise ValueError("Malformed klines payload")
+    row_count = body.count(b"[") - 1
+    text = body.translate(None, b'[]" \t\r\n')
+    if row_count < 0 or (row_count == 0) != (not text):
+        raise ValueError("Malformed klines payload")
+    if row_count == 0:
+        return parse_klines([])
+
+    values = text.split(b",")
+    if len(values) % row_count:
+        raise ValueError("Malformed klines payload")
+    try:
+        block = np.array(values, dtype=np.float64)
+    except ValueError:
+        raise ValueError("Malformed klines payload") from None
+    return _block_columns(block.reshape(row_count, -1))
+
+
+def _from_milliseconds(value: int) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(
+        value / 1000.0, tz=datetime.timezone.utc
+    ).replace(tzinfo=None)
 
 
 @dataclass
@@ -20,13 +104,13 @@ class KLine:
     taker_buy_quote_asset_volume: float
 
     def __init__(self, entry: List[Any]) -> None:
-        self.open_time = datetime.datetime.fromtimestamp(entry[0] / 1000.0)
+        self.open_time = _from_milliseconds(entry[0])
         self.open = float(entry[1])
         self.high = float(entry[2])
         self.low = float(entry[3])
         self.close = float(entry[4])
         self.volume = float(entry[5])
-        self.close_time = datetime.datetime.fromtimestamp(entry[6] / 1000.0)
+        self.close_time = _from_milliseconds(entry[6])
         self.quote_asset_volume = float(entry[7])
         self.number_of_trades = int(entry[8])
         self.taker_buy_base_asset_volume = float(entry[9])
@@ -52,35 +136,202 @@ class KLine:
         return Series(self.to_json())
 
 
-@dataclass
+class KLineView(Sequence):
+    """Lazy per-row access to a columnar KLines, building KLine objects on demand."""
+
+    def __init__(self, klines: "KLines") -> None:
+        self._klines = klines
+
+    def __len__(self) -> int:
+        return len(self._klines)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return KLine(self._klines.row(index))
+
+
+@dataclass(eq=False)
 class KLines:
-    klines: List[KLine] = field(default_factory=list)
+    """Candles stored column-wise, one typed NumPy array per field.
 
-    def __init__(self, data: List[List[Any]]) -> None:
-        self.klines = [KLine(entry) for entry in data]
+    Timestamps are kept as int64 epoch milliseconds, exactly as Binance returns
+    them. Columns are read-only so frames and views built from them can share
+    memory safely.
+    """
 
-    def to_json(self) -> Dict[str, Any]:
-        data: Dict[str, Any] = {
-            "open_time": [kline.open_time for kline in self.klines],
-            "open": [kline.open for kline in self.klines],
-            "high": [kline.high for kline in self.klines],
-            "low": [kline.low for kline in self.klines],
-            "close": [kline.close for kline in self.klines],
-            "volume": [kline.volume for kline in self.klines],
-            "close_time": [kline.close_time for kline in self.klines],
-            "quote_asset_volume": [kline.quote_asset_volume for kline in self.klines],
-            "number_of_trades": [kline.number_of_trades for kline in self.klines],
-            "taker_buy_base_asset_volume": [
-                kline.taker_buy_base_asset_volume for kline in self.klines
-            ],
-            "taker_buy_quote_asset_volume": [
-                kline.taker_buy_quote_asset_volume for kline in self.klines
-            ],
+    open_time: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    close_time: np.ndarray
+    quote_asset_volume: np.ndarray
+    number_of_trades: np.ndarray
+    taker_buy_base_asset_volume: np.ndarray
+    taker_buy_quote_asset_volume: np.ndarray
+
+    def __init__(self, data: Optional[List[List[Any]]] = None) -> None:
+        self._set_columns(parse_klines(data if data else []))
+
+    @classmethod
+    def from_json(cls, payload: Union[bytes, str]) -> "KLines":
+        """Build KLines straight from a raw klines JSON response body."""
+        klines = cls.__new__(cls)
+        klines._set_columns(parse_klines_json(payload))
+        return klines
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, np.ndarray]) -> "KLines":
+        """Wrap existing column arrays without copying when dtypes already match."""
+        klines = cls.__new__(cls)
+        klines._set_columns(
+            {
+                name: np.asarray(columns[name], dtype=dtype)
+                for name, dtype in KLINE_COLUMNS.items()
+            }
+        )
+        return klines
+
+    @classmethod
+    def concat(cls, parts: Sequence["KLines"]) -> "KLines":
+        """Merge candle sets into one, sorted by open time.
+
+        When several parts hold the same open time the one from the later part
+        wins, so fresher downloads replace stale candles.
+        """
+        columns = {
+            name: (
+                np.concatenate([getattr(part, name) for part in parts])
+                if parts
+                else np.empty(0, dtype=dtype)
+            )
+            for name, dtype in KLINE_COLUMNS.items()
         }
+        open_time = columns["open_time"]
+        # Reverse so np.unique keeps the last occurrence of each open time.
+        _, last = np.unique(open_time[::-1], return_index=True)
+        order = len(open_time) - 1 - last
+        return cls.from_columns(
+            {name: column[order] for name, column in columns.items()}
+        )
+
+    def _set_columns(self, columns: Dict[str, np.ndarray]) -> None:
+        lengths = {len(column) for column in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"KLines columns differ in length: {sorted(lengths)}")
+
+        for name, column in columns.items():
+            if column.flags.writeable:
+                column.flags.writeable = False
+            setattr(self, name, column)
+
+        self._features: Optional[FeatureCache] = None
+
+    @property
+    def features(self) -> FeatureCache:
+        """Indicator cache shared by every signal and strategy on these candles."""
+        if self._features is None:
+            self._features = FeatureCache(self.to_dataframe)
+        return self._features
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in KLINE_COLUMNS}
+
+    def row(self, index: int) -> List[Any]:
+        return [getattr(self, name)[index].item() for name in KLINE_COLUMNS]
+
+    def slice(
+        self, start: Optional[int] = None, stop: Optional[int] = None
+    ) -> "KLines":
+        """Return a zero-copy KLines over rows ``start:stop``."""
+        return KLines.from_columns(
+            {name: column[start:stop] for name, column in self.columns().items()}
+        )
+
+    def between(
+        self, start_time: Optional[int] = None, end_time: Optional[int] = None
+    ) -> "KLines":
+        """Zero-copy KLines of the candles opening in ``[start_time, end_time]``.
+
+        Bounds are epoch milliseconds and ``open_time`` must be sorted; the
+        window is found by binary search, so no column is scanned.
+        """
+        start = 0 if start_time is None else self.open_time.searchsorted(start_time)
+        stop = (
+            len(self)
+            if end_time is None
+            else self.open_time.searchsorted(end_time, side="right")
+        )
+        return self.slice(int(start), int(stop))
+
+    @property
+    def klines(self) -> KLineView:
+        return KLineView(self)
+
+    def __len__(self) -> int:
+        return len(self.open_time)
+
+    def __getitem__(self, index: int) -> KLine:
+        return self.klines[index]
+
+    def __iter__(self) -> Iterator[KLine]:
+        return iter(self.klines)
+
+    def to_json(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = self.columns()
+        data["open_time"] = self.open_time.view("datetime64[ms]")
+        data["close_time"] = self.close_time.view("datetime64[ms]")
         return data
 
+    @timed("klines.to_dataframe")
     def to_dataframe(self) -> DataFrame:
-        df = DataFrame(self.to_json())
-        df.set_index("open_time", inplace=True)
+        data = self.to_json()
+        index = DatetimeIndex(data.pop("open_time"), name="open_time")
+
+        return DataFrame(data, index=index, copy=False)
+
+
+class KLineBuffer:
+    """Fixed-capacity ring buffer of the latest candles, stored column-wise.
+
+    Appending is O(1) and never reallocates; once full, the oldest candle is
+    overwritten. A candle with the same open time as the newest one replaces
+    it instead of being appended.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        if capacity <= 0:
+            raise ValueError("KLineBuffer capacity must be positive")
+        self.capacity = capacity
+        self._columns = {
+            name: np.empty(capacity, dtype=dtype)
+            for name, dtype in KLINE_COLUMNS.items()
+        }
+        self._start = 0
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def append(self, row: List[Any]) -> None:
+        newest = (self._start + self._length - 1) % self.capacity
+        if self._length and self._columns["open_time"][newest] == int(row[0]):
+            position = newest
+        elif self._length < self.capacity:
+            position = (self._start + self._length) % self.capacity
+            self._length += 1
+        else:
+            position = self._start
+            self._start = (self._start + 1) % self.capacity
+
+        for index, column in enumerate(self._columns.values()):
+            column[position] = row[index]
 
-        return df
+    def to_klines(self) -> KLines:
+        """Copy the buffered candles, oldest first, into a KLines."""
+        order = (self._start + np.arange(self._length)) % self.capacity
+        return KLines.from_columns(
+            {name: column[order] for name, column in self._columns.items()}
+        )
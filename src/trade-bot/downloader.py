@@ -0,0 +1,194 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from binance.error import ClientError, ServerError
+from binance.spot import Spot
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, Timeout
+
+from constants import BINANCE_KLINES_WEIGHT, BINANCE_REQUEST_WEIGHT_LIMIT
+from data_classes import KLines
+from enums import Interval
+from kline_store import KLineStore
+from logger import logger
+from market_data import fetch_klines
+
+
+RETRYABLE_STATUS_CODES = {418, 429}
+MAX_BACKOFF_SECONDS = 60.0
+
+
+@dataclass(frozen=True)
+class DownloadJob:
+    symbol: str
+    interval: Interval
+    start_time: int
+    end_time: int
+
+    @property
+    def key(self) -> Tuple[str, Interval]:
+        return self.symbol, self.interval
+
+
+class RateLimiter:
+    """Thread-safe token bucket over Binance request weight.
+
+    The bucket holds at most ``capacity`` weight and refills continuously at
+    ``capacity / period`` per second, so bursts are allowed up to the limit
+    and sustained traffic stays under it.
+    """
+
+    def __init__(
+        self,
+        capacity: int = BINANCE_REQUEST_WEIGHT_LIMIT,
+        period: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.capacity = capacity
+        self.rate = capacity / period
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, weight: int = 1) -> None:
+        if weight > self.capacity:
+            raise ValueError(f"Weight {weight} exceeds capacity {self.capacity}")
+
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= weight:
+                    self._tokens -= weight
+                    return
+                wait = (weight - self._tokens) / self.rate
+            self._sleep(wait)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    header = getattr(error, "header", None)
+    if not header or not hasattr(header, "get"):
+        return None
+    value = header.get("Retry-After")
+    return float(value) if value is not None else None
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, ClientError):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (ServerError, ConnectionError, Timeout))
+
+
+class ThrottledClient:
+    """Wraps a ``Spot`` client's ``klines`` with rate limiting and retries.
+
+    Only the methods ``fetch_klines`` needs are exposed, so the wrapper can be
+    passed anywhere a client is expected for kline downloads.
+    """
+
+    def __init__(
+        self,
+        client: Spot,
+        rate_limiter: RateLimiter,
+        max_retries: int = 5,
+        backoff: float = 0.5,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.client = client
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._sleep = sleep
+
+    def klines(self, **params: Any) -> List[List[Any]]:
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire(BINANCE_KLINES_WEIGHT)
+            try:
+                return self.client.klines(**params)
+            except Exception as error:
+                if not _is_retryable(error) or attempt >= self.max_retries:
+                    raise
+                delay = _retry_after(error)
+                if delay is None:
+                    delay = min(self.backoff * 2**attempt, MAX_BACKOFF_SECONDS)
+                attempt += 1
+                logger.warning(
+                    f"Retrying klines {params.get('symbol')} in {delay:.1f}s "
+                    f"({attempt}/{self.max_retries}): {error!r}"
+                )
+                self._sleep(delay)
+
+
+def pool_connections(client: Spot, size: int) -> None:
+    """Let up to ``size`` threads keep their HTTP connection alive at once.
+
+    requests' default pool keeps ten connections per host and drops the rest,
+    which would make every extra worker reconnect on each request.
+    """
+    session = getattr(client, "session", None)
+    if session is None:
+        return
+    adapter = HTTPAdapter(pool_connections=size, pool_maxsize=size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+
+def download_klines(
+    client: Spot,
+    jobs: List[DownloadJob],
+    max_workers: int = 8,
+    store: Optional[KLineStore] = None,
+    rate_limiter: Optional[RateLimiter] = None,
+    max_retries: int = 5,
+    backoff: float = 0.5,
+) -> Dict[Tuple[str, Interval], KLines]:
+    """Download many (symbol, interval, range) jobs concurrently.
+
+    All threads share one client, one connection pool and one rate limiter.
+    With a ``store``, each job only fetches what the store is missing and the
+    store is updated. A job that still fails after its retries is logged and
+    left out of the result, and the other jobs carry on.
+    """
+    keys = [job.key for job in jobs]
+    if len(set(keys)) != len(keys):
+        raise ValueError("Each (symbol, interval) may only appear in one job")
+
+    pool_connections(client, max_workers)
+    throttled = ThrottledClient(
+        client, rate_limiter or RateLimiter(), max_retries, backoff
+    )
+
+    def run(job: DownloadJob) -> KLines:
+        if store is not None:
+            return store.update(
+                throttled, job.symbol, job.interval, job.start_time, job.end_time
+            )
+        rows = fetch_klines(
+            throttled, job.symbol, job.interval, job.start_time, job.end_time
+        )
+        return KLines(data=rows)
+
+    results: Dict[Tuple[str, Interval], KLines] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(run, job): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                results[job.key] = future.result()
+            except Exception as error:
+                logger.error(
+                    f"Failed to download {job.symbol} {job.interval.value}: "
+                    f"{error!r}"
+                )
+
+    return {key: results[key] for key in keys if key in results}
@@ -1,3 +1,4 @@
+from datetime import datetime, timezone
 from enum import Enum
 
 
@@ -19,6 +20,63 @@ class Interval(Enum):
     WEEK_1 = "1w"
     MONTH_1 = "1M"
 
+    @property
+    def milliseconds(self) -> int:
+        """Nominal candle length; months use their shortest length (28 days)."""
+        return INTERVAL_MILLISECONDS[self]
+
+    def open_time(self, time_ms: int) -> int:
+        """Open time of the candle containing ``time_ms`` (epoch ms, UTC).
+
+        Like Binance, candles are aligned on the epoch, except weekly ones,
+        which open on Monday, and monthly ones, which follow the calendar.
+        """
+        if self is Interval.MONTH_1:
+            moment = datetime.fromtimestamp(time_ms // 1000, tz=timezone.utc)
+            return _epoch_milliseconds(moment.year, moment.month)
+        offset = WEEK_OFFSET_MILLISECONDS if self is Interval.WEEK_1 else 0
+        length = self.milliseconds
+        return (time_ms - offset) // length * length + offset
+
+    def next_open_time(self, time_ms: int) -> int:
+        """Open time of the candle following the one containing ``time_ms``."""
+        if self is Interval.MONTH_1:
+            moment = datetime.fromtimestamp(time_ms // 1000, tz=timezone.utc)
+            year, month = divmod(moment.year * 12 + moment.month, 12)
+            return _epoch_milliseconds(year, month + 1)
+        return self.open_time(time_ms) + self.milliseconds
+
+
+def _epoch_milliseconds(year: int, month: int) -> int:
+    return int(datetime(year, month, 1, tzinfo=timezone.utc).timestamp()) * 1000
+
+
+SECOND_MILLISECONDS = 1000
+MINUTE_MILLISECONDS = 60 * SECOND_MILLISECONDS
+HOUR_MILLISECONDS = 60 * MINUTE_MILLISECONDS
+DAY_MILLISECONDS = 24 * HOUR_MILLISECONDS
+# The epoch is a Thursday; weekly candles open on Monday.
+WEEK_OFFSET_MILLISECONDS = 4 * DAY_MILLISECONDS
+
+INTERVAL_MILLISECONDS = {
+    Interval.SECOND_1: SECOND_MILLISECONDS,
+    Interval.MINUTE_1: MINUTE_MILLISECONDS,
+    Interval.MINUTE_3: 3 * MINUTE_MILLISECONDS,
+    Interval.MINUTE_5: 5 * MINUTE_MILLISECONDS,
+    Interval.MINUTE_15: 15 * MINUTE_MILLISECONDS,
+    Interval.MINUTE_30: 30 * MINUTE_MILLISECONDS,
+    Interval.HOUR_1: HOUR_MILLISECONDS,
+    Interval.HOUR_2: 2 * HOUR_MILLISECONDS,
+    Interval.HOUR_4: 4 * HOUR_MILLISECONDS,
+    Interval.HOUR_6: 6 * HOUR_MILLISECONDS,
+    Interval.HOUR_8: 8 * HOUR_MILLISECONDS,
+    Interval.HOUR_12: 12 * HOUR_MILLISECONDS,
+    Interval.DAY_1: DAY_MILLISECONDS,
+    Interval.DAY_3: 3 * DAY_MILLISECONDS,
+    Interval.WEEK_1: 7 * DAY_MILLISECONDS,
+    Interval.MONTH_1: 28 * DAY_MILLISECONDS,
+}
+
 
 class OrderStatus(Enum):
     NEW = 0
@@ -31,6 +89,15 @@ class OrderStatus(Enum):
     EXPIRED = 7
     EXPIRED_IN_MATCH = 8
 
+    @property
+    def binance_name(self) -> str:
+        """Status as the Binance API spells it ("CANCELED" for CANCELLED)."""
+        return "CANCELED" if self is OrderStatus.CANCELLED else self.name
+
+    @classmethod
+    def from_binance(cls, name: str) -> "OrderStatus":
+        return cls.CANCELLED if name == "CANCELED" else cls[name]
+
 
 class OrderType(Enum):
     LIMIT = 0
@@ -51,3 +118,10 @@ class TimeInForce(Enum):
     GTC = 0 # Good Til Cancelled
     IOC = 1 # Immediate Or Cancel
     FOK = 2 # Fill Or Kill
+
+
+class TradeAction(Enum):
+    BUY = 0
+    SELL = 1
+    SHORT = 2
+    COVER = 3
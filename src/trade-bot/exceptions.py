@@ -5,6 +5,13 @@ class APIError(Exception):
         super().__init__(message)
 
 
+class InvalidOrderTransition(Exception):
+    """An order update would move an order to a status it cannot reach."""
+
+    def __init__(self, message: str = "Invalid order status transition"):
+        super().__init__(message)
+
+
 ERROR_CODE_MAP = {}
 
 
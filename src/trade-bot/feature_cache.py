@@ -0,0 +1,110 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+from pandas import DataFrame, Series
+
+
+DEFAULT_MAX_ENTRIES = 128
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def _nbytes(value: Any) -> int:
+    if isinstance(value, DataFrame):
+        return int(value.memory_usage(index=False).sum())
+    if isinstance(value, Series):
+        return int(value.memory_usage(index=False))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (tuple, list)):
+        return sum(_nbytes(item) for item in value)
+    if isinstance(value, dict):
+        return sum(_nbytes(item) for item in value.values())
+    return 0
+
+
+class FeatureCache:
+    """LRU cache of indicator outputs computed over one KLines.
+
+    The base frame is built once and shared by every signal and strategy on
+    the same candles. Indicator results are keyed by name and parameters and
+    evicted least-recently-used first once either ``max_entries`` or
+    ``max_bytes`` is exceeded. Cached values are shared, so callers must treat
+    them as read-only.
+    """
+
+    def __init__(
+        self,
+        build_frame: Callable[[], DataFrame],
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self._build_frame = build_frame
+        self._frame: Optional[DataFrame] = None
+        self._entries: "OrderedDict[Tuple[Hashable, ...], Tuple[Any, int]]" = (
+            OrderedDict()
+        )
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def frame(self) -> DataFrame:
+        if self._frame is None:
+            self._frame = self._build_frame()
+        return self._frame
+
+    @staticmethod
+    def key(name: str, params: Dict[str, Any]) -> Tuple[Hashable, ...]:
+        return (name,) + tuple(sorted(params.items()))
+
+    def get(
+        self,
+        name: str,
+        params: Dict[str, Any],
+        compute: Callable[[DataFrame], Any],
+    ) -> Any:
+        key = self.key(name, params)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        value = compute(self.frame())
+        size = _nbytes(value)
+        self._entries[key] = (value, size)
+        self.nbytes += size
+        self._evict()
+        return value
+
+    def _evict(self) -> None:
+        # The entry just inserted is kept even if it alone exceeds the limits.
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self.nbytes > self.max_bytes
+        ):
+            _, (_, size) = self._entries.popitem(last=False)
+            self.nbytes -= size
+            self.evictions += 1
+
+    def __contains__(self, key: Tuple[Hashable, ...]) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.nbytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
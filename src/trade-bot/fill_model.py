@@ -0,0 +1,78 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+
+# Binance spot's base rate, as a fraction of the traded notional.
+DEFAULT_FEE_RATE = 0.001
+
+
+class SlippageModel(ABC):
+    """Adverse price move, as a fraction of the price, paid by market fills."""
+
+    @abstractmethod
+    def rates(self, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+        """Slippage fraction of a market fill on each bar.
+
+        Called with only the bars that have fills, so it must be elementwise.
+        """
+
+
+@dataclass(frozen=True)
+class NoSlippage(SlippageModel):
+    def rates(self, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+        return np.zeros(len(close))
+
+
+@dataclass(frozen=True)
+class FixedSlippage(SlippageModel):
+    """The same fraction on every fill, e.g. 0.0005 for 5 basis points."""
+
+    rate: float
+
+    def rates(self, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+        return np.full(len(close), self.rate)
+
+
+@dataclass(frozen=True)
+class RangeSlippage(SlippageModel):
+    """A fraction of the bar's high-low range, so volatile bars fill worse."""
+
+    fraction: float
+
+    def rates(self, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rates = self.fraction * (high - low) / close
+        return np.where(np.isfinite(rates), rates, 0.0)
+
+
+@dataclass(frozen=True)
+class FillModel:
+    """How ``run_backtest`` fills orders, beyond trading at the close for free.
+
+    Signal trades are market orders at the bar's close: they pay
+    ``taker_fee`` and slip against the trader by ``slippage``. With
+    ``stop_loss`` or ``take_profit`` (fractions of the entry price) every
+    position also gets a stop (a STOP_LOSS market order: taker fee and
+    slippage) and a take-profit (a resting limit order: maker fee at its
+    price). They trigger intrabar from the bar's high and low; a bar that
+    opens past the level fills at its open, and a bar that reaches both
+    levels is assumed to hit the stop first.
+
+    Exits are for long positions only. In ``run_backtest`` a short's value
+    is its size times the price, so it gains when the price rises, and a
+    stop above the entry would lock in a gain. ``run_backtest`` therefore
+    rejects exits together with ``allow_short``.
+    """
+
+    taker_fee: float = DEFAULT_FEE_RATE
+    maker_fee: float = DEFAULT_FEE_RATE
+    slippage: SlippageModel = field(default_factory=NoSlippage)
+    stop_loss: Optional[float] = None
+    take_profit: Optional[float] = None
+
+    @property
+    def has_exits(self) -> bool:
+        return self.stop_loss is not None or self.take_profit is not None
@@ -0,0 +1,168 @@
+import math
+import threading
+from functools import wraps
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from constants import INSTRUMENTATION_ENABLED
+from logger import logger
+
+
+# Histogram buckets are powers of two of a microsecond: bucket ``i`` holds
+# latencies in [2**(i-1), 2**i) us, the last one everything from ~4.5 minutes.
+BUCKET_COUNT = 30
+_MICROSECOND = 1e-6
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_enabled: bool = INSTRUMENTATION_ENABLED
+_lock = threading.Lock()
+
+
+def enable() -> None:
+    global _enabled
+    _enabled = True
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+class Histogram:
+    """Latency histogram with fixed log2 buckets; recording is O(1)."""
+
+    def __init__(self) -> None:
+        self.buckets: List[int] = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = 0.0
+
+    def record(self, seconds: float) -> None:
+        microseconds = int(seconds / _MICROSECOND)
+        self.buckets[min(microseconds.bit_length(), BUCKET_COUNT - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        self.minimum = min(self.minimum, seconds)
+        self.maximum = max(self.maximum, seconds)
+
+    def percentile(self, fraction: float) -> float:
+        """Upper edge of the bucket holding the ``fraction`` quantile."""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= rank:
+                return min((2**index) * _MICROSECOND, self.maximum)
+        return self.maximum
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.minimum if self.count else 0.0,
+            "max": self.maximum,
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99),
+            "buckets": list(self.buckets),
+        }
+
+
+_timers: Dict[str, Histogram] = {}
+_counters: Dict[str, int] = {}
+
+
+def record(stage: str, seconds: float) -> None:
+    with _lock:
+        histogram = _timers.get(stage)
+        if histogram is None:
+            histogram = _timers[stage] = Histogram()
+        histogram.record(seconds)
+
+
+def count(name: str, value: int = 1) -> None:
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+class Timer:
+    """Context manager timing a block as ``stage`` while instrumentation is on."""
+
+    __slots__ = ("stage", "_started")
+
+    def __init__(self, stage: str) -> None:
+        self.stage = stage
+        self._started: Optional[float] = None
+
+    def __enter__(self) -> "Timer":
+        self._started = perf_counter() if _enabled else None
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._started is not None:
+            record(self.stage, perf_counter() - self._started)
+
+
+def timed(stage: str, per_class: bool = False) -> Callable[[F], F]:
+    """Decorator timing every call as ``stage``.
+
+    With ``per_class`` the stage is suffixed with the class of the first
+    argument, so a method inherited by many subclasses is reported per class.
+    When instrumentation is off the wrapper only checks one flag.
+    """
+
+    def decorator(function: F) -> F:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            started = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                name = f"{stage}.{type(args[0]).__name__}" if per_class else stage
+                record(name, perf_counter() - started)
+
+        wrapper.__instrumented__ = True
+        return wrapper
+
+    return decorator
+
+
+def snapshot() -> Dict[str, Any]:
+    with _lock:
+        return {
+            "enabled": _enabled,
+            "timers": {stage: h.summary() for stage, h in sorted(_timers.items())},
+            "counters": dict(sorted(_counters.items())),
+        }
+
+
+def reset() -> None:
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+
+
+def log_snapshot() -> Dict[str, Any]:
+    metrics = snapshot()
+    for stage, summary in metrics["timers"].items():
+        logger.info(
+            f"{stage}: n={summary['count']} total={summary['total'] * 1000:.1f}ms "
+            f"mean={summary['mean'] * 1000:.3f}ms p50<={summary['p50'] * 1000:.3f}ms "
+            f"p99<={summary['p99'] * 1000:.3f}ms max={summary['max'] * 1000:.3f}ms"
+        )
+    for name, value in metrics["counters"].items():
+        logger.info(f"{name}: {value}")
+    return metrics
@@ -0,0 +1,219 @@
+import os
+from tempfile import NamedTemporaryFile
+from time import time
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+from binance.spot import Spot
+
+from data_classes import KLINE_COLUMNS, KLines
+from enums import Interval
+from logger import logger
+from market_data import fetch_klines
+
+
+TimeRange = Tuple[int, int]
+
+
+def write_klines(path: str, klines: KLines) -> None:
+    """Write candles as one ``(columns, rows)`` int64 ``.npy`` block.
+
+    Every column is 8 bytes wide, so float columns are stored bit-for-bit in
+    int64 rows and each column stays contiguous on disk. The file is written
+    next to ``path`` and renamed over it, so readers never see a partial file.
+    """
+    block = np.empty((len(KLINE_COLUMNS), len(klines)), dtype=np.int64)
+    for position, name in enumerate(KLINE_COLUMNS):
+        block[position] = getattr(klines, name).view(np.int64)
+    _save_atomically(path, block)
+
+
+def _save_atomically(path: str, array: np.ndarray) -> None:
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    with NamedTemporaryFile(dir=directory, suffix=".tmp", delete=False) as file:
+        np.save(file, array, allow_pickle=False)
+    os.replace(file.name, path)
+
+
+def read_klines(path: str, mmap: bool = False) -> KLines:
+    """Load a store file; with ``mmap`` the columns are read-only views of it.
+
+    Memory-mapped columns are paged in from disk on first access, so slicing
+    a window out of a multi-year file only touches the pages of that window.
+    """
+    block = np.load(path, mmap_mode="r" if mmap else None, allow_pickle=False)
+    if block.ndim != 2 or block.shape[0] != len(KLINE_COLUMNS):
+        raise ValueError(f"{path} is not a kline store file: shape {block.shape}")
+
+    return KLines.from_columns(
+        {
+            name: block[position].view(dtype)
+            for position, (name, dtype) in enumerate(KLINE_COLUMNS.items())
+        }
+    )
+
+
+def merge_ranges(ranges: Sequence[TimeRange]) -> List[TimeRange]:
+    """Sorted ``ranges`` with overlapping and adjacent ones joined."""
+    merged: List[TimeRange] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_ranges(
+    ranges: Sequence[TimeRange], removed: Sequence[TimeRange]
+) -> List[TimeRange]:
+    """The parts of ``ranges`` outside every range in ``removed``."""
+    remaining: List[TimeRange] = []
+    removed = merge_ranges(removed)
+    for start, end in ranges:
+        for removed_start, removed_end in removed:
+            if removed_end < start or removed_start > end:
+                continue
+            if removed_start > start:
+                remaining.append((start, removed_start - 1))
+            start = removed_end + 1
+            if start > end:
+                break
+        if start <= end:
+            remaining.append((start, end))
+    return remaining
+
+
+def missing_ranges(
+    klines: KLines,
+    interval: Interval,
+    start_time: int,
+    end_time: int,
+    known_empty: Sequence[TimeRange] = (),
+) -> List[TimeRange]:
+    """Time ranges inside ``[start_time, end_time]`` not covered by ``klines``.
+
+    Candles are contiguous when each one opens right after the previous one
+    closes, so gaps are found from the stored close times rather than from
+    the nominal interval length, which does not hold for monthly candles.
+    Ranges in ``known_empty`` were already fetched and had no candles (an
+    exchange outage, or the time before the symbol was listed), so they do
+    not count as missing.
+    """
+    if len(klines) == 0:
+        return subtract_ranges([(start_time, end_time)], known_empty)
+
+    open_time = klines.open_time
+    close_time = klines.close_time
+    ranges: List[TimeRange] = []
+
+    # No candle can open between start_time and the first stored one unless
+    # the gap is at least one interval long.
+    if start_time <= open_time[0] - interval.milliseconds:
+        ranges.append((start_time, int(open_time[0]) - 1))
+
+    for index in np.flatnonzero(open_time[1:] != close_time[:-1] + 1):
+        ranges.append((int(close_time[index]) + 1, int(open_time[index + 1]) - 1))
+
+    ranges.append((int(close_time[-1]) + 1, end_time))
+
+    ranges = [
+        (max(start, start_time), min(end, end_time))
+        for start, end in ranges
+        if max(start, start_time) <= min(end, end_time)
+    ]
+    return subtract_ranges(ranges, known_empty)
+
+
+class KLineStore:
+    """On-disk candle cache with one file per (symbol, interval).
+
+    ``update`` downloads only the ranges the file does not cover yet and
+    keeps closed candles only, so a candle that is still forming is fetched
+    again on the next run instead of being stored half-built. Ranges before
+    the newest stored candle that were fetched and had no candles are
+    recorded next to the file, so exchange gaps and the time before a
+    listing are requested only once.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+
+    def path(self, symbol: str, interval: Interval) -> str:
+        return os.path.join(self.root, symbol, f"{interval.value}.npy")
+
+    def empty_path(self, symbol: str, interval: Interval) -> str:
+        return os.path.join(self.root, symbol, f"{interval.value}.empty.npy")
+
+    def known_empty(self, symbol: str, interval: Interval) -> List[TimeRange]:
+        """Ranges already fetched that the exchange has no candles for."""
+        path = self.empty_path(symbol, interval)
+        if not os.path.exists(path):
+            return []
+        return [(int(start), int(end)) for start, end in np.load(path).reshape(-1, 2)]
+
+    def load(self, symbol: str, interval: Interval, mmap: bool = False) -> KLines:
+        path = self.path(symbol, interval)
+        if not os.path.exists(path):
+            return KLines()
+        return read_klines(path, mmap=mmap)
+
+    def open(
+        self,
+        symbol: str,
+        interval: Interval,
+        start_time: Optional[int] = None,
+        end_time: Optional[int] = None,
+    ) -> KLines:
+        """Memory-map the stored candles opening in ``[start_time, end_time]``.
+
+        Nothing is downloaded. The returned KLines shares pages with the file,
+        so a later ``update`` replacing the file does not affect it.
+        """
+        return self.load(symbol, interval, mmap=True).between(start_time, end_time)
+
+    def save(self, symbol: str, interval: Interval, klines: KLines) -> None:
+        write_klines(self.path(symbol, interval), klines)
+
+    def update(
+        self,
+        client: Spot,
+        symbol: str,
+        interval: Interval,
+        start_time: int,
+        end_time: int,
+    ) -> KLines:
+        """Fill any gaps in ``[start_time, end_time]`` and return that range."""
+        stored = self.load(symbol, interval)
+        known_empty = self.known_empty(symbol, interval)
+        missing = missing_ranges(stored, interval, start_time, end_time, known_empty)
+
+        rows: List[List[Any]] = []
+        for start, end in missing:
+            rows.extend(fetch_klines(client, symbol, interval, start, end))
+
+        now = int(time() * 1000)
+        fetched = KLines(data=[row for row in rows if int(row[6]) < now])
+        if len(fetched):
+            logger.info(f"Stored {len(fetched)} new {symbol} {interval.value} klines")
+            stored = KLines.concat([stored, fetched])
+            self.save(symbol, interval, stored)
+
+        # What is still missing before the newest stored candle was fetched
+        # and has no candles. The tail after it is not recorded: candles there
+        # may just not be published yet.
+        newest = int(stored.open_time[-1]) if len(stored) else start_time
+        empty = [
+            (start, end)
+            for start, end in missing_ranges(stored, interval, start_time, end_time)
+            if end < newest
+        ]
+        if empty:
+            known_empty = merge_ranges(known_empty + empty)
+            _save_atomically(
+                self.empty_path(symbol, interval),
+                np.array(known_empty, dtype=np.int64).reshape(-1, 2),
+            )
+
+        return stored.between(start_time, end_time)
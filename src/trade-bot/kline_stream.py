@@ -0,0 +1,286 @@
+import json
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional
+
+import numpy as np
+import websocket
+from binance.spot import Spot
+from websocket import WebSocketConnectionClosedException, WebSocketException
+
+from constants import (
+    BINANCE_STREAM_URL,
+    STREAM_MAX_BACKOFF_SECONDS,
+    STREAM_RECONNECT_BACKOFF_SECONDS,
+)
+from data_classes import KLine, KLineBuffer, KLines
+from enums import Interval
+from logger import logger
+from market_data import fetch_klines
+from streaming import StreamingIndicator
+
+
+KLineHandler = Callable[[str, KLine], None]
+IndicatorHandler = Callable[[str, StreamingIndicator, Dict[str, float], int], None]
+
+
+def stream_name(symbol: str, interval: Interval) -> str:
+    return f"{symbol.lower()}@kline_{interval.value}"
+
+
+def parse_kline_event(kline: Dict[str, Any]) -> List[Any]:
+    """Turn the ``k`` object of a kline event into a REST-style kline row."""
+    return [
+        kline["t"],
+        kline["o"],
+        kline["h"],
+        kline["l"],
+        kline["c"],
+        kline["v"],
+        kline["T"],
+        kline["q"],
+        kline["n"],
+        kline["V"],
+        kline["Q"],
+        kline["B"],
+    ]
+
+
+class LatencyStats:
+    """Latency samples (seconds) over the most recent ``window`` events."""
+
+    def __init__(self, window: int = 10000) -> None:
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self.count += 1
+
+    def summary(self) -> Dict[str, float]:
+        if not self.samples:
+            return {"count": self.count}
+        samples = np.fromiter(self.samples, dtype=np.float64)
+        p50, p99 = np.percentile(samples, [50, 99])
+        return {
+            "count": self.count,
+            "mean": float(samples.mean()),
+            "p50": float(p50),
+            "p99": float(p99),
+            "max": float(samples.max()),
+        }
+
+
+class ReplayConnection:
+    """Websocket stand-in that plays back recorded messages, then closes.
+
+    Stream it with ``max_reconnects=0`` so the stream stops at the end.
+    """
+
+    def __init__(self, messages: Iterable[str]) -> None:
+        self._messages = iter(messages)
+        self.sent: List[str] = []
+        self.connected = True
+
+    def recv(self) -> str:
+        if self.connected:
+            message = next(self._messages, None)
+            if message is not None:
+                return message
+            self.connected = False
+        raise WebSocketConnectionClosedException("Replay finished")
+
+    def send(self, payload: str) -> None:
+        self.sent.append(payload)
+
+    def close(self) -> None:
+        self.connected = False
+
+
+class KLineStream:
+    """Combined kline stream for many symbols at one interval.
+
+    Closed candles are kept in a bounded ring buffer per symbol and pushed to
+    every subscribed handler as they arrive. Two latencies are measured per
+    candle: ``event_latency`` from the exchange event time to the end of the
+    dispatch, and ``dispatch_latency`` spent in the handlers alone.
+
+    A handler that raises is logged and skipped; the other handlers and the
+    stream carry on. When the socket drops, ``run`` reconnects with
+    exponential backoff (up to ``max_reconnects`` times, forever if None) and,
+    given a REST ``client``, first dispatches the candles that closed while
+    it was disconnected.
+    """
+
+    def __init__(
+        self,
+        symbols: List[str],
+        interval: Interval,
+        capacity: int = 1000,
+        url: str = BINANCE_STREAM_URL,
+        connect: Callable[[str], Any] = websocket.create_connection,
+        client: Optional[Spot] = None,
+        max_reconnects: Optional[int] = None,
+        backoff: float = STREAM_RECONNECT_BACKOFF_SECONDS,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.interval = interval
+        self.url = url
+        self._connect = connect
+        self.client = client
+        self.max_reconnects = max_reconnects
+        self.backoff = backoff
+        self._sleep = sleep
+        self._connection: Optional[Any] = None
+        self._running = False
+        self.buffers: Dict[str, KLineBuffer] = {
+            symbol.upper(): KLineBuffer(capacity) for symbol in symbols
+        }
+        self._handlers: Dict[Optional[str], List[KLineHandler]] = {}
+        # Open time of the newest candle dispatched per symbol.
+        self._last_open: Dict[str, int] = {}
+        self.event_latency = LatencyStats()
+        self.dispatch_latency = LatencyStats()
+
+    @property
+    def stream_url(self) -> str:
+        names = "/".join(stream_name(symbol, self.interval) for symbol in self.buffers)
+        return f"{self.url}/stream?streams={names}"
+
+    def subscribe(self, handler: KLineHandler, symbol: Optional[str] = None) -> None:
+        """Call ``handler(symbol, kline)`` for closed candles of ``symbol`` (or all)."""
+        key = symbol.upper() if symbol else None
+        self._handlers.setdefault(key, []).append(handler)
+
+    def add_indicator(
+        self,
+        symbol: str,
+        indicator: StreamingIndicator,
+        on_update: Optional[IndicatorHandler] = None,
+    ) -> None:
+        """Feed every closed candle of ``symbol`` to a streaming indicator."""
+
+        def handler(symbol: str, kline: KLine) -> None:
+            values, vote = indicator.update(kline)
+            if on_update is not None:
+                on_update(symbol, indicator, values, vote)
+
+        self.subscribe(handler, symbol)
+
+    def klines(self, symbol: str) -> KLines:
+        return self.buffers[symbol.upper()].to_klines()
+
+    def handle_message(self, message: str) -> None:
+        """Dispatch the closed candle in one stream frame.
+
+        A frame that is not JSON or lacks the expected kline fields is logged
+        and skipped.
+        """
+        try:
+            payload = json.loads(message)
+            event = payload.get("data", payload)
+            if event.get("e") != "kline" or not event["k"]["x"]:
+                return
+
+            symbol = event["s"]
+            if symbol not in self.buffers:
+                return
+            if self._dispatch(symbol, parse_kline_event(event["k"])):
+                self.event_latency.record(time.time() - event["E"] / 1000)
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            logger.warning(f"Skipping malformed stream frame {message!r}: {error!r}")
+
+    def _dispatch(self, symbol: str, row: List[Any]) -> bool:
+        """Buffer a closed candle and run the handlers on it; False if the
+        candle was already dispatched (e.g. by a backfill)."""
+        kline = KLine(row)
+        open_time = int(row[0])
+        if open_time <= self._last_open.get(symbol, -1):
+            return False
+        self._last_open[symbol] = open_time
+        self.buffers[symbol].append(row)
+
+        started = time.perf_counter()
+        for handler in self._handlers.get(symbol, []) + self._handlers.get(None, []):
+            try:
+                handler(symbol, kline)
+            except Exception as error:
+                logger.error(f"Kline handler failed for {symbol}: {error!r}")
+        self.dispatch_latency.record(time.perf_counter() - started)
+        return True
+
+    def backfill(self) -> None:
+        """Dispatch the candles that closed since each symbol's newest one."""
+        if self.client is None:
+            return
+        now = int(time.time() * 1000)
+        for symbol, last_open in list(self._last_open.items()):
+            try:
+                rows = fetch_klines(
+                    self.client, symbol, self.interval, last_open + 1, now
+                )
+            except Exception as error:
+                logger.error(f"Kline backfill failed for {symbol}: {error!r}")
+                continue
+            for row in rows:
+                # The newest row is the candle still open.
+                if int(row[6]) < now:
+                    self._dispatch(symbol, row)
+
+    def run(self) -> None:
+        """Receive and dispatch messages until ``stop``, reconnecting when the
+        socket drops."""
+        self._running = True
+        failures = 0
+        reconnects = 0
+        try:
+            while self._running:
+                try:
+                    self._connection = self._connect(self.stream_url)
+                except (WebSocketException, OSError) as error:
+                    logger.warning(f"Kline stream connect failed: {error!r}")
+                else:
+                    logger.info(
+                        f"Streaming {len(self.buffers)} {self.interval.value} klines"
+                    )
+                    if reconnects:
+                        self.backfill()
+                    if self._receive():
+                        failures = 0
+                if not self._running or (
+                    self.max_reconnects is not None
+                    and reconnects >= self.max_reconnects
+                ):
+                    break
+                delay = min(self.backoff * 2**failures, STREAM_MAX_BACKOFF_SECONDS)
+                failures += 1
+                reconnects += 1
+                logger.warning(f"Kline stream reconnecting in {delay:.1f}s")
+                self._sleep(delay)
+        finally:
+            self._running = False
+            if self._connection is not None:
+                self._connection.close()
+
+    def _receive(self) -> bool:
+        """Dispatch messages until the socket drops; True if any arrived."""
+        received = False
+        try:
+            while self._running:
+                message = self._connection.recv()
+                if message:
+                    received = True
+                    self.handle_message(message)
+        except (WebSocketException, OSError) as error:
+            if self._running and not isinstance(
+                error, WebSocketConnectionClosedException
+            ):
+                logger.warning(f"Kline stream dropped: {error!r}")
+        finally:
+            self._connection.close()
+        return received
+
+    def stop(self) -> None:
+        self._running = False
+        if self._connection is not None:
+            self._connection.close()
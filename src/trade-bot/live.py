@@ -0,0 +1,454 @@
+import argparse
+import asyncio
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Type
+
+from binance.error import ClientError
+from binance.spot import Spot
+
+import signals
+from constants import (
+    BINANCE_TESTNET_API_KEY,
+    BINANCE_TESTNET_API_SECRET,
+    BINANCE_TESTNET_BASE_URL,
+    BINANCE_TRADE_CURRENCY,
+    LIVE_CYCLE_BUDGET_SECONDS,
+    LIVE_HISTORY_CANDLES,
+    LIVE_MAX_CONCURRENCY,
+    LIVE_REQUEST_TIMEOUT_SECONDS,
+    LIVE_SETTLE_DELAY_SECONDS,
+)
+from data_classes import KLine, KLineBuffer, KLines
+from downloader import pool_connections
+from enums import Interval, OrderSide, OrderType
+from instrumentation import is_enabled, log_snapshot, record
+from logger import logger
+from mock_exchange import MockExchange
+from streaming import StreamingIndicator
+
+
+class AsyncClient:
+    """Awaitable calls on a blocking Binance client, run on a thread pool.
+
+    At most ``max_concurrency`` requests are in flight, and a caller stops
+    waiting after ``timeout`` seconds, so a slow request never blocks the
+    event loop or the requests for other symbols. Orders are the exception:
+    the request keeps running in its thread after a timeout, so an order
+    whose wait was abandoned may still be placed. ``new_order`` therefore
+    waits for the exchange's answer however long it takes.
+    """
+
+    def __init__(
+        self,
+        client: Spot,
+        max_concurrency: int = LIVE_MAX_CONCURRENCY,
+        timeout: float = LIVE_REQUEST_TIMEOUT_SECONDS,
+    ) -> None:
+        self.client = client
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="exchange"
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        pool_connections(client, max_concurrency)
+
+    async def call(self, method: str, **params: Any) -> Any:
+        return await self._call(method, self.timeout, **params)
+
+    async def _call(self, method: str, timeout: Optional[float], **params: Any) -> Any:
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                return await asyncio.wait_for(
+                    asyncio.get_running_loop().run_in_executor(
+                        self._executor, partial(getattr(self.client, method), **params)
+                    ),
+                    timeout,
+                )
+            finally:
+                if is_enabled():
+                    record(f"live.request.{method}", time.perf_counter() - started)
+
+    async def klines(
+        self, symbol: str, interval: Interval, **params: Any
+    ) -> List[List[Any]]:
+        return await self.call(
+            "klines", symbol=symbol, interval=interval.value, **params
+        )
+
+    async def new_order(
+        self, symbol: str, side: OrderSide, order_type: OrderType, **params: Any
+    ) -> Dict[str, Any]:
+        return await self._call(
+            "new_order",
+            None,
+            symbol=symbol,
+            side=side.name,
+            type=order_type.name,
+            **params,
+        )
+
+    async def symbol_info(self, symbol: str) -> Dict[str, Any]:
+        """The symbol's entry of ``exchange_info`` (assets and filters)."""
+        info = await self.call("exchange_info", symbol=symbol)
+        for symbol_info in info["symbols"]:
+            if symbol_info["symbol"] == symbol:
+                return symbol_info
+        raise ValueError(f"No exchange info for {symbol}")
+
+    async def free_balance(self, asset: str) -> float:
+        account = await self.call("account")
+        for balance in account["balances"]:
+            if balance["asset"] == asset:
+                return float(balance["free"])
+        return 0.0
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def round_to_step(quantity: float, step: str) -> str:
+    """Round ``quantity`` down to a multiple of the LOT_SIZE ``step``.
+
+    The result is formatted to the step's precision, as the exchange expects.
+    """
+    step_size = float(step)
+    decimals = len(step.rstrip("0").partition(".")[2])
+    # The small epsilon keeps exact multiples from flooring one step down.
+    steps = math.floor(quantity / step_size + 1e-9) if step_size > 0 else 0
+    return f"{steps * step_size:.{decimals}f}"
+
+
+def lot_step(symbol_info: Dict[str, Any]) -> str:
+    """The LOT_SIZE ``stepSize`` of a ``symbol_info``, as the exchange formats it."""
+    for symbol_filter in symbol_info["filters"]:
+        if symbol_filter["filterType"] == "LOT_SIZE":
+            return symbol_filter["stepSize"]
+    raise ValueError(f"No LOT_SIZE filter for {symbol_info['symbol']}")
+
+
+def commission_paid(order: Dict[str, Any], asset: str) -> float:
+    """Commission the fills of an order response paid in ``asset``."""
+    return sum(
+        float(fill["commission"])
+        for fill in order.get("fills", [])
+        if fill.get("commissionAsset") == asset
+    )
+
+
+def client_order_id(symbol: str, boundary: int, side: OrderSide) -> str:
+    """Deterministic client order id of the ``side`` order for one candle."""
+    return f"tb-{symbol}-{boundary}-{side.name[0]}"
+
+
+class CandleScheduler:
+    """Async iterator over candle boundaries of ``interval``, as epoch ms.
+
+    Each boundary (the open time of the new candle, one ms after the previous
+    candle's close time) is yielded ``delay`` seconds after it passes, giving
+    the exchange time to publish the closed candle. Boundaries missed while
+    the consumer was busy are skipped, not replayed back to back.
+    """
+
+    def __init__(
+        self,
+        interval: Interval,
+        delay: float = LIVE_SETTLE_DELAY_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.interval = interval
+        self.delay = delay
+        self._clock = clock
+
+    def _now(self) -> int:
+        return int((self._clock() - self.delay) * 1000)
+
+    async def __aiter__(self) -> AsyncIterator[int]:
+        boundary = self.interval.next_open_time(self._now())
+        while True:
+            wait = boundary / 1000 + self.delay - self._clock()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            yield boundary
+
+            following = self.interval.next_open_time(boundary)
+            latest = self.interval.open_time(self._now())
+            if latest > following:
+                logger.warning(
+                    f"Skipping {self.interval.value} candles closed while the "
+                    f"previous cycle ran, resuming at {latest}"
+                )
+                following = latest
+            boundary = following
+
+
+@dataclass
+class SymbolState:
+    buffer: KLineBuffer
+    indicator: Optional[StreamingIndicator] = None
+    last_open_time: int = -1
+    vote: int = 0
+    position: float = 0.0
+    lot_step: Optional[str] = None
+    base_asset: Optional[str] = None
+    orders: List[Dict[str, Any]] = field(default_factory=list)
+
+
+class LiveTrader:
+    """Trades one signal on many symbols, once per closed candle.
+
+    Every cycle fetches each symbol's newly closed candles concurrently,
+    feeds them to the signal's streaming indicator and places market orders
+    concurrently: a BUY vote opens a long position worth ``order_size`` of
+    the quote asset and a SELL vote closes it. Each order carries a client
+    order id derived from the candle, so an order whose outcome is unknown
+    is looked up rather than sent again. Cycles that finish more than
+    ``cycle_budget`` seconds after the candle closed are logged with their
+    per-stage timings.
+    """
+
+    def __init__(
+        self,
+        client: AsyncClient,
+        symbols: List[str],
+        interval: Interval,
+        signal_class: Type[signals.BaseSignal],
+        signal_params: Optional[Dict[str, Any]] = None,
+        order_size: float = 100.0,
+        history: int = LIVE_HISTORY_CANDLES,
+        cycle_budget: float = LIVE_CYCLE_BUDGET_SECONDS,
+        scheduler: Optional[CandleScheduler] = None,
+    ) -> None:
+        self.client = client
+        self.interval = interval
+        self.signal_class = signal_class
+        self.signal_params = signal_params or {}
+        self.order_size = order_size
+        self.history = history
+        self.cycle_budget = cycle_budget
+        self.scheduler = scheduler or CandleScheduler(interval)
+        self.states: Dict[str, SymbolState] = {
+            symbol.upper(): SymbolState(KLineBuffer(history)) for symbol in symbols
+        }
+        self.cycles = 0
+        self.overruns = 0
+        self._running = False
+
+    def klines(self, symbol: str) -> KLines:
+        return self.states[symbol.upper()].buffer.to_klines()
+
+    async def _fetch(self, symbol: str, boundary: int) -> List[List[Any]]:
+        state = self.states[symbol]
+        if state.last_open_time < 0:
+            params = {"endTime": boundary - 1, "limit": self.history}
+        else:
+            params = {"startTime": state.last_open_time + 1, "endTime": boundary - 1}
+        rows = await self.client.klines(symbol, self.interval, **params)
+        return [row for row in rows if int(row[6]) < boundary]
+
+    async def _refresh(self, symbol: str, boundary: int) -> None:
+        rows = await self._fetch(symbol, boundary)
+        state = self.states[symbol]
+        if state.lot_step is None:
+            symbol_info = await self.client.symbol_info(symbol)
+            state.lot_step = lot_step(symbol_info)
+            state.base_asset = symbol_info["baseAsset"]
+        if state.indicator is None:
+            for row in rows:
+                state.buffer.append(row)
+            klines = state.buffer.to_klines()
+            signal = self.signal_class(klines, **self.signal_params)
+            state.indicator = signal.stream()
+            state.vote = int(signal.votes()[-1]) if len(klines) else 0
+        else:
+            for row in rows:
+                state.buffer.append(row)
+                _, state.vote = state.indicator.update(KLine(row))
+        if rows:
+            state.last_open_time = int(rows[-1][0])
+
+    async def _place(
+        self, symbol: str, side: OrderSide, boundary: int, **params: Any
+    ) -> Dict[str, Any]:
+        """Place a market order, or find it if the request failed in transit.
+
+        A ``ClientError`` is the exchange rejecting the order. Any other
+        failure (a dropped connection, a transport timeout) leaves its
+        outcome unknown, so the order is looked up by its client order id
+        and only reported failed if the exchange never received it.
+        """
+        order_id = client_order_id(symbol, boundary, side)
+        try:
+            return await self.client.new_order(
+                symbol, side, OrderType.MARKET, newClientOrderId=order_id, **params
+            )
+        except ClientError:
+            raise
+        except Exception as error:
+            try:
+                order = await self.client.call(
+                    "get_order", symbol=symbol, origClientOrderId=order_id
+                )
+            except ClientError:
+                raise error
+            logger.warning(f"Order {order_id} was placed despite {error!r}")
+            return order
+
+    async def _bought(self, state: SymbolState, order: Dict[str, Any]) -> float:
+        """Base quantity a BUY left in the account.
+
+        ``executedQty`` is gross: unless fees are paid in another asset (BNB),
+        the commission comes out of the base asset bought. An order found by
+        lookup has no ``fills``, so the free balance bounds it instead.
+        """
+        quantity = float(order["executedQty"])
+        if "fills" in order:
+            return quantity - commission_paid(order, state.base_asset)
+        return min(quantity, await self.client.free_balance(state.base_asset))
+
+    async def _trade(self, symbol: str, boundary: int) -> Optional[Dict[str, Any]]:
+        state = self.states[symbol]
+        if state.vote == 1 and state.position == 0:
+            order = await self._place(
+                symbol, OrderSide.BUY, boundary, quoteOrderQty=self.order_size
+            )
+            state.position = await self._bought(state, order)
+        elif state.vote == -1 and state.position > 0:
+            quantity = round_to_step(state.position, state.lot_step)
+            if float(quantity) <= 0:
+                logger.info(f"{state.position} {symbol} is below one lot, not sold")
+                state.position = 0.0
+                return None
+            order = await self._place(
+                symbol, OrderSide.SELL, boundary, quantity=quantity
+            )
+            # What is left below one lot cannot be sold.
+            state.position = 0.0
+        else:
+            return None
+        state.orders.append(order)
+        logger.info(
+            f"{order['side']} {order['executedQty']} {symbol} "
+            f"for {order['cummulativeQuoteQty']}"
+        )
+        return order
+
+    @staticmethod
+    async def _each(
+        function: Callable[..., Awaitable[Any]], symbols: List[str], *args: Any
+    ) -> List[str]:
+        """Await ``function(symbol, *args)`` for all symbols concurrently.
+
+        Failures are logged and the symbols that succeeded are returned.
+        """
+        results = await asyncio.gather(
+            *(function(symbol, *args) for symbol in symbols), return_exceptions=True
+        )
+        succeeded = []
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, BaseException):
+                logger.error(f"{function.__name__} failed for {symbol}: {result!r}")
+            else:
+                succeeded.append(symbol)
+        return succeeded
+
+    async def run_cycle(self, boundary: int) -> Dict[str, float]:
+        """Process the candles closed before ``boundary`` (epoch ms)."""
+        started = time.perf_counter()
+        refreshed = await self._each(self._refresh, list(self.states), boundary)
+        after_fetch = time.perf_counter()
+        await self._each(self._trade, refreshed, boundary)
+        finished = time.perf_counter()
+
+        self.cycles += 1
+        timings = {
+            "fetch": after_fetch - started,
+            "orders": finished - after_fetch,
+            "cycle": finished - started,
+            "lag": time.time() - boundary / 1000,
+        }
+        if is_enabled():
+            for stage, seconds in timings.items():
+                record(f"live.{stage}", seconds)
+        if timings["lag"] > self.cycle_budget:
+            self.overruns += 1
+            logger.warning(
+                f"Cycle {boundary} finished {timings['lag']:.3f}s after the candle "
+                f"closed, over its {self.cycle_budget:.3f}s budget (fetch "
+                f"{timings['fetch']:.3f}s, orders {timings['orders']:.3f}s)"
+            )
+        return timings
+
+    async def run(self, cycles: Optional[int] = None) -> None:
+        """Trade every closed candle until ``stop`` or after ``cycles`` cycles."""
+        self._running = True
+        logger.info(
+            f"Trading {self.signal_class.__name__} on {len(self.states)} symbols "
+            f"every {self.interval.value}"
+        )
+        async for boundary in self.scheduler:
+            await self.run_cycle(boundary)
+            if not self._running or (cycles is not None and self.cycles >= cycles):
+                break
+        self._running = False
+
+    def stop(self) -> None:
+        self._running = False
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Trade bot live runtime")
+    parser.add_argument(
+        "--symbols", nargs="+", default=[f"ETH{BINANCE_TRADE_CURRENCY}"]
+    )
+    parser.add_argument(
+        "--interval",
+        choices=[interval.value for interval in Interval],
+        default=Interval.MINUTE_1.value,
+    )
+    parser.add_argument("--signal", default=signals.RSISignal.__name__)
+    parser.add_argument("--order-size", type=float, default=100.0)
+    parser.add_argument("--cycles", type=int, help="stop after this many candles")
+    parser.add_argument(
+        "--mock", action="store_true", help="trade against a local mock exchange"
+    )
+    options = parser.parse_args(arguments)
+
+    if options.mock:
+        exchange = MockExchange()
+    else:
+        exchange = Spot(
+            api_key=BINANCE_TESTNET_API_KEY,
+            api_secret=BINANCE_TESTNET_API_SECRET,
+            base_url=BINANCE_TESTNET_BASE_URL,
+        )
+
+    async def run() -> None:
+        client = AsyncClient(exchange)
+        trader = LiveTrader(
+            client,
+            options.symbols,
+            Interval(options.interval),
+            getattr(signals, options.signal),
+            order_size=options.order_size,
+        )
+        try:
+            await trader.run(options.cycles)
+        finally:
+            client.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    if is_enabled():
+        log_snapshot()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,14 +1,16 @@
 from time import time
-from typing import List, Any
 
 from binance.spot import Spot
 from data_classes import KLines
 from enums import Interval
+from kline_store import KLineStore
+from instrumentation import is_enabled, log_snapshot
 from constants import (
     BINANCE_TESTNET_API_KEY,
     BINANCE_TESTNET_API_SECRET,
     BINANCE_TRADE_CURRENCY,
     BINANCE_TESTNET_DATA_URL,
+    KLINE_STORE_PATH,
 )
 from strategies import RSIStrategy, MACDStrategy, CombinedStrategy
 
@@ -21,20 +23,16 @@ if __name__ == "__main__":
     )
 
     symbol = f"ETH{BINANCE_TRADE_CURRENCY}"
-    interval = Interval.MINUTE_30.value
+    interval = Interval.MINUTE_30
     start_time = int((time() - 10080 * 60) * 1000)
     end_time = int((time()) * 1000)
     initial_balance = 10000
 
-    new_kline_data: List[List[Any]] = data_client.klines(
-        symbol=symbol,
-        interval=interval,
-        startTime=start_time,
-        endTime=end_time,
+    kline_store = KLineStore(KLINE_STORE_PATH)
+    new_klines: KLines = kline_store.update(
+        data_client, symbol, interval, start_time, end_time
     )
 
-    new_klines: KLines = KLines(data=new_kline_data)
-
     rsi = RSIStrategy(
         klines=new_klines,
         initial_balance=initial_balance,
@@ -52,4 +50,7 @@ if __name__ == "__main__":
     )
     combined_strategy.apply_combined_strategy()
     print(combined_strategy.get_trade_log())
-    print(new_klines.to_dataframe())
\ No newline at end of file
+    print(new_klines.to_dataframe())
+
+    if is_enabled():
+        log_snapshot()
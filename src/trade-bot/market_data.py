@@ -0,0 +1,44 @@
+from typing import Any, List
+
+from binance.spot import Spot
+
+from constants import BINANCE_KLINES_LIMIT
+from enums import Interval
+from instrumentation import Timer, count, timed
+
+
+@timed("market_data.fetch_klines")
+def fetch_klines(
+    client: Spot,
+    symbol: str,
+    interval: Interval,
+    start_time: int,
+    end_time: int,
+    limit: int = BINANCE_KLINES_LIMIT,
+) -> List[List[Any]]:
+    """Download every kline opening in ``[start_time, end_time]`` (epoch ms).
+
+    Binance caps a klines request at ``limit`` rows, so the range is walked
+    page by page, each page starting just after the last candle received.
+    """
+    rows: List[List[Any]] = []
+    while start_time <= end_time:
+        with Timer("market_data.klines_request"):
+            page: List[List[Any]] = client.klines(
+                symbol=symbol,
+                interval=interval.value,
+                startTime=start_time,
+                endTime=end_time,
+                limit=limit,
+            )
+        count("market_data.klines_requests")
+        count("market_data.klines_rows", len(page))
+        if not page:
+            break
+
+        rows.extend(page)
+        if len(page) < limit:
+            break
+        start_time = int(page[-1][6]) + 1
+
+    return rows
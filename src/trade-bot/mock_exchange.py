@@ -0,0 +1,503 @@
+import math
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from binance.error import ClientError
+
+from constants import BINANCE_TRADE_CURRENCY
+from enums import Interval, OrderSide, OrderStatus, OrderType, TimeInForce
+
+
+INTERVALS = {interval.value: interval for interval in Interval}
+
+# The synthetic price path is two sine waves of these periods, measured in
+# ``time_scale`` candles, plus a little per-candle noise.
+PRICE_PERIODS = (50, 13)
+PRICE_AMPLITUDES = (0.03, 0.01)
+PRICE_NOISE = 0.002
+QUANTITY_SCALE = 10**8
+# Binance's standard spot commission, taken from the asset each fill receives.
+FEE_RATE = 0.001
+
+LIMIT_ORDER_TYPES = (OrderType.LIMIT.name, OrderType.LIMIT_MAKER.name)
+IMMEDIATE_TIME_IN_FORCE = (TimeInForce.IOC.name, TimeInForce.FOK.name)
+
+
+def _noise(seed: int, keys: np.ndarray) -> np.ndarray:
+    """Deterministic uniform noise in [-1, 1) per (seed, key), via splitmix64."""
+    with np.errstate(over="ignore"):
+        z = keys.astype(np.uint64) + np.uint64(seed) * np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        z = z ^ (z >> np.uint64(31))
+    return (z >> np.uint64(11)).astype(np.float64) / 2.0**52 - 1.0
+
+
+def _amount(value: float) -> str:
+    """A balance to 8 decimals, rounded down so it is never more than held."""
+    return f"{math.floor(value * QUANTITY_SCALE) / QUANTITY_SCALE:.8f}"
+
+
+class MockExchange:
+    """In-process stand-in for the Binance ``Spot`` client.
+
+    Every symbol follows a deterministic synthetic price path, so klines can
+    be served for any range up to the current time. Orders trade against
+    in-memory balances and every status change is queued as a user data
+    stream execution report (see ``drain_events``). ``latency`` adds a
+    blocking delay to every call, like a slow HTTP round trip. Every fill
+    pays ``fee_rate`` of the asset it receives as commission, reported in
+    the order's ``fills`` and execution reports. Errors are raised as
+    ``binance.error.ClientError``, as the real client does.
+    """
+
+    def __init__(
+        self,
+        balances: Optional[Dict[str, float]] = None,
+        quote_asset: str = BINANCE_TRADE_CURRENCY,
+        time_scale: Interval = Interval.MINUTE_1,
+        latency: float = 0.0,
+        seed: int = 0,
+        clock: Callable[[], float] = time.time,
+        fee_rate: float = FEE_RATE,
+    ) -> None:
+        self.balances: Dict[str, float] = dict(
+            balances if balances is not None else {quote_asset: 10000.0}
+        )
+        self.quote_asset = quote_asset
+        self.time_scale = time_scale
+        self.latency = latency
+        self.seed = seed
+        self._clock = clock
+        self.fee_rate = fee_rate
+        self.locked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._next_order_id = 1
+        self.orders: Dict[int, Dict[str, Any]] = {}
+        self._open_orders: Dict[str, Dict[int, Dict[str, Any]]] = {}
+        self._client_ids: Dict[Tuple[str, str], int] = {}
+        self.events: List[Dict[str, Any]] = []
+        self.calls: Dict[str, int] = {}
+
+    def _call(self, name: str) -> None:
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+        self.match()
+
+    def _now(self) -> int:
+        return int(self._clock() * 1000)
+
+    def _symbol_seed(self, symbol: str) -> int:
+        return zlib.crc32(symbol.encode()) + self.seed
+
+    def prices(self, symbol: str, times: np.ndarray) -> np.ndarray:
+        """Price of ``symbol`` at each epoch-ms time on its synthetic path."""
+        seed = self._symbol_seed(symbol)
+        base = 10.0 + seed % 5000
+        position = np.asarray(times, dtype=np.float64) / self.time_scale.milliseconds
+        log_price = np.zeros_like(position)
+        for period, amplitude in zip(PRICE_PERIODS, PRICE_AMPLITUDES):
+            phase = (seed % period) / period
+            log_price += amplitude * np.sin(2 * math.pi * (position / period + phase))
+        log_price += PRICE_NOISE * _noise(seed, np.floor(position).astype(np.int64))
+        return base * np.exp(log_price)
+
+    def price(self, symbol: str) -> float:
+        return float(self.prices(symbol, np.array([self._now()]))[0])
+
+    def base_asset(self, symbol: str) -> str:
+        if not symbol.endswith(self.quote_asset):
+            raise ClientError(400, -1121, "Invalid symbol.", {})
+        return symbol[: -len(self.quote_asset)]
+
+    def time(self) -> Dict[str, int]:
+        self._call("time")
+        return {"serverTime": self._now()}
+
+    def exchange_info(
+        self, symbol: Optional[str] = None, symbols: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Symbol rules; quantities trade in steps of 1e-8."""
+        self._call("exchange_info")
+        names = [symbol] if symbol is not None else symbols or []
+        return {
+            "symbols": [
+                {
+                    "symbol": name,
+                    "baseAsset": self.base_asset(name),
+                    "quoteAsset": self.quote_asset,
+                    "filters": [
+                        {
+                            "filterType": "LOT_SIZE",
+                            "minQty": f"{1 / QUANTITY_SCALE:.8f}",
+                            "maxQty": "9000000.00000000",
+                            "stepSize": f"{1 / QUANTITY_SCALE:.8f}",
+                        }
+                    ],
+                }
+                for name in names
+            ]
+        }
+
+    def klines(self, symbol: str, interval: str, **kwargs) -> List[List[Any]]:
+        """Candles opening in [startTime, endTime], the newest possibly open."""
+        self._call("klines")
+        interval = INTERVALS[interval]
+        limit = min(int(kwargs.get("limit", 500)), 1000)
+        now = self._now()
+        end_time = min(int(kwargs.get("endTime", now)), now)
+        last = interval.open_time(end_time)
+        start_time = kwargs.get("startTime")
+        if start_time is None:
+            first = last
+            for _ in range(limit - 1):
+                first = interval.open_time(first - 1)
+        else:
+            first = interval.open_time(int(start_time))
+            if first < int(start_time):
+                first = interval.next_open_time(first)
+
+        open_times = []
+        while first <= last and len(open_times) < limit:
+            open_times.append(first)
+            first = interval.next_open_time(first)
+        if not open_times:
+            return []
+
+        open_time = np.array(open_times, dtype=np.int64)
+        close_time = np.array(
+            [interval.next_open_time(t) - 1 for t in open_times], dtype=np.int64
+        )
+        seed = self._symbol_seed(symbol)
+        open_ = self.prices(symbol, open_time)
+        close = self.prices(symbol, np.minimum(close_time + 1, now))
+        spread = 1 + 0.001 * np.abs(_noise(seed + 1, open_time))
+        high = np.maximum(open_, close) * spread
+        low = np.minimum(open_, close) / spread
+        volume = 1 + 50 * np.abs(_noise(seed + 2, open_time))
+        return [
+            [
+                int(open_time[i]),
+                f"{open_[i]:.8f}",
+                f"{high[i]:.8f}",
+                f"{low[i]:.8f}",
+                f"{close[i]:.8f}",
+                f"{volume[i]:.8f}",
+                int(close_time[i]),
+                f"{volume[i] * close[i]:.8f}",
+                int(volume[i] * 10),
+                f"{volume[i] / 2:.8f}",
+                f"{volume[i] * close[i] / 2:.8f}",
+                "0",
+            ]
+            for i in range(len(open_times))
+        ]
+
+    def ticker_price(
+        self, symbol: Optional[str] = None, symbols: Optional[List[str]] = None
+    ) -> Any:
+        self._call("ticker_price")
+        if symbol is not None:
+            return {"symbol": symbol, "price": f"{self.price(symbol):.8f}"}
+        return [
+            {"symbol": name, "price": f"{self.price(name):.8f}"}
+            for name in symbols or []
+        ]
+
+    def account(self, **kwargs) -> Dict[str, Any]:
+        self._call("account")
+        with self._lock:
+            assets = sorted(set(self.balances) | set(self.locked))
+            return {
+                "balances": [
+                    {
+                        "asset": asset,
+                        "free": _amount(self.balances.get(asset, 0.0)),
+                        "locked": _amount(self.locked.get(asset, 0.0)),
+                    }
+                    for asset in assets
+                ]
+            }
+
+    def drain_events(self) -> List[Dict[str, Any]]:
+        """Execution reports since the last call, as the user data stream sends."""
+        with self._lock:
+            events, self.events = self.events, []
+        return events
+
+    def _response(self, order: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "symbol": order["symbol"],
+            "orderId": order["orderId"],
+            "clientOrderId": order["clientOrderId"],
+            "price": f"{order['price']:.8f}",
+            "origQty": f"{order['origQty']:.8f}",
+            "executedQty": f"{order['executedQty']:.8f}",
+            "cummulativeQuoteQty": f"{order['cummulativeQuoteQty']:.8f}",
+            "status": order["status"].binance_name,
+            "timeInForce": order["timeInForce"],
+            "type": order["type"],
+            "side": order["side"],
+            "time": order["time"],
+            "updateTime": order["updateTime"],
+        }
+
+    def _report(
+        self,
+        order: Dict[str, Any],
+        last_quantity: float = 0.0,
+        last_price: float = 0.0,
+        commission: float = 0.0,
+        commission_asset: Optional[str] = None,
+    ) -> None:
+        self.events.append(
+            {
+                "e": "executionReport",
+                "E": order["updateTime"],
+                "s": order["symbol"],
+                "c": order["clientOrderId"],
+                "S": order["side"],
+                "o": order["type"],
+                "f": order["timeInForce"],
+                "q": f"{order['origQty']:.8f}",
+                "p": f"{order['price']:.8f}",
+                "X": order["status"].binance_name,
+                "i": order["orderId"],
+                "l": f"{last_quantity:.8f}",
+                "z": f"{order['executedQty']:.8f}",
+                "L": f"{last_price:.8f}",
+                "n": f"{commission:.8f}",
+                "N": commission_asset,
+                "Z": f"{order['cummulativeQuoteQty']:.8f}",
+                "T": order["updateTime"],
+            }
+        )
+
+    def _assets(
+        self, order: Dict[str, Any], price: float
+    ) -> Tuple[str, float, str, float]:
+        """(asset spent, amount, asset received, amount) for filling ``order``."""
+        base = self.base_asset(order["symbol"])
+        quantity = order["origQty"]
+        if order["side"] == OrderSide.BUY.name:
+            return self.quote_asset, quantity * price, base, quantity
+        return base, quantity, self.quote_asset, quantity * price
+
+    def _check_funds(self, asset: str, amount: float) -> None:
+        if self.balances.get(asset, 0.0) < amount * (1 - 1e-12):
+            raise ClientError(400, -2010, "Account has insufficient balance.", {})
+
+    def _move(self, book: Dict[str, float], asset: str, amount: float) -> None:
+        book[asset] = max(book.get(asset, 0.0) + amount, 0.0)
+
+    def _fill(self, order: Dict[str, Any], price: float) -> Tuple[float, str]:
+        """Fill ``order`` in full; returns the (commission, asset) it paid."""
+        spend, spend_amount, receive, receive_amount = self._assets(order, price)
+        # Charged in whole steps of 1e-8, so what is reported is what is paid.
+        commission = (
+            math.ceil(receive_amount * self.fee_rate * QUANTITY_SCALE) / QUANTITY_SCALE
+        )
+        self._move(self.balances, spend, -spend_amount)
+        self._move(self.balances, receive, receive_amount - commission)
+        order["executedQty"] = order["origQty"]
+        order["cummulativeQuoteQty"] = order["origQty"] * price
+        self._finish(
+            order, OrderStatus.FILLED, order["origQty"], price, commission, receive
+        )
+        return commission, receive
+
+    def _finish(
+        self,
+        order: Dict[str, Any],
+        status: OrderStatus,
+        last_quantity: float = 0.0,
+        last_price: float = 0.0,
+        commission: float = 0.0,
+        commission_asset: Optional[str] = None,
+    ) -> None:
+        order["status"] = status
+        order["updateTime"] = self._now()
+        self._open_orders.get(order["symbol"], {}).pop(order["orderId"], None)
+        self._report(order, last_quantity, last_price, commission, commission_asset)
+
+    def _release(self, order: Dict[str, Any]) -> None:
+        # Give back what a resting order locked when it was placed.
+        asset, amount, _, _ = self._assets(order, order["price"])
+        self._move(self.locked, asset, -amount)
+        self._move(self.balances, asset, amount)
+
+    def match(self) -> int:
+        """Fill resting limit orders that the current price has crossed.
+
+        Runs before every call, so orders fill as the synthetic market moves.
+        Resting orders fill in full at their limit price.
+        """
+        filled = 0
+        with self._lock:
+            for symbol, book in self._open_orders.items():
+                if not book:
+                    continue
+                price = self.price(symbol)
+                for order in list(book.values()):
+                    buy = order["side"] == OrderSide.BUY.name
+                    if price <= order["price"] if buy else price >= order["price"]:
+                        self._release(order)
+                        self._fill(order, order["price"])
+                        filled += 1
+        return filled
+
+    def _find(self, symbol: str, **kwargs) -> Dict[str, Any]:
+        order_id = kwargs.get("orderId")
+        if order_id is None:
+            order_id = self._client_ids.get((symbol, kwargs.get("origClientOrderId")))
+        order = self.orders.get(order_id)
+        if order is None or order["symbol"] != symbol:
+            raise ClientError(400, -2013, "Order does not exist.", {})
+        return order
+
+    def new_order(self, symbol: str, side: str, type: str, **kwargs) -> Dict[str, Any]:
+        """Place a MARKET, LIMIT or LIMIT_MAKER order.
+
+        Market orders and limit orders that cross the current price fill at
+        once at that price; IOC/FOK limit orders that do not cross expire and
+        the rest lock their funds and wait for ``match``.
+        """
+        self._call("new_order")
+        if type not in (OrderType.MARKET.name, *LIMIT_ORDER_TYPES):
+            raise ClientError(400, -1013, f"Unsupported order type {type}.", {})
+        if side not in OrderSide.__members__:
+            raise ClientError(400, -1117, "Invalid side.", {})
+        self.base_asset(symbol)
+        price = self.price(symbol)
+        limit_price = None
+        if type in LIMIT_ORDER_TYPES:
+            if kwargs.get("price") is None:
+                raise ClientError(400, -1102, "Mandatory parameter 'price'.", {})
+            limit_price = float(kwargs["price"])
+        time_in_force = kwargs.get("timeInForce")
+        if type == OrderType.LIMIT.name and time_in_force is None:
+            raise ClientError(400, -1102, "Mandatory parameter 'timeInForce'.", {})
+
+        quantity = kwargs.get("quantity")
+        if quantity is None:
+            quote_quantity = kwargs.get("quoteOrderQty")
+            if quote_quantity is None or limit_price is not None:
+                raise ClientError(400, -1102, "Mandatory parameter 'quantity'.", {})
+            quantity = float(quote_quantity) / price
+        # Fill in whole steps of 1e-8, the precision quantities are reported in.
+        quantity = math.floor(float(quantity) * QUANTITY_SCALE) / QUANTITY_SCALE
+        if quantity <= 0:
+            raise ClientError(400, -1013, "Invalid quantity.", {})
+
+        buy = side == OrderSide.BUY.name
+        crosses = limit_price is None or (
+            price <= limit_price if buy else price >= limit_price
+        )
+        if type == OrderType.LIMIT_MAKER.name and crosses:
+            raise ClientError(400, -2010, "Order would immediately match.", {})
+        expires = not crosses and time_in_force in IMMEDIATE_TIME_IN_FORCE
+
+        with self._lock:
+            client_order_id = kwargs.get("newClientOrderId")
+            if client_order_id is None:
+                client_order_id = f"mock-{self._next_order_id}"
+            existing = self.orders.get(self._client_ids.get((symbol, client_order_id)))
+            if existing is not None and existing["orderId"] in self._open_orders.get(
+                symbol, {}
+            ):
+                raise ClientError(400, -2010, "Duplicate order sent.", {})
+
+            now = self._now()
+            order = {
+                "symbol": symbol,
+                "orderId": self._next_order_id,
+                "clientOrderId": client_order_id,
+                "price": limit_price or 0.0,
+                "origQty": quantity,
+                "executedQty": 0.0,
+                "cummulativeQuoteQty": 0.0,
+                "status": OrderStatus.NEW,
+                "timeInForce": time_in_force or TimeInForce.GTC.name,
+                "type": type,
+                "side": side,
+                "time": now,
+                "updateTime": now,
+            }
+            spend, spend_amount, _, _ = self._assets(order, limit_price or price)
+            if not expires:
+                self._check_funds(spend, spend_amount)
+
+            self._next_order_id += 1
+            self.orders[order["orderId"]] = order
+            self._client_ids[symbol, client_order_id] = order["orderId"]
+            if crosses:
+                commission, commission_asset = self._fill(order, price)
+            elif expires:
+                self._finish(order, OrderStatus.EXPIRED)
+            else:
+                self._move(self.balances, spend, -spend_amount)
+                self._move(self.locked, spend, spend_amount)
+                self._open_orders.setdefault(symbol, {})[order["orderId"]] = order
+                self._report(order)
+
+            response = self._response(order)
+        response["transactTime"] = now
+        if order["status"] is OrderStatus.FILLED:
+            response["fills"] = [
+                {
+                    "price": f"{price:.8f}",
+                    "qty": f"{quantity:.8f}",
+                    "commission": f"{commission:.8f}",
+                    "commissionAsset": commission_asset,
+                }
+            ]
+        return response
+
+    def cancel_order(self, symbol: str, **kwargs) -> Dict[str, Any]:
+        self._call("cancel_order")
+        with self._lock:
+            order = self._find(symbol, **kwargs)
+            if order["orderId"] not in self._open_orders.get(symbol, {}):
+                raise ClientError(400, -2011, "Unknown order sent.", {})
+            self._release(order)
+            self._finish(order, OrderStatus.CANCELLED)
+            response = self._response(order)
+        response["origClientOrderId"] = response["clientOrderId"]
+        return response
+
+    def cancel_open_orders(self, symbol: str, **kwargs) -> List[Dict[str, Any]]:
+        self._call("cancel_open_orders")
+        with self._lock:
+            book = self._open_orders.get(symbol, {})
+            if not book:
+                raise ClientError(400, -2011, "Unknown order sent.", {})
+            responses = []
+            for order in list(book.values()):
+                self._release(order)
+                self._finish(order, OrderStatus.CANCELLED)
+                response = self._response(order)
+                response["origClientOrderId"] = response["clientOrderId"]
+                responses.append(response)
+        return responses
+
+    def get_order(self, symbol: str, **kwargs) -> Dict[str, Any]:
+        self._call("get_order")
+        with self._lock:
+            return self._response(self._find(symbol, **kwargs))
+
+    def get_open_orders(
+        self, symbol: Optional[str] = None, **kwargs
+    ) -> List[Dict[str, Any]]:
+        self._call("get_open_orders")
+        with self._lock:
+            books = (
+                [self._open_orders.get(symbol, {})]
+                if symbol is not None
+                else list(self._open_orders.values())
+            )
+            return [self._response(order) for book in books for order in book.values()]
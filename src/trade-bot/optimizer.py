@@ -0,0 +1,179 @@
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Type
+
+from pandas import DataFrame
+
+from data_classes import KLines
+from performance import batch_metrics, periods_per_year
+from shared_klines import SharedKLines, init_worker, worker_klines
+from strategies import BaseStrategy
+
+
+ParameterSpace = Dict[str, Sequence[Any]]
+
+# Parameter sets backtested and scored together by ``evaluate_batch``; bounds
+# the (runs x bars) matrices of ``batch_metrics``.
+SWEEP_BATCH_SIZE = 64
+
+
+def grid(space: ParameterSpace) -> List[Dict[str, Any]]:
+    names = list(space)
+    return [
+        dict(zip(names, values))
+        for values in itertools.product(*(space[name] for name in names))
+    ]
+
+
+def sample(
+    space: ParameterSpace, n_iter: int, seed: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Draw ``n_iter`` distinct parameter sets uniformly from the grid."""
+    candidates = grid(space)
+    if n_iter >= len(candidates):
+        return candidates
+    return random.Random(seed).sample(candidates, n_iter)
+
+
+def evaluate_batch(
+    strategy_class: Type[BaseStrategy],
+    klines: KLines,
+    parameter_sets: List[Dict[str, Any]],
+    initial_balance: float,
+    allow_short: bool = False,
+) -> List[Dict[str, Any]]:
+    """Backtest each parameter set and score all of them in one metrics pass."""
+    strategies = [
+        strategy_class(
+            klines=klines,
+            initial_balance=initial_balance,
+            allow_short=allow_short,
+            **params,
+        )
+        for params in parameter_sets
+    ]
+    results = [strategy.apply_vectorized_strategy() for strategy in strategies]
+    scores = batch_metrics(results, initial_balance, periods_per_year(klines.open_time))
+    return [
+        {
+            **params,
+            "final_equity": result.final_equity,
+            "final_balance": strategy.balance,
+            "trade_count": result.trade_count,
+            **{name: float(values[run]) for name, values in scores.items()},
+        }
+        for run, (params, strategy, result) in enumerate(
+            zip(parameter_sets, strategies, results)
+        )
+    ]
+
+
+def evaluate(
+    strategy_class: Type[BaseStrategy],
+    klines: KLines,
+    params: Dict[str, Any],
+    initial_balance: float,
+    allow_short: bool = False,
+) -> Dict[str, Any]:
+    return evaluate_batch(
+        strategy_class, klines, [params], initial_balance, allow_short
+    )[0]
+
+
+def _evaluate_in_worker(task: tuple) -> List[Dict[str, Any]]:
+    strategy_class, parameter_sets, initial_balance, allow_short = task
+    return evaluate_batch(
+        strategy_class, worker_klines(), parameter_sets, initial_balance, allow_short
+    )
+
+
+def run_sweep(
+    strategy_class: Type[BaseStrategy],
+    klines: KLines,
+    parameter_sets: List[Dict[str, Any]],
+    initial_balance: float,
+    allow_short: bool = False,
+    n_jobs: Optional[int] = None,
+    chunksize: Optional[int] = None,
+) -> DataFrame:
+    """Backtest every parameter set and return the results ranked by equity.
+
+    Parameter sets are evaluated in batches of ``chunksize`` (at most
+    ``SWEEP_BATCH_SIZE`` by default), each scored with one ``batch_metrics``
+    pass. With more than one job the candles are copied once into shared
+    memory and each worker maps them at start-up, so tasks only pickle the
+    strategy class and a batch of parameters. Workers keep their KLines (and
+    its feature cache) for the whole sweep.
+    """
+    n_jobs = n_jobs or os.cpu_count() or 1
+    parallel = n_jobs > 1 and len(parameter_sets) > 1
+    chunksize = chunksize or (
+        max(1, min(SWEEP_BATCH_SIZE, len(parameter_sets) // (n_jobs * 4)))
+        if parallel
+        else SWEEP_BATCH_SIZE
+    )
+    chunks = [
+        parameter_sets[start : start + chunksize]
+        for start in range(0, len(parameter_sets), chunksize)
+    ]
+    if not parallel:
+        batches = [
+            evaluate_batch(strategy_class, klines, chunk, initial_balance, allow_short)
+            for chunk in chunks
+        ]
+    else:
+        tasks = [
+            (strategy_class, chunk, initial_balance, allow_short) for chunk in chunks
+        ]
+        with SharedKLines(klines) as shared:
+            with ProcessPoolExecutor(
+                max_workers=n_jobs,
+                initializer=init_worker,
+                initargs=(shared.spec,),
+            ) as executor:
+                batches = list(executor.map(_evaluate_in_worker, tasks))
+    rows = [row for batch in batches for row in batch]
+
+    results = DataFrame(rows)
+    if results.empty:
+        return results
+    results = results.sort_values(
+        ["final_equity", "max_drawdown"], ascending=[False, True], kind="stable"
+    ).reset_index(drop=True)
+    results.index.name = "rank"
+    return results
+
+
+def grid_search(
+    strategy_class: Type[BaseStrategy],
+    klines: KLines,
+    space: ParameterSpace,
+    initial_balance: float,
+    allow_short: bool = False,
+    n_jobs: Optional[int] = None,
+) -> DataFrame:
+    return run_sweep(
+        strategy_class, klines, grid(space), initial_balance, allow_short, n_jobs
+    )
+
+
+def random_search(
+    strategy_class: Type[BaseStrategy],
+    klines: KLines,
+    space: ParameterSpace,
+    n_iter: int,
+    initial_balance: float,
+    allow_short: bool = False,
+    n_jobs: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> DataFrame:
+    return run_sweep(
+        strategy_class,
+        klines,
+        sample(space, n_iter, seed),
+        initial_balance,
+        allow_short,
+        n_jobs,
+    )
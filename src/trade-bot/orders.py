@@ -0,0 +1,436 @@
+import itertools
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Set
+
+from binance.error import ClientError
+from binance.spot import Spot
+
+from enums import OrderSide, OrderStatus, OrderType, TimeInForce, TradeAction
+from exceptions import InvalidOrderTransition
+from logger import logger
+
+
+_ACTIVE = frozenset(
+    {
+        OrderStatus.PARTIALLY_FILLED,
+        OrderStatus.FILLED,
+        OrderStatus.CANCELLED,
+        OrderStatus.EXPIRED,
+        OrderStatus.EXPIRED_IN_MATCH,
+    }
+)
+
+# Statuses each status may move to. Final statuses map to nothing.
+ORDER_TRANSITIONS: Dict[OrderStatus, FrozenSet[OrderStatus]] = {
+    OrderStatus.PENDING_NEW: _ACTIVE | {OrderStatus.NEW, OrderStatus.REJECTED},
+    OrderStatus.NEW: _ACTIVE | {OrderStatus.PENDING_CANCEL},
+    OrderStatus.PARTIALLY_FILLED: _ACTIVE | {OrderStatus.PENDING_CANCEL},
+    # A cancel that fails leaves the order as it was.
+    OrderStatus.PENDING_CANCEL: _ACTIVE | {OrderStatus.NEW},
+    OrderStatus.FILLED: frozenset(),
+    OrderStatus.CANCELLED: frozenset(),
+    OrderStatus.REJECTED: frozenset(),
+    OrderStatus.EXPIRED: frozenset(),
+    OrderStatus.EXPIRED_IN_MATCH: frozenset(),
+}
+
+OPEN_STATUSES = frozenset(
+    status for status, targets in ORDER_TRANSITIONS.items() if targets
+)
+
+# Client order ids of pruned orders remembered, so late or duplicated
+# reports for them are not adopted as new orders.
+PRUNED_ORDER_MEMORY = 100_000
+
+# Binance's "Order does not exist." error code.
+UNKNOWN_ORDER_CODE = -2013
+
+# Spot has no short selling, so opening a short sells and covering buys.
+TRADE_ACTION_SIDES = {
+    TradeAction.BUY: OrderSide.BUY,
+    TradeAction.SELL: OrderSide.SELL,
+    TradeAction.SHORT: OrderSide.SELL,
+    TradeAction.COVER: OrderSide.BUY,
+}
+
+
+@dataclass
+class Order:
+    client_order_id: str
+    symbol: str
+    side: OrderSide
+    order_type: OrderType
+    quantity: Optional[float] = None
+    quote_quantity: Optional[float] = None
+    price: Optional[float] = None
+    time_in_force: Optional[TimeInForce] = None
+    status: OrderStatus = OrderStatus.PENDING_NEW
+    order_id: Optional[int] = None
+    executed_quantity: float = 0.0
+    cumulative_quote_quantity: float = 0.0
+    update_time: int = 0
+
+    @property
+    def is_open(self) -> bool:
+        return self.status in OPEN_STATUSES
+
+    @property
+    def average_price(self) -> float:
+        if not self.executed_quantity:
+            return 0.0
+        return self.cumulative_quote_quantity / self.executed_quantity
+
+    def request(self) -> Dict[str, Any]:
+        """Keyword arguments for ``Spot.new_order``."""
+        params: Dict[str, Any] = {
+            "symbol": self.symbol,
+            "side": self.side.name,
+            "type": self.order_type.name,
+            "newClientOrderId": self.client_order_id,
+        }
+        if self.quantity is not None:
+            params["quantity"] = self.quantity
+        if self.quote_quantity is not None:
+            params["quoteOrderQty"] = self.quote_quantity
+        if self.price is not None:
+            params["price"] = self.price
+        if self.time_in_force is not None:
+            params["timeInForce"] = self.time_in_force.name
+        return params
+
+
+def _report_fields(report: Dict[str, Any]) -> Dict[str, Any]:
+    """Common fields of a REST order response or an ``executionReport`` event."""
+    if report.get("e") == "executionReport":
+        return {
+            # Cancel reports carry the cancelled order's id in "C".
+            "client_order_id": report.get("C") or report["c"],
+            "symbol": report["s"],
+            "side": report["S"],
+            "type": report["o"],
+            "quantity": report["q"],
+            "price": report["p"],
+            "time_in_force": report["f"],
+            "status": report["X"],
+            "order_id": report["i"],
+            "executed_quantity": report["z"],
+            "cumulative_quote_quantity": report["Z"],
+            "update_time": report["E"],
+        }
+    return {
+        "client_order_id": report.get("origClientOrderId") or report["clientOrderId"],
+        "symbol": report["symbol"],
+        "side": report["side"],
+        "type": report["type"],
+        "quantity": report.get("origQty"),
+        "price": report.get("price"),
+        "time_in_force": report.get("timeInForce"),
+        "status": report["status"],
+        "order_id": report["orderId"],
+        "executed_quantity": report.get("executedQty", 0),
+        "cumulative_quote_quantity": report.get("cummulativeQuoteQty", 0),
+        "update_time": report.get("updateTime") or report.get("transactTime", 0),
+    }
+
+
+class OrderManager:
+    """Turns trade decisions into exchange orders and tracks them to the end.
+
+    Orders are created locally as PENDING_NEW and queued; ``flush`` sends the
+    queued placements and cancellations. Spot places orders one request at a
+    time, but cancelling every open order of a symbol is batched into one
+    ``cancel_open_orders`` request. Order responses and user data stream
+    execution reports go through ``apply_update``, which enforces
+    ``ORDER_TRANSITIONS``. Open orders are indexed by symbol and every order
+    by client order id and exchange order id, so lookups and updates are
+    O(1). Not thread-safe: use one manager per thread or event loop.
+    """
+
+    def __init__(self, client: Spot, prefix: str = "tradebot") -> None:
+        self.client = client
+        self.prefix = f"{prefix}-{int(time.time() * 1000):x}"
+        self.orders: Dict[str, Order] = {}
+        self._open: Dict[str, Dict[str, Order]] = {}
+        self._by_order_id: Dict[int, Order] = {}
+        self._to_place: Dict[str, Order] = {}
+        self._to_cancel: Dict[str, Order] = {}
+        self._status_before_cancel: Dict[str, OrderStatus] = {}
+        # Placements whose request failed without an answer from the exchange.
+        self._unconfirmed: Set[str] = set()
+        self._pruned: "OrderedDict[str, None]" = OrderedDict()
+        self._sequence = itertools.count(1)
+        self.update_count = 0
+
+    def get(self, client_order_id: str) -> Optional[Order]:
+        return self.orders.get(client_order_id)
+
+    def get_by_order_id(self, order_id: int) -> Optional[Order]:
+        return self._by_order_id.get(order_id)
+
+    def open_orders(self, symbol: Optional[str] = None) -> List[Order]:
+        if symbol is not None:
+            return list(self._open.get(symbol, {}).values())
+        return [order for book in self._open.values() for order in book.values()]
+
+    def _register(self, order: Order) -> Order:
+        if order.client_order_id in self.orders:
+            raise ValueError(f"Duplicate client order id {order.client_order_id}")
+        self.orders[order.client_order_id] = order
+        if order.is_open:
+            self._open.setdefault(order.symbol, {})[order.client_order_id] = order
+        return order
+
+    def create(
+        self,
+        symbol: str,
+        side: OrderSide,
+        order_type: OrderType,
+        quantity: Optional[float] = None,
+        quote_quantity: Optional[float] = None,
+        price: Optional[float] = None,
+        time_in_force: Optional[TimeInForce] = None,
+        client_order_id: Optional[str] = None,
+    ) -> Order:
+        """Queue a new order; it is sent by the next ``flush``."""
+        if (quantity is None) == (quote_quantity is None):
+            raise ValueError("Give exactly one of quantity and quote_quantity")
+        if order_type is OrderType.LIMIT and time_in_force is None:
+            time_in_force = TimeInForce.GTC
+        order = self._register(
+            Order(
+                client_order_id=client_order_id
+                or f"{self.prefix}-{next(self._sequence)}",
+                symbol=symbol,
+                side=side,
+                order_type=order_type,
+                quantity=quantity,
+                quote_quantity=quote_quantity,
+                price=price,
+                time_in_force=time_in_force,
+            )
+        )
+        self._to_place[order.client_order_id] = order
+        return order
+
+    def execute(
+        self,
+        symbol: str,
+        action: TradeAction,
+        quantity: Optional[float] = None,
+        quote_quantity: Optional[float] = None,
+        order_type: OrderType = OrderType.MARKET,
+        price: Optional[float] = None,
+        time_in_force: Optional[TimeInForce] = None,
+    ) -> Order:
+        """Queue the order carrying out a strategy's trade ``action``."""
+        return self.create(
+            symbol,
+            TRADE_ACTION_SIDES[action],
+            order_type,
+            quantity=quantity,
+            quote_quantity=quote_quantity,
+            price=price,
+            time_in_force=time_in_force,
+        )
+
+    def cancel(self, client_order_id: str) -> Order:
+        """Queue the cancellation of an open order.
+
+        An order that has not been sent yet is dropped from the queue and
+        cancelled locally, without a request. One whose placement went
+        unanswered may be on the exchange, so the next flush looks it up and
+        cancels it there if it is.
+        """
+        order = self.orders[client_order_id]
+        if client_order_id in self._unconfirmed:
+            self._to_place.pop(client_order_id, None)
+            self._to_cancel[client_order_id] = order
+        elif client_order_id in self._to_place:
+            del self._to_place[client_order_id]
+            self._set_status(order, OrderStatus.CANCELLED)
+        elif order.is_open and order.status is not OrderStatus.PENDING_CANCEL:
+            self._status_before_cancel[client_order_id] = order.status
+            self._set_status(order, OrderStatus.PENDING_CANCEL)
+            self._to_cancel[client_order_id] = order
+        return order
+
+    def cancel_all(self, symbol: str) -> List[Order]:
+        return [
+            self.cancel(order.client_order_id) for order in self.open_orders(symbol)
+        ]
+
+    def flush(self) -> None:
+        """Send every queued placement, then every queued cancellation.
+
+        An order the exchange refuses is marked REJECTED, and a cancel it
+        refuses (usually because the order already filled) puts the order
+        back in its previous status until its final update arrives. Other
+        errors propagate, leaving the unsent requests queued. A placement
+        that failed that way may still have reached the exchange, so the
+        next flush looks it up by client order id and only sends it again
+        if the exchange does not know it.
+        """
+        for order in list(self._to_place.values()):
+            response = self._find_unconfirmed(order)
+            if response is None:
+                try:
+                    response = self.client.new_order(**order.request())
+                except ClientError as error:
+                    logger.error(f"Order {order.client_order_id} rejected: {error!r}")
+                    self._set_status(order, OrderStatus.REJECTED)
+                except Exception:
+                    self._unconfirmed.add(order.client_order_id)
+                    raise
+            if response is not None:
+                self.apply_update(response)
+            self._unconfirmed.discard(order.client_order_id)
+            del self._to_place[order.client_order_id]
+
+        for order in list(self._to_cancel.values()):
+            if order.client_order_id in self._unconfirmed:
+                self._resolve_unconfirmed_cancel(order)
+
+        by_symbol: Dict[str, List[Order]] = {}
+        for order in self._to_cancel.values():
+            by_symbol.setdefault(order.symbol, []).append(order)
+        for symbol, orders in by_symbol.items():
+            if len(orders) > 1 and len(orders) == len(self._open.get(symbol, {})):
+                self._send_cancel(
+                    orders, lambda: self.client.cancel_open_orders(symbol)
+                )
+            else:
+                for order in orders:
+                    self._send_cancel(
+                        [order],
+                        lambda: [
+                            self.client.cancel_order(
+                                symbol, origClientOrderId=order.client_order_id
+                            )
+                        ],
+                    )
+
+    def _find_unconfirmed(self, order: Order) -> Optional[Dict[str, Any]]:
+        """The exchange's view of an order whose placement went unanswered."""
+        if order.client_order_id not in self._unconfirmed:
+            return None
+        try:
+            return self.client.get_order(
+                order.symbol, origClientOrderId=order.client_order_id
+            )
+        except ClientError as error:
+            if error.error_code != UNKNOWN_ORDER_CODE:
+                raise
+            return None
+
+    def _resolve_unconfirmed_cancel(self, order: Order) -> None:
+        """Settle a cancelled order whose placement went unanswered.
+
+        If the exchange never got it, it is cancelled locally; if it is open
+        there, it stays queued for a real cancel request.
+        """
+        response = self._find_unconfirmed(order)
+        self._unconfirmed.discard(order.client_order_id)
+        if response is None:
+            self._set_status(order, OrderStatus.CANCELLED)
+        else:
+            self.apply_update(response)
+        if order.is_open:
+            self._status_before_cancel[order.client_order_id] = order.status
+            self._set_status(order, OrderStatus.PENDING_CANCEL)
+        else:
+            del self._to_cancel[order.client_order_id]
+
+    def _send_cancel(
+        self, orders: List[Order], send: Callable[[], List[Dict[str, Any]]]
+    ) -> None:
+        try:
+            responses = send()
+        except ClientError as error:
+            logger.warning(f"Cancel of {len(orders)} order(s) refused: {error!r}")
+            for order in orders:
+                if order.status is OrderStatus.PENDING_CANCEL:
+                    self._set_status(
+                        order, self._status_before_cancel[order.client_order_id]
+                    )
+        else:
+            for response in responses:
+                self.apply_update(response)
+        for order in orders:
+            self._to_cancel.pop(order.client_order_id, None)
+            self._status_before_cancel.pop(order.client_order_id, None)
+
+    def apply_update(self, report: Dict[str, Any]) -> Optional[Order]:
+        """Apply an order response or user data stream execution report.
+
+        Orders this manager did not create are adopted. Updates that arrive
+        after a newer one (an earlier fill, or anything once the order is
+        final) are ignored, as are reports for pruned orders, which return
+        None; any other move ``ORDER_TRANSITIONS`` does not allow raises
+        ``InvalidOrderTransition``.
+        """
+        self.update_count += 1
+        fields = _report_fields(report)
+        if fields["client_order_id"] in self._pruned:
+            return None
+        status = OrderStatus.from_binance(fields["status"])
+        executed_quantity = float(fields["executed_quantity"])
+        order = self.orders.get(fields["client_order_id"])
+        if order is None:
+            order = self._register(
+                Order(
+                    client_order_id=fields["client_order_id"],
+                    symbol=fields["symbol"],
+                    side=OrderSide[fields["side"]],
+                    order_type=OrderType[fields["type"]],
+                    quantity=float(fields["quantity"] or 0),
+                    price=float(fields["price"] or 0) or None,
+                    time_in_force=(
+                        TimeInForce[fields["time_in_force"]]
+                        if fields["time_in_force"]
+                        else None
+                    ),
+                )
+            )
+        elif not order.is_open or executed_quantity < order.executed_quantity:
+            return order
+
+        if status is not order.status or status is OrderStatus.PARTIALLY_FILLED:
+            if status is not OrderStatus.PARTIALLY_FILLED or (
+                executed_quantity > order.executed_quantity
+            ):
+                self._set_status(order, status)
+        order.order_id = fields["order_id"]
+        order.executed_quantity = executed_quantity
+        order.cumulative_quote_quantity = float(fields["cumulative_quote_quantity"])
+        order.update_time = int(fields["update_time"])
+        self._by_order_id[order.order_id] = order
+        return order
+
+    def _set_status(self, order: Order, status: OrderStatus) -> None:
+        if status not in ORDER_TRANSITIONS[order.status]:
+            raise InvalidOrderTransition(
+                f"Order {order.client_order_id} cannot go from "
+                f"{order.status.name} to {status.name}"
+            )
+        order.status = status
+        if status not in OPEN_STATUSES:
+            book = self._open.get(order.symbol)
+            if book is not None:
+                book.pop(order.client_order_id, None)
+
+    def prune(self) -> int:
+        """Forget orders in a final status, keeping memory bounded.
+
+        The client order ids of the last ``PRUNED_ORDER_MEMORY`` pruned orders
+        are kept, so their late reports are ignored rather than adopted.
+        """
+        closed = [order for order in self.orders.values() if not order.is_open]
+        for order in closed:
+            del self.orders[order.client_order_id]
+            self._by_order_id.pop(order.order_id, None)
+            self._pruned[order.client_order_id] = None
+        while len(self._pruned) > PRUNED_ORDER_MEMORY:
+            self._pruned.popitem(last=False)
+        return len(closed)
@@ -0,0 +1,162 @@
+from typing import Dict, Sequence
+
+import numpy as np
+
+from backtest import BUY, COVER, SELL, SHORT, BacktestResult
+
+
+YEAR_MILLISECONDS = 365 * 24 * 60 * 60 * 1000
+
+# Per-bar statistics are computed for as many runs at a time as fit in this
+# many values, so the (runs x bars) temporaries stay in cache.
+BLOCK_VALUES = 1 << 16
+
+METRICS = (
+    "total_return",
+    "sharpe",
+    "sortino",
+    "max_drawdown",
+    "win_rate",
+    "exposure",
+    "turnover",
+)
+
+
+def periods_per_year(open_time: np.ndarray) -> float:
+    """Bars per year of candles opening at ``open_time`` (epoch ms).
+
+    Used to annualize the Sharpe and Sortino ratios; 1.0 (per bar) when the
+    spacing cannot be told.
+    """
+    if len(open_time) < 2:
+        return 1.0
+    spacing = float(np.median(np.diff(open_time)))
+    return YEAR_MILLISECONDS / spacing if spacing > 0 else 1.0
+
+
+def drawdowns(equity: np.ndarray) -> np.ndarray:
+    """Fraction below the running peak of each bar, along the last axis."""
+    peak = np.maximum.accumulate(equity, axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        drawdown = np.where(peak > 0, (peak - equity) / peak, 0.0)
+    return np.nan_to_num(drawdown)
+
+
+def max_drawdown(equity: np.ndarray) -> float:
+    if len(equity) == 0:
+        return 0.0
+    return float(drawdowns(equity).max())
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / denominator, 0.0)
+
+
+def _bar_metrics(
+    results: Sequence[BacktestResult], initial_balance: float
+) -> Dict[str, np.ndarray]:
+    equity = np.vstack([result.equity for result in results])
+    holding = np.vstack(
+        [(result.long_position > 0) | (result.short_position > 0) for result in results]
+    )
+    previous = np.empty_like(equity)
+    previous[:, 0] = initial_balance
+    previous[:, 1:] = equity[:, :-1]
+    returns = _ratio(equity - previous, previous)
+    mean = returns.mean(axis=1)
+    return {
+        "total_return": equity[:, -1] / initial_balance - 1,
+        "sharpe": _ratio(mean, returns.std(axis=1)),
+        "sortino": _ratio(mean, np.sqrt((np.minimum(returns, 0) ** 2).mean(axis=1))),
+        "max_drawdown": drawdowns(equity).max(axis=1),
+        "exposure": holding.mean(axis=1),
+        "mean_equity": equity.mean(axis=1),
+    }
+
+
+def batch_metrics(
+    results: Sequence[BacktestResult],
+    initial_balance: float,
+    periods_per_year: float = 1.0,
+) -> Dict[str, np.ndarray]:
+    """``METRICS`` of backtests over the same bars, one array entry per run.
+
+    The runs' per-bar arrays are stacked into (runs x bars) matrices, in
+    blocks of ``BLOCK_VALUES``, and their trades concatenated, so every
+    statistic is a few array operations over the whole batch:
+
+    - ``total_return``: final equity over ``initial_balance``, minus 1;
+    - ``sharpe`` / ``sortino``: mean bar return over its standard deviation /
+      downside deviation, annualized with ``periods_per_year``;
+    - ``max_drawdown``: largest fall from a running equity peak;
+    - ``win_rate``: share of closed positions that returned more cash than
+      they cost to open (NaN without any);
+    - ``exposure``: share of bars holding a position;
+    - ``turnover``: traded notional over mean equity.
+    """
+    runs = len(results)
+    bars = len(results[0].equity) if runs else 0
+    if any(len(result.equity) != bars for result in results):
+        raise ValueError("Batched backtests must cover the same bars")
+    if not runs or not bars:
+        empty = {name: np.zeros(runs) for name in METRICS}
+        empty["win_rate"] = np.full(runs, np.nan)
+        return empty
+
+    block = max(1, BLOCK_VALUES // bars)
+    blocks = [
+        _bar_metrics(results[start : start + block], initial_balance)
+        for start in range(0, runs, block)
+    ]
+    bar_metrics = {
+        name: np.concatenate([values[name] for values in blocks]) for name in blocks[0]
+    }
+    scale = np.sqrt(periods_per_year)
+
+    # Trades of all runs back to back, tagged with their run.
+    run = np.repeat(np.arange(runs), [result.trade_count for result in results])
+    action = np.concatenate([result.action for result in results])
+    price = np.concatenate([result.price for result in results])
+    position = np.concatenate([result.position for result in results])
+    balance = np.concatenate([result.balance for result in results])
+    fee = np.concatenate([result.fee for result in results])
+
+    # An open spends price * position plus its fee; a close receives its
+    # balance plus its fee.
+    opens = (action == BUY) | (action == SHORT)
+    closes = (action == SELL) | (action == COVER)
+    notional = np.where(opens, price * position, balance + fee)
+    cost = np.where(opens, notional + fee, 0.0)
+    turnover = _ratio(
+        np.bincount(run, weights=notional, minlength=runs), bar_metrics["mean_equity"]
+    )
+
+    # Pair each close with the last open before it in the same run; a close
+    # of a position held before the backtest started has none.
+    last_open = np.maximum.accumulate(np.where(opens, np.arange(len(action)), -1))
+    closed = closes & (last_open >= 0)
+    closed[closed] = run[last_open[closed]] == run[closed]
+    wins = np.zeros(len(action))
+    wins[closed] = balance[closed] > cost[last_open[closed]]
+    closed_count = np.bincount(run, weights=closed, minlength=runs)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        win_rate = np.bincount(run, weights=wins, minlength=runs) / closed_count
+
+    return {
+        "total_return": bar_metrics["total_return"],
+        "sharpe": bar_metrics["sharpe"] * scale,
+        "sortino": bar_metrics["sortino"] * scale,
+        "max_drawdown": bar_metrics["max_drawdown"],
+        "win_rate": win_rate,
+        "exposure": bar_metrics["exposure"],
+        "turnover": turnover,
+    }
+
+
+def metrics(
+    result: BacktestResult, initial_balance: float, periods_per_year: float = 1.0
+) -> Dict[str, float]:
+    """``batch_metrics`` of a single backtest."""
+    batch = batch_metrics([result], initial_balance, periods_per_year)
+    return {name: float(values[0]) for name, values in batch.items()}
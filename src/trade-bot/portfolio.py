@@ -0,0 +1,311 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Type
+
+import numpy as np
+from pandas import DataFrame, DatetimeIndex
+
+import signals
+from data_classes import KLines
+
+
+PANEL_COLUMNS = ("open", "high", "low", "close", "volume", "quote_asset_volume")
+
+
+def _time_index(open_time: np.ndarray) -> DatetimeIndex:
+    return DatetimeIndex(open_time.view("datetime64[ms]"), name="open_time")
+
+
+@dataclass
+class Panel:
+    """Candles of many symbols aligned on one open-time axis.
+
+    Every column is a ``(time, symbol)`` float64 array; bars a symbol does not
+    have (not listed yet, delisted, or missing) are NaN.
+    """
+
+    symbols: List[str]
+    open_time: np.ndarray
+    columns: Dict[str, np.ndarray]
+    klines: Dict[str, KLines]
+
+    @property
+    def shape(self) -> tuple:
+        return len(self.open_time), len(self.symbols)
+
+    def frame(self, column: str) -> DataFrame:
+        return DataFrame(
+            self.columns[column],
+            index=_time_index(self.open_time),
+            columns=self.symbols,
+            copy=False,
+        )
+
+
+def build_panel(klines_by_symbol: Dict[str, KLines]) -> Panel:
+    symbols = list(klines_by_symbol)
+    open_time = np.unique(
+        np.concatenate(
+            [klines.open_time for klines in klines_by_symbol.values()]
+            or [np.empty(0, dtype=np.int64)]
+        )
+    )
+    columns = {
+        name: np.full((len(open_time), len(symbols)), np.nan) for name in PANEL_COLUMNS
+    }
+    for position, klines in enumerate(klines_by_symbol.values()):
+        rows = np.searchsorted(open_time, klines.open_time)
+        for name in PANEL_COLUMNS:
+            columns[name][rows, position] = getattr(klines, name)
+
+    return Panel(symbols, open_time, columns, dict(klines_by_symbol))
+
+
+# Panel versions of the signals whose indicators are plain ewm/rolling
+# calculations. They follow the ta formulas column by column, so each symbol
+# with contiguous candles gets the same values as its own Signal, computed
+# for all symbols at once. Missing candles in the middle of a symbol's
+# history would be NaN rows inside its windows, so ``signal_matrix`` computes
+# symbols with gaps on their own candles instead.
+
+
+def _rsi_panel(panel: Panel, rsi_period: int = 14) -> np.ndarray:
+    close = panel.frame("close")
+    diff = close.diff(1)
+    # Bars before a symbol's first candle stay NaN so its averages start
+    # where its own history starts.
+    listed = close.notna()
+    up = diff.where(diff > 0, 0.0).where(listed)
+    down = -diff.where(diff < 0, 0.0).where(listed)
+    ewm = dict(alpha=1 / rsi_period, min_periods=rsi_period, adjust=False)
+    up = up.ewm(**ewm).mean().to_numpy()
+    down = down.ewm(**ewm).mean().to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(down == 0, 100, 100 - (100 / (1 + up / down)))
+    return np.select([rsi > 70, rsi < 30], [-1, 1], 0).astype(np.int8)
+
+
+def _macd_panel(
+    panel: Panel, macd_fast: int = 12, macd_slow: int = 26, macd_signal: int = 9
+) -> np.ndarray:
+    close = panel.frame("close")
+    fast = close.ewm(span=macd_fast, min_periods=macd_fast, adjust=False).mean()
+    slow = close.ewm(span=macd_slow, min_periods=macd_slow, adjust=False).mean()
+    macd = fast - slow
+    signal = macd.ewm(span=macd_signal, min_periods=macd_signal, adjust=False).mean()
+    macd, signal = macd.to_numpy(), signal.to_numpy()
+    return np.select([macd < signal, macd > signal], [-1, 1], 0).astype(np.int8)
+
+
+def _bollinger_bands_panel(
+    panel: Panel, window: int = 20, window_dev: int = 2
+) -> np.ndarray:
+    close = panel.frame("close")
+    rolling = close.rolling(window, min_periods=window)
+    mean = rolling.mean()
+    std = rolling.std(ddof=0)
+    high = (mean + window_dev * std).to_numpy()
+    low = (mean - window_dev * std).to_numpy()
+    close = close.to_numpy()
+    return np.select([close < low, close > high], [1, -1], 0).astype(np.int8)
+
+
+def _donchian_channel_panel(panel: Panel, window: int = 20) -> np.ndarray:
+    high = panel.frame("high").rolling(window, min_periods=window).max().to_numpy()
+    low = panel.frame("low").rolling(window, min_periods=window).min().to_numpy()
+    close = panel.columns["close"]
+    return np.select([close < low, close > high], [1, -1], 0).astype(np.int8)
+
+
+PANEL_SIGNALS: Dict[Type[signals.BaseSignal], Callable[..., np.ndarray]] = {
+    signals.RSISignal: _rsi_panel,
+    signals.MACDSignal: _macd_panel,
+    signals.BollingerBandsSignal: _bollinger_bands_panel,
+    signals.DonchianChannelSignal: _donchian_channel_panel,
+}
+
+
+def signal_matrix(
+    panel: Panel, signal_class: Type[signals.BaseSignal], **params
+) -> np.ndarray:
+    """``(time, symbol)`` int8 votes of ``signal_class`` for every symbol.
+
+    Signals listed in ``PANEL_SIGNALS`` are computed for all symbols in one
+    pass, except for symbols with missing candles; the others run per symbol
+    and are scattered onto the panel axis.
+    """
+    panel_signal = PANEL_SIGNALS.get(signal_class)
+    if panel_signal is not None:
+        votes = panel_signal(panel, **params)
+        votes[np.isnan(panel.columns["close"])] = 0
+    else:
+        votes = np.zeros(panel.shape, dtype=np.int8)
+
+    for position, klines in enumerate(panel.klines.values()):
+        rows = np.searchsorted(panel.open_time, klines.open_time)
+        contiguous = not len(rows) or rows[-1] - rows[0] + 1 == len(rows)
+        if panel_signal is None or not contiguous:
+            votes[:, position] = 0
+            votes[rows, position] = signal_class(klines, **params).votes()
+    return votes
+
+
+@dataclass
+class PortfolioResult:
+    """Per-bar state of ``simulate_portfolio``; 2-D arrays are (time, symbol)."""
+
+    open_time: np.ndarray
+    symbols: List[str]
+    weights: np.ndarray
+    rebalance: np.ndarray
+    turnover: np.ndarray
+    fees: np.ndarray
+    equity: np.ndarray
+
+    @property
+    def final_equity(self) -> float:
+        return float(self.equity[-1]) if len(self.equity) else 0.0
+
+    @property
+    def returns(self) -> np.ndarray:
+        previous = np.concatenate((self.equity[:1], self.equity[:-1]))
+        return self.equity / previous - 1
+
+    def to_dataframe(self) -> DataFrame:
+        return DataFrame(
+            {
+                "equity": self.equity,
+                "turnover": self.turnover,
+                "fees": self.fees,
+                "rebalance": self.rebalance,
+            },
+            index=_time_index(self.open_time),
+        )
+
+
+def target_weights(
+    votes: np.ndarray, tradable: np.ndarray, allow_short: bool
+) -> np.ndarray:
+    """Equal-weight every open position, with gross exposure capped at one.
+
+    A symbol's position follows its latest non-zero vote: long after a buy,
+    short (or flat without shorting) after a sell.
+    """
+    rows = np.arange(votes.shape[0])[:, None]
+    last_vote = np.maximum.accumulate(np.where(votes != 0, rows, -1), axis=0)
+    direction = np.where(
+        last_vote >= 0,
+        np.take_along_axis(votes, np.maximum(last_vote, 0), axis=0),
+        0,
+    ).astype(np.float64)
+    if not allow_short:
+        direction = np.maximum(direction, 0)
+    direction[~tradable] = 0
+
+    gross = np.abs(direction).sum(axis=1, keepdims=True)
+    return direction / np.maximum(gross, 1)
+
+
+def simulate_portfolio(
+    close: np.ndarray,
+    weights: np.ndarray,
+    initial_balance: float,
+    fee_rate: float = 0.0,
+    rebalance_every: Optional[int] = None,
+    open_time: Optional[np.ndarray] = None,
+    symbols: Optional[List[str]] = None,
+) -> PortfolioResult:
+    """Run shared capital through ``(time, symbol)`` target weights.
+
+    Holdings are rebalanced to the targets at the close of every bar where
+    they change, and also every ``rebalance_every`` bars. Between rebalances
+    the units held stay fixed, so over a segment the equity is
+    ``V * (1 + sum(w * (price / entry_price - 1)))``. Only one value per
+    segment has to be chained, so the whole run is array operations.
+    """
+    bars, _ = close.shape
+    price = DataFrame(close).ffill().to_numpy()
+    weights = np.where(np.isfinite(price), weights, 0.0)
+
+    rebalance = np.zeros(bars, dtype=bool)
+    if bars:
+        rebalance[0] = True
+        rebalance[1:] = np.any(weights[1:] != weights[:-1], axis=1)
+    if rebalance_every:
+        rebalance[::rebalance_every] = True
+
+    starts = np.flatnonzero(rebalance)
+    segment = np.cumsum(rebalance) - 1
+    entry_price = price[starts][segment]
+    entry_weight = weights[starts][segment]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        relative = np.where(entry_weight != 0, price / entry_price, 1.0)
+    growth = 1 + np.sum(entry_weight * (relative - 1), axis=1)
+
+    # Just before a rebalance the holdings of the ending segment have drifted
+    # with prices; trading them back to target costs fee_rate on the change.
+    ending_growth = np.ones(len(starts))
+    drifted = np.zeros((len(starts), close.shape[1]))
+    if len(starts) > 1:
+        ending = weights[starts[:-1]]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ending_relative = np.where(
+                ending != 0, price[starts[1:]] / price[starts[:-1]], 1.0
+            )
+        ending_drift = ending * ending_relative
+        ending_growth[1:] = 1 + np.sum(ending_drift - ending, axis=1)
+        drifted[1:] = ending_drift / ending_growth[1:, None]
+
+    segment_turnover = np.abs(weights[starts] - drifted).sum(axis=1)
+    segment_value = initial_balance * np.cumprod(
+        ending_growth * (1 - fee_rate * segment_turnover)
+    )
+    value_before = np.concatenate(([initial_balance], segment_value[:-1]))
+    fees_paid = value_before * ending_growth * fee_rate * segment_turnover
+
+    turnover = np.zeros(bars)
+    fees = np.zeros(bars)
+    turnover[starts] = segment_turnover
+    fees[starts] = fees_paid
+    equity = segment_value[segment] * growth
+
+    return PortfolioResult(
+        open_time=open_time if open_time is not None else np.arange(bars),
+        symbols=symbols or [str(column) for column in range(close.shape[1])],
+        weights=weights,
+        rebalance=rebalance,
+        turnover=turnover,
+        fees=fees,
+        equity=equity,
+    )
+
+
+def backtest_portfolio(
+    klines_by_symbol: Dict[str, KLines],
+    signal_class: Type[signals.BaseSignal],
+    initial_balance: float,
+    allow_short: bool = False,
+    fee_rate: float = 0.0,
+    rebalance_every: Optional[int] = None,
+    **params,
+) -> PortfolioResult:
+    """Trade ``signal_class`` on every symbol from one shared balance."""
+    panel = build_panel(klines_by_symbol)
+    close = panel.columns["close"]
+    votes = signal_matrix(panel, signal_class, **params)
+    # From a symbol's first candle to its last one; after that it is
+    # delisted and its position is closed at the last price.
+    finite = np.isfinite(close)
+    listed = (
+        np.maximum.accumulate(finite, axis=0)
+        & np.maximum.accumulate(finite[::-1], axis=0)[::-1]
+    )
+    weights = target_weights(votes, listed, allow_short)
+    return simulate_portfolio(
+        close,
+        weights,
+        initial_balance,
+        fee_rate,
+        rebalance_every,
+        panel.open_time,
+        panel.symbols,
+    )
@@ -0,0 +1,208 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from constants import LIVE_HISTORY_CANDLES
+from data_classes import KLineBuffer, KLines
+from enums import WEEK_OFFSET_MILLISECONDS, Interval
+
+
+# Columns summed over the base candles of a resampled candle.
+SUMMED_COLUMNS = (
+    "volume",
+    "quote_asset_volume",
+    "number_of_trades",
+    "taker_buy_base_asset_volume",
+    "taker_buy_quote_asset_volume",
+)
+
+
+def open_times(interval: Interval, times: np.ndarray) -> np.ndarray:
+    """Vectorized ``Interval.open_time`` over an array of epoch ms."""
+    times = np.asarray(times, dtype=np.int64)
+    if interval is Interval.MONTH_1:
+        months = times.astype("datetime64[ms]").astype("datetime64[M]")
+        return months.astype("datetime64[ms]").view(np.int64)
+    offset = WEEK_OFFSET_MILLISECONDS if interval is Interval.WEEK_1 else 0
+    length = interval.milliseconds
+    return (times - offset) // length * length + offset
+
+
+def close_times(interval: Interval, open_time: np.ndarray) -> np.ndarray:
+    """Close time (next open time minus 1 ms) of candles opening at ``open_time``."""
+    if interval is Interval.MONTH_1:
+        months = open_time.astype("datetime64[ms]").astype("datetime64[M]") + 1
+        return months.astype("datetime64[ms]").view(np.int64) - 1
+    return open_time + interval.milliseconds - 1
+
+
+def resample(klines: KLines, interval: Interval, complete: bool = False) -> KLines:
+    """Build ``interval`` candles from finer, sorted base candles in one pass.
+
+    Each output candle takes the first open, the highest high, the lowest low
+    and the last close of its base candles, and sums their volumes and trade
+    counts (``np.ufunc.reduceat`` over the group starts). Candles are aligned
+    like Binance's: on the epoch, on Monday for weeks and on the calendar for
+    months. The first and last candles may be built from only part of their
+    base candles; ``complete`` drops them unless they are fully covered.
+    """
+    if not len(klines):
+        return KLines()
+    buckets = open_times(interval, klines.open_time)
+    if not np.array_equal(open_times(interval, klines.close_time), buckets):
+        raise ValueError(f"Base candles do not fit into {interval.value} candles")
+
+    starts = np.flatnonzero(np.diff(buckets, prepend=-1))
+    ends = np.append(starts[1:], len(klines)) - 1
+    open_time = buckets[starts]
+    columns = {
+        "open_time": open_time,
+        "open": klines.open[starts],
+        "high": np.maximum.reduceat(klines.high, starts),
+        "low": np.minimum.reduceat(klines.low, starts),
+        "close": klines.close[ends],
+        "close_time": close_times(interval, open_time),
+    }
+    for name in SUMMED_COLUMNS:
+        columns[name] = np.add.reduceat(getattr(klines, name), starts)
+    resampled = KLines.from_columns(columns)
+
+    if complete:
+        first = 1 if klines.open_time[0] != open_time[0] else 0
+        last = len(resampled) - (
+            1 if klines.close_time[-1] != columns["close_time"][-1] else 0
+        )
+        resampled = resampled.slice(first, max(first, last))
+    return resampled
+
+
+class KLineResampler:
+    """Keeps ``interval`` candles up to date as base candles close.
+
+    Each closed base candle is folded into the current ``interval`` candle in
+    O(1), and the latest ``capacity`` candles, including the one still being
+    built, are kept in a ``KLineBuffer``. ``update`` returns the candles that
+    the base candle closed: usually none, or the current one on its last base
+    candle.
+    """
+
+    def __init__(
+        self, interval: Interval, capacity: int = LIVE_HISTORY_CANDLES
+    ) -> None:
+        self.interval = interval
+        self.buffer = KLineBuffer(capacity)
+        self._current: Optional[List[Any]] = None
+        self._last_open_time = -1
+
+    @classmethod
+    def from_klines(
+        cls,
+        klines: KLines,
+        interval: Interval,
+        capacity: int = LIVE_HISTORY_CANDLES,
+    ) -> "KLineResampler":
+        """Seed a resampler with the history in ``klines`` (base candles)."""
+        resampler = cls(interval, capacity)
+        if not len(klines):
+            return resampler
+        resampled = resample(klines, interval)
+        for index in range(max(len(resampled) - capacity, 0), len(resampled)):
+            resampler.buffer.append(resampled.row(index))
+        if klines.close_time[-1] != resampled.close_time[-1]:
+            resampler._current = resampled.row(len(resampled) - 1)
+        resampler._last_open_time = int(klines.open_time[-1])
+        return resampler
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+    def to_klines(self) -> KLines:
+        return self.buffer.to_klines()
+
+    def update(self, row: List[Any]) -> List[List[Any]]:
+        """Fold in one closed base candle, given as a klines response row."""
+        open_time = int(row[0])
+        if open_time <= self._last_open_time:
+            return []
+        close_time = int(row[6])
+        bucket = self.interval.open_time(open_time)
+        if self.interval.open_time(close_time) != bucket:
+            raise ValueError(f"Base candle does not fit into {self.interval.value}")
+        self._last_open_time = open_time
+
+        closed = []
+        current = self._current
+        if current is not None and current[0] != bucket:
+            # A gap in the base candles: the previous candle ends short.
+            closed.append(current)
+            current = None
+        if current is None:
+            current = [
+                bucket,
+                float(row[1]),
+                float(row[2]),
+                float(row[3]),
+                float(row[4]),
+                float(row[5]),
+                self.interval.next_open_time(bucket) - 1,
+                float(row[7]),
+                int(row[8]),
+                float(row[9]),
+                float(row[10]),
+            ]
+        else:
+            current[2] = max(current[2], float(row[2]))
+            current[3] = min(current[3], float(row[3]))
+            current[4] = float(row[4])
+            current[5] += float(row[5])
+            current[7] += float(row[7])
+            current[8] += int(row[8])
+            current[9] += float(row[9])
+            current[10] += float(row[10])
+
+        self.buffer.append(current)
+        if close_time == current[6]:
+            closed.append(current)
+            current = None
+        self._current = current
+        return closed
+
+
+class MultiTimeframeKLines:
+    """One base candle series and its resampled higher timeframes.
+
+    Only the base interval has to be fetched; every interval in ``intervals``
+    is derived from it, in one vectorized pass for the history and
+    incrementally for each candle that closes afterwards.
+    """
+
+    def __init__(
+        self,
+        base: Interval,
+        intervals: Iterable[Interval],
+        capacity: int = LIVE_HISTORY_CANDLES,
+        history: Optional[KLines] = None,
+    ) -> None:
+        self.base = base
+        self.buffer = KLineBuffer(capacity)
+        history = history if history is not None else KLines()
+        for index in range(max(len(history) - capacity, 0), len(history)):
+            self.buffer.append(history.row(index))
+        self.resamplers: Dict[Interval, KLineResampler] = {
+            interval: KLineResampler.from_klines(history, interval, capacity)
+            for interval in intervals
+            if interval is not base
+        }
+
+    def update(self, row: List[Any]) -> Dict[Interval, List[List[Any]]]:
+        """Add a closed base candle; return the candles it closed per interval."""
+        self.buffer.append(row)
+        return {
+            interval: resampler.update(row)
+            for interval, resampler in self.resamplers.items()
+        }
+
+    def klines(self, interval: Interval) -> KLines:
+        if interval is self.base:
+            return self.buffer.to_klines()
+        return self.resamplers[interval].to_klines()
@@ -0,0 +1,255 @@
+import math
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+import numpy as np
+from pandas import Series
+
+
+NAN = math.nan
+
+
+# Batch statistics. Sums, means and deviations go through pandas' rolling
+# kernels, which are O(n) and give exactly the values the ta indicators are
+# built on; min/max use pandas' monotonic-deque kernels, O(n) for any window.
+
+
+def _rolling(values: np.ndarray, window: int, min_periods: Optional[int]):
+    return Series(values, copy=False).rolling(
+        window, min_periods=window if min_periods is None else min_periods
+    )
+
+
+def rolling_sum(
+    values: np.ndarray, window: int, min_periods: Optional[int] = None
+) -> np.ndarray:
+    return _rolling(values, window, min_periods).sum().to_numpy()
+
+
+def rolling_mean(
+    values: np.ndarray, window: int, min_periods: Optional[int] = None
+) -> np.ndarray:
+    return _rolling(values, window, min_periods).mean().to_numpy()
+
+
+def rolling_std(
+    values: np.ndarray, window: int, min_periods: Optional[int] = None, ddof: int = 0
+) -> np.ndarray:
+    return _rolling(values, window, min_periods).std(ddof=ddof).to_numpy()
+
+
+def rolling_max(
+    values: np.ndarray, window: int, min_periods: Optional[int] = None
+) -> np.ndarray:
+    return _rolling(values, window, min_periods).max().to_numpy()
+
+
+def rolling_min(
+    values: np.ndarray, window: int, min_periods: Optional[int] = None
+) -> np.ndarray:
+    return _rolling(values, window, min_periods).min().to_numpy()
+
+
+def _rolling_arg_extreme(values: np.ndarray, window: int, maximum: bool) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    length = len(values)
+    positions = np.full(length, NAN)
+    if window < 1 or window > length:
+        return positions
+
+    # A window holding a NaN has fewer than ``window`` observations, which
+    # pandas' rolling apply reports as NaN; the NaNs are masked out below.
+    missing = np.isnan(values)
+    if missing.any():
+        values = np.where(missing, -np.inf if maximum else np.inf, values)
+
+    # van Herk/Gil-Werman: split into blocks of ``window``; every window is a
+    # suffix of one block plus a prefix of the next, so block-wise prefix and
+    # suffix maxima (with first-occurrence positions) answer every window in
+    # O(1). Minima are maxima of the negated values.
+    x = values if maximum else -values
+    padding = (-length) % window
+    blocks = np.concatenate((x, np.full(padding, -np.inf))).reshape(-1, window)
+    index = np.arange(blocks.size).reshape(blocks.shape)
+
+    prefix = np.maximum.accumulate(blocks, axis=1)
+    rises = np.ones(blocks.shape, dtype=bool)
+    rises[:, 1:] = blocks[:, 1:] > prefix[:, :-1]
+    prefix_at = np.maximum.accumulate(np.where(rises, index, -1), axis=1)
+
+    reverse = blocks[:, ::-1]
+    suffix = np.maximum.accumulate(reverse, axis=1)
+    reaches = np.ones(blocks.shape, dtype=bool)
+    reaches[:, 1:] = reverse[:, 1:] >= suffix[:, :-1]
+    suffix_at = np.minimum.accumulate(
+        np.where(reaches, index[:, ::-1], blocks.size), axis=1
+    )[:, ::-1].ravel()
+    suffix = suffix[:, ::-1].ravel()
+
+    ends = np.arange(window - 1, length)
+    starts = ends - (window - 1)
+    prefix, prefix_at = prefix.ravel()[ends], prefix_at.ravel()[ends]
+    found = np.where(suffix[starts] >= prefix, suffix_at[starts], prefix_at)
+    positions[window - 1 :] = found - starts
+    if missing.any():
+        counts = np.concatenate(([0], np.cumsum(missing)))
+        positions[window - 1 :][counts[ends + 1] > counts[starts]] = NAN
+    return positions
+
+
+def rolling_argmax(values: np.ndarray, window: int) -> np.ndarray:
+    """Position in each full window of its first maximum (0 = oldest bar).
+
+    Matches ``rolling(window).apply(np.argmax)`` but runs in O(n) for any
+    window length; the first ``window - 1`` bars and every window holding a
+    NaN are NaN.
+    """
+    return _rolling_arg_extreme(values, window, maximum=True)
+
+
+def rolling_argmin(values: np.ndarray, window: int) -> np.ndarray:
+    """Position in each full window of its first minimum (0 = oldest bar).
+
+    NaN where ``rolling(window).apply(np.argmin)`` is.
+    """
+    return _rolling_arg_extreme(values, window, maximum=False)
+
+
+def wilder_average(values: np.ndarray, window: int) -> np.ndarray:
+    """Wilder's smoothing as ``ta`` computes ATR.
+
+    The first ``window - 1`` bars are 0, bar ``window - 1`` is the plain mean
+    of the first ``window`` values, and each later bar is
+    ``(previous * (window - 1) + value) / window``. The recursion is run on
+    Python floats with ta's exact operation order.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    result = np.zeros(len(values))
+    if window < 1 or window > len(values):
+        return result
+
+    average = float(values[:window].mean())
+    averages = [average]
+    for value in values[window:].tolist():
+        average = (average * (window - 1) + value) / float(window)
+        averages.append(average)
+    result[window - 1 :] = averages
+    return result
+
+
+# Streaming statistics, updated one value at a time in amortized O(1).
+
+
+class RollingSum:
+    """Compensated rolling sum over the last ``window`` values, skipping NaNs.
+
+    ``update`` returns the sum and ``mean`` the mean, both NaN until
+    ``min_periods`` values have been seen, matching the batch functions.
+    """
+
+    def __init__(self, window: int, min_periods: Optional[int] = None) -> None:
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.values: Deque[float] = deque()
+        self.total = 0.0
+        self.compensation = 0.0
+        self.count = 0
+        self.nonzero = 0
+        self.last = NAN
+        self.repeated = 0
+
+    def _add(self, value: float) -> None:
+        y = value - self.compensation
+        t = self.total + y
+        self.compensation = (t - self.total) - y
+        self.total = t
+
+    def update(self, value: float) -> float:
+        self.values.append(value)
+        if value == value:
+            self.count += 1
+            self.nonzero += value != 0
+            self.repeated = self.repeated + 1 if value == self.last else 1
+            self.last = value
+            self._add(value)
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            if old == old:
+                self.count -= 1
+                self.nonzero -= old != 0
+                self._add(-old)
+        if self.nonzero == 0:
+            # Drop rounding residue once only zeros are left in the window.
+            self.total = 0.0
+            self.compensation = 0.0
+        if self.count < max(self.min_periods, 1):
+            return NAN
+        if self.repeated >= self.count:
+            # A window of one repeated value is reported exactly, as pandas does.
+            return self.last * self.count
+        return self.total
+
+    def mean(self) -> float:
+        if self.count < max(self.min_periods, 1):
+            return NAN
+        if self.repeated >= self.count:
+            return self.last
+        return self.total / self.count
+
+
+class RollingStd:
+    """Population standard deviation over a fixed window (sliding Welford)."""
+
+    def __init__(self, window: int) -> None:
+        self.window = window
+        self.values: Deque[float] = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, value: float) -> float:
+        self.values.append(value)
+        if len(self.values) <= self.window:
+            delta = value - self.mean
+            self.mean += delta / len(self.values)
+            self.m2 += delta * (value - self.mean)
+        else:
+            old = self.values.popleft()
+            previous_mean = self.mean
+            self.mean += (value - old) / self.window
+            self.m2 += (value - old) * (value - self.mean + old - previous_mean)
+        if len(self.values) < self.window:
+            return NAN
+        return math.sqrt(max(self.m2, 0.0) / self.window)
+
+
+class RollingExtreme:
+    """Rolling max (or min) with the position of its first occurrence.
+
+    Backed by a monotonic deque of (index, value) pairs, so each update is
+    amortized O(1). ``update`` returns ``(value, position)`` with the same
+    position convention as ``rolling_argmax``, or ``(nan, -1)`` while the
+    first window is filling.
+    """
+
+    def __init__(self, window: int, maximum: bool = True) -> None:
+        self.window = window
+        self.maximum = maximum
+        self.candidates: Deque[Tuple[int, float]] = deque()
+        self.index = -1
+
+    def update(self, value: float) -> Tuple[float, int]:
+        self.index += 1
+        candidates = self.candidates
+        if self.maximum:
+            while candidates and candidates[-1][1] < value:
+                candidates.pop()
+        else:
+            while candidates and candidates[-1][1] > value:
+                candidates.pop()
+        candidates.append((self.index, value))
+        if candidates[0][0] <= self.index - self.window:
+            candidates.popleft()
+        if self.index + 1 < self.window:
+            return NAN, -1
+        position, extreme = candidates[0]
+        return extreme, position - (self.index - self.window + 1)
@@ -0,0 +1,78 @@
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from data_classes import KLINE_COLUMNS, KLines
+
+
+_worker_klines: Optional[KLines] = None
+_worker_shm: Optional[SharedMemory] = None
+
+
+@dataclass(frozen=True)
+class SharedKLinesSpec:
+    """Picklable handle that lets another process map a SharedKLines block."""
+
+    name: str
+    length: int
+
+
+def _column_views(buffer: memoryview, length: int) -> Dict[str, np.ndarray]:
+    columns: Dict[str, np.ndarray] = {}
+    offset = 0
+    for name, dtype in KLINE_COLUMNS.items():
+        columns[name] = np.ndarray(length, dtype=dtype, buffer=buffer, offset=offset)
+        offset += length * dtype.itemsize
+    return columns
+
+
+class SharedKLines:
+    """Copy of a KLines placed in one shared memory block.
+
+    The creating process owns the block and must ``close`` it (or use it as a
+    context manager). Worker processes map it with ``attach_klines`` and get
+    zero-copy column views instead of a pickled copy per task.
+    """
+
+    def __init__(self, klines: KLines) -> None:
+        length = len(klines)
+        size = sum(dtype.itemsize for dtype in KLINE_COLUMNS.values()) * length
+        self._shm = SharedMemory(create=True, size=max(size, 1))
+        for name, view in _column_views(self._shm.buf, length).items():
+            view[:] = getattr(klines, name)
+        self.spec = SharedKLinesSpec(name=self._shm.name, length=length)
+
+    def close(self) -> None:
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> "SharedKLines":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def attach_klines(spec: SharedKLinesSpec) -> Tuple[KLines, SharedMemory]:
+    """Map a shared block as KLines; keep the returned SharedMemory alive.
+
+    Meant for child processes of the owner, which share its resource tracker,
+    so the block is still unlinked exactly once by ``SharedKLines.close``.
+    """
+    shm = SharedMemory(name=spec.name)
+    return KLines.from_columns(_column_views(shm.buf, spec.length)), shm
+
+
+def init_worker(spec: SharedKLinesSpec) -> None:
+    """Process pool initializer: map the shared candles once per worker."""
+    global _worker_klines, _worker_shm
+    _worker_klines, _worker_shm = attach_klines(spec)
+
+
+def worker_klines() -> KLines:
+    """The candles mapped by ``init_worker`` in this worker process."""
+    if _worker_klines is None:
+        raise RuntimeError("Worker process was not started with init_worker")
+    return _worker_klines
@@ -0,0 +1,179 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Type, Union
+
+import numpy as np
+
+import signals
+from data_classes import KLines
+from strategies import CombinedStrategy
+
+
+VOTE = "vote"
+
+
+@dataclass(frozen=True)
+class SignalNode:
+    """A signal class with fixed parameters; build nodes with ``SignalGraph``."""
+
+    signal_class: Type[signals.BaseSignal]
+    params: Tuple[Tuple[str, Any], ...]
+
+    def output(self, column: str = VOTE) -> "Output":
+        """The node's votes, or one of the columns its ``indicators`` return."""
+        return Output(self, column)
+
+    def build(self, klines: KLines) -> signals.BaseSignal:
+        return self.signal_class(klines, **dict(self.params))
+
+
+@dataclass(frozen=True)
+class CombinedNode:
+    """Weighted majority of member signal votes (``combine_votes``)."""
+
+    members: Tuple[SignalNode, ...]
+    weights: Optional[Tuple[float, ...]] = None
+    quorum: float = 0.0
+
+    def output(self, column: str = VOTE) -> "Output":
+        if column != VOTE:
+            raise ValueError("A combined node only outputs votes")
+        return Output(self, column)
+
+
+Node = Union[SignalNode, CombinedNode]
+
+
+@dataclass(frozen=True)
+class Output:
+    node: Node
+    column: str = VOTE
+
+
+class SignalGraph:
+    """Lazy, deduplicated evaluation of signal votes and indicators on KLines.
+
+    Nodes are declared up front and nothing is computed until ``evaluate``
+    asks for outputs. Equal declarations (same class and parameters, with
+    defaults filled in) are the same node, every signal is built at most once
+    per evaluation, and indicators shared between signals come from one
+    feature cache. Only the requested bars plus the largest ``lookback`` of
+    the signals involved are evaluated, so asking for the latest vote costs
+    a few hundred bars instead of the whole history. A combined node merges
+    its members' raw votes; it does not backtest them like
+    ``CombinedStrategy.vote_matrix``.
+    """
+
+    def __init__(self, klines: KLines) -> None:
+        self.klines = klines
+        self._nodes: Dict[Node, Node] = {}
+        self._view: Optional[Tuple[Tuple[int, int], KLines]] = None
+
+    def signal(
+        self, signal_class: Type[signals.BaseSignal], **params: Any
+    ) -> SignalNode:
+        # Fill in the defaults so RSISignal() and RSISignal(rsi_period=14) match.
+        bound = signal_class(self.klines, **params).params
+        node = SignalNode(signal_class, tuple(sorted(bound.items())))
+        return self._nodes.setdefault(node, node)
+
+    def combined(
+        self,
+        members: Iterable[SignalNode],
+        weights: Optional[Sequence[float]] = None,
+        quorum: float = 0.0,
+    ) -> CombinedNode:
+        node = CombinedNode(
+            tuple(members), tuple(weights) if weights is not None else None, quorum
+        )
+        return self._nodes.setdefault(node, node)
+
+    @property
+    def nodes(self) -> List[Node]:
+        return list(self._nodes)
+
+    def lookback(self, outputs: Iterable[Output]) -> Optional[int]:
+        """Bars before the first requested bar that ``outputs`` depend on."""
+        columns: Dict[Tuple[SignalNode, str], None] = {}
+        for output in outputs:
+            if isinstance(output.node, CombinedNode):
+                members = output.node.members
+                columns.update(dict.fromkeys((node, VOTE) for node in members))
+            else:
+                columns[output.node, output.column] = None
+        lookbacks = []
+        for node, column in columns:
+            signal = node.build(self.klines)
+            lookbacks.append(
+                signal.lookback if column == VOTE else signal.column_lookback(column)
+            )
+        if any(lookback is None for lookback in lookbacks):
+            return None
+        return max(lookbacks, default=0)
+
+    def _klines(self, start: int, stop: int) -> KLines:
+        # Reusing the view keeps its feature cache across evaluations of the
+        # same range.
+        if (start, stop) == (0, len(self.klines)):
+            return self.klines
+        if self._view is None or self._view[0] != (start, stop):
+            self._view = ((start, stop), self.klines.slice(start, stop))
+        return self._view[1]
+
+    def evaluate(
+        self,
+        outputs: Sequence[Output],
+        start_time: Optional[int] = None,
+        end_time: Optional[int] = None,
+    ) -> Dict[Output, np.ndarray]:
+        """Values of ``outputs`` for the candles opening in [start_time, end_time].
+
+        Bounds are epoch milliseconds, as in ``KLines.between``; each array
+        has one value per candle in that range.
+        """
+        open_time = self.klines.open_time
+        start = 0 if start_time is None else int(open_time.searchsorted(start_time))
+        stop = (
+            len(self.klines)
+            if end_time is None
+            else int(open_time.searchsorted(end_time, side="right"))
+        )
+        stop = max(start, stop)
+        lookback = self.lookback(outputs)
+        first = 0 if lookback is None else max(start - lookback, 0)
+        klines = self._klines(first, stop)
+
+        built: Dict[SignalNode, signals.BaseSignal] = {}
+        votes: Dict[SignalNode, np.ndarray] = {}
+
+        def vote(node: SignalNode) -> np.ndarray:
+            if node not in votes:
+                votes[node] = signal(node).votes()
+            return votes[node]
+
+        def signal(node: SignalNode) -> signals.BaseSignal:
+            if node not in built:
+                built[node] = node.build(klines)
+            return built[node]
+
+        results: Dict[Output, np.ndarray] = {}
+        for output in outputs:
+            node = output.node
+            if isinstance(node, CombinedNode):
+                values = CombinedStrategy.combine_votes(
+                    np.vstack([vote(member) for member in node.members]),
+                    node.weights,
+                    node.quorum,
+                )
+            elif output.column == VOTE:
+                values = vote(node)
+            else:
+                values = signal(node).indicators()[output.column]
+            results[output] = values[start - first :]
+        return results
+
+    def latest(self, outputs: Sequence[Output]) -> Dict[Output, Any]:
+        """Values of ``outputs`` on the newest candle."""
+        if not len(self.klines):
+            raise ValueError("No candles to evaluate")
+        results = self.evaluate(outputs, start_time=int(self.klines.open_time[-1]))
+        return {output: values[-1].item() for output, values in results.items()}
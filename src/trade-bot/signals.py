@@ -1,34 +1,137 @@
+import inspect
 from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional
 
+import numpy as np
 import ta
 from pandas import DataFrame
+import rolling
+import streaming
 from data_classes import KLines
+from instrumentation import timed
+
+
+# Recursive averages (EMAs, Wilder smoothing) never forget a bar; after this
+# many windows the bars further back weigh less than about e^-20.
+SMOOTHING_LOOKBACK = 20
+
+
+def select_votes(buy: np.ndarray, sell: np.ndarray) -> np.ndarray:
+    """int8 votes: 1 where ``buy`` holds, else -1 where ``sell`` holds, else 0."""
+    return np.select([buy, sell], [1, -1], 0).astype(np.int8)
+
+
+def compare_votes(values: np.ndarray, reference: Any) -> np.ndarray:
+    """int8 sign of ``values - reference``, with 0 wherever either is NaN."""
+    return np.greater(values, reference).astype(np.int8) - np.less(values, reference)
 
 
 class BaseSignal(ABC):
+    """A technical indicator and the buy/sell votes derived from it.
+
+    Signals never copy or modify the candle frame: ``indicators`` returns the
+    indicator columns as arrays (cached per KLines) and ``votes`` one int8 per
+    bar. ``generate`` joins both onto a shallow copy of the shared base frame
+    for callers that want a single table.
+    """
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        generate = cls.__dict__.get("generate")
+        if generate is not None and not hasattr(generate, "__instrumented__"):
+            cls.generate = timed("signal.generate", per_class=True)(generate)
+
     def __init__(self, klines: KLines) -> None:
         self.klines = klines
-        self.df = klines.to_dataframe()
         self.name = self.__class__.__name__
 
+    @property
+    def params(self) -> Dict[str, Any]:
+        """Constructor arguments besides ``klines``.
+
+        ``type(signal)(klines, **signal.params)`` rebuilds the same signal.
+        """
+        names = list(inspect.signature(type(self).__init__).parameters)[2:]
+        return {name: getattr(self, name) for name in names}
+
+    @property
+    def lookback(self) -> Optional[int]:
+        """Bars of history before a bar that its indicators and vote depend on.
+
+        Evaluating a range with this many earlier bars gives the same values
+        as evaluating the whole history, up to the ``SMOOTHING_LOOKBACK``
+        cut-off for recursive averages. ``None`` means the whole history.
+        Indicator columns that need more history say so in ``column_lookback``.
+        """
+        return None
+
+    def column_lookback(self, column: str) -> Optional[int]:
+        """``lookback`` of one of the ``indicators`` columns."""
+        return self.lookback
+
+    def feature(self, name: str, compute: Callable[[DataFrame], Any], **params) -> Any:
+        return self.klines.features.get(name, params, compute)
+
+    def rolling_feature(self, statistic: str, column: str, window: int) -> np.ndarray:
+        """``rolling.rolling_<statistic>`` of a candle column, cached per KLines.
+
+        Signals asking for the same statistic of the same column and window
+        (e.g. the 14-bar highest high) share one computation.
+        """
+        function = getattr(rolling, f"rolling_{statistic}")
+        return self.feature(
+            f"rolling_{statistic}",
+            lambda df: function(df[column].to_numpy(), window),
+            column=column,
+            window=window,
+        )
+
     @abstractmethod
-    def generate(self) -> DataFrame:
+    def indicators(self) -> Dict[str, np.ndarray]:
+        pass
+
+    @abstractmethod
+    def votes(self) -> np.ndarray:
         pass
 
+    @timed("signal.generate", per_class=True)
+    def generate(self) -> DataFrame:
+        df = self.klines.features.frame().copy(deep=False)
+        for column, values in self.indicators().items():
+            df[column] = values
+        df[self.name] = self.votes()
+        return df
+
+    def stream(self) -> streaming.StreamingIndicator:
+        """A streaming indicator warmed up on ``klines``, for live trading."""
+        raise TypeError(f"{type(self).__name__} has no streaming form")
+
 
 class RSISignal(BaseSignal):
     def __init__(self, klines: KLines, rsi_period: int = 14) -> None:
         super().__init__(klines)
         self.rsi_period = rsi_period
 
-    def generate(self) -> DataFrame:
-        self.df["RSI"] = ta.momentum.RSIIndicator(
-            close=self.df["close"], window=self.rsi_period
-        ).rsi()
-        self.df[self.name] = 0
-        self.df.loc[self.df["RSI"] < 30, self.name] = 1
-        self.df.loc[self.df["RSI"] > 70, self.name] = -1
-        return self.df
+    @property
+    def lookback(self) -> int:
+        return SMOOTHING_LOOKBACK * self.rsi_period
+
+    def indicators(self) -> Dict[str, np.ndarray]:
+        rsi = self.feature(
+            "rsi",
+            lambda df: ta.momentum.RSIIndicator(
+                close=df["close"], window=self.rsi_period
+            ).rsi(),
+            window=self.rsi_period,
+        )
+        return {"RSI": rsi.to_numpy()}
+
+    def votes(self) -> np.ndarray:
+        rsi = self.indicators()["RSI"]
+        return select_votes(rsi < 30, rsi > 70)
+
+    def stream(self) -> streaming.StreamingRSI:
+        return streaming.StreamingRSI(self.rsi_period).warm_up(self.klines)
 
 
 class MACDSignal(BaseSignal):
@@ -44,20 +147,40 @@ class MACDSignal(BaseSignal):
         self.macd_slow = macd_slow
         self.macd_signal = macd_signal
 
-    def generate(self) -> DataFrame:
+    @property
+    def lookback(self) -> int:
+        return SMOOTHING_LOOKBACK * (self.macd_slow + self.macd_signal)
+
+    def _macd(self, df: DataFrame) -> Dict[str, np.ndarray]:
         macd = ta.trend.MACD(
-            close=self.df["close"],
+            close=df["close"],
             window_slow=self.macd_slow,
             window_fast=self.macd_fast,
             window_sign=self.macd_signal,
         )
-        self.df["MACD"] = macd.macd()
-        self.df["MACD_signal"] = macd.macd_signal()
-        self.df["MACD_diff"] = macd.macd_diff()
-        self.df[self.name] = 0
-        self.df.loc[self.df["MACD"] > self.df["MACD_signal"], self.name] = 1
-        self.df.loc[self.df["MACD"] < self.df["MACD_signal"], self.name] = -1
-        return self.df
+        return {
+            "MACD": macd.macd().to_numpy(),
+            "MACD_signal": macd.macd_signal().to_numpy(),
+            "MACD_diff": macd.macd_diff().to_numpy(),
+        }
+
+    def indicators(self) -> Dict[str, np.ndarray]:
+        return self.feature(
+            "macd",
+            self._macd,
+            window_fast=self.macd_fast,
+            window_slow=self.macd_slow,
+            window_sign=self.macd_signal,
+        )
+
+    def votes(self) -> np.ndarray:
+        macd = self.indicators()
+        return compare_votes(macd["MACD"], macd["MACD_signal"])
+
+    def stream(self) -> streaming.StreamingMACD:
+        return streaming.StreamingMACD(
+            self.macd_fast, self.macd_slow, self.macd_signal
+        ).warm_up(self.klines)
 
 
 class StochasticSignal(BaseSignal):
@@ -68,42 +191,71 @@ class StochasticSignal(BaseSignal):
         self.k_window = k_window
         self.d_window = d_window
 
-    def generate(self) -> DataFrame:
-        stochastic = ta.momentum.StochasticOscillator(
-            high=self.df["high"],
-            low=self.df["low"],
-            close=self.df["close"],
+    @property
+    def lookback(self) -> int:
+        return self.k_window + self.d_window
+
+    def _stochastic(self, df: DataFrame) -> Dict[str, np.ndarray]:
+        # Same arithmetic as ta.momentum.StochasticOscillator.
+        lowest = self.rolling_feature("min", "low", self.k_window)
+        highest = self.rolling_feature("max", "high", self.k_window)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            stoch_k = 100 * (df["close"].to_numpy() - lowest) / (highest - lowest)
+        return {
+            "Stoch_k": stoch_k,
+            "Stoch_d": rolling.rolling_mean(stoch_k, self.d_window),
+        }
+
+    def indicators(self) -> Dict[str, np.ndarray]:
+        return self.feature(
+            "stochastic",
+            self._stochastic,
             window=self.k_window,
             smooth_window=self.d_window,
         )
-        self.df["Stoch_k"] = stochastic.stoch()
-        self.df["Stoch_d"] = stochastic.stoch_signal()
-        self.df[self.name] = 0
-        self.df.loc[self.df["Stoch_k"] > self.df["Stoch_d"], self.name] = 1
-        self.df.loc[self.df["Stoch_k"] < self.df["Stoch_d"], self.name] = -1
-        return self.df
+
+    def votes(self) -> np.ndarray:
+        stochastic = self.indicators()
+        return compare_votes(stochastic["Stoch_k"], stochastic["Stoch_d"])
+
+    def stream(self) -> streaming.StreamingStochastic:
+        return streaming.StreamingStochastic(
+            self.k_window, self.d_window
+        ).warm_up(self.klines)
 
 
 class TSISignal(BaseSignal):
     def __init__(
         self, klines: KLines, window_slow: int = 25, window_fast: int = 13
     ) -> None:
-        self.klines = klines
-        self.df = klines.to_dataframe()
+        super().__init__(klines)
         self.window_slow = window_slow
         self.window_fast = window_fast
 
-    def generate(self) -> DataFrame:
-        tsi = ta.momentum.TSIIndicator(
-            close=self.df["close"],
+    @property
+    def lookback(self) -> int:
+        return SMOOTHING_LOOKBACK * (self.window_slow + self.window_fast)
+
+    def indicators(self) -> Dict[str, np.ndarray]:
+        tsi = self.feature(
+            "tsi",
+            lambda df: ta.momentum.TSIIndicator(
+                close=df["close"],
+                window_slow=self.window_slow,
+                window_fast=self.window_fast,
+            ).tsi(),
             window_slow=self.window_slow,
             window_fast=self.window_fast,
         )
-        self.df["TSI"] = tsi.tsi()
-        self.df[self.name] = 0
-        self.df.loc[self.df["TSI"] > 0, self.name] = 1
-        self.df.loc[self.df["TSI"] < 0, self.name] = -1
-        return self.df
+        return {"TSI": tsi.to_numpy()}
+
+    def votes(self) -> np.ndarray:
+        return compare_votes(self.indicators()["TSI"], 0)
+
+    def stream(self) -> streaming.StreamingTSI:
+        return streaming.StreamingTSI(
+            self.window_slow, self.window_fast
+        ).warm_up(self.klines)
 
 
 class UltimateOscillatorSignal(BaseSignal):
@@ -119,19 +271,34 @@ class UltimateOscillatorSignal(BaseSignal):
         self.window2 = window2
         self.window3 = window3
 
-    def generate(self) -> DataFrame:
-        self.df["Ultimate_Osc"] = ta.momentum.UltimateOscillator(
-            high=self.df["high"],
-            low=self.df["low"],
-            close=self.df["close"],
+    @property
+    def lookback(self) -> int:
+        return max(self.window1, self.window2, self.window3) + 1
+
+    def indicators(self) -> Dict[str, np.ndarray]:
+        ultimate_oscillator = self.feature(
+            "ultimate_oscillator",
+            lambda df: ta.momentum.UltimateOscillator(
+                high=df["high"],
+                low=df["low"],
+                close=df["close"],
+                window1=self.window1,
+                window2=self.window2,
+                window3=self.window3,
+            ).ultimate_oscillator(),
             window1=self.window1,
             window2=self.window2,
             window3=self.window3,
-        ).ultimate_oscillator()
-        self.df[self.name] = 0
-        self.df.loc[self.df["Ultimate_Osc"] > 50, self.name] = 1
-        self.df.loc[self.df["Ultimate_Osc"] < 50, self.name] = -1
-        return self.df
+        )
+        return {"Ultimate_Osc": ultimate_oscillator.to_numpy()}
+
+    def votes(self) -> np.ndarray:
+        return compare_votes(self.indicators()["Ultimate_Osc"], 50)
+
+    def stream(self) -> streaming.StreamingUltimateOscillator:
+        return streaming.StreamingUltimateOscillator(
+            self.window1, self.window2, self.window3
+        ).warm_up(self.klines)
 
 
 class WilliamsRSignal(BaseSignal):
@@ -139,17 +306,26 @@ class WilliamsRSignal(BaseSignal):
         super().__init__(klines)
         self.lbp = lbp
 
-    def generate(self) -> DataFrame:
-        self.df["WilliamsR"] = ta.momentum.WilliamsRIndicator(
-            high=self.df["high"],
-            low=self.df["low"],
-            close=self.df["close"],
-            lbp=self.lbp,
-        ).williams_r()
-        self.df[self.name] = 0
-        self.df.loc[self.df["WilliamsR"] > -20, self.name] = 1
-        self.df.loc[self.df["WilliamsR"] < -80, self.name] = -1
-        return self.df
+    @property
+    def lookback(self) -> int:
+        return self.lbp
+
+    def _williams_r(self, df: DataFrame) -> np.ndarray:
+        # Same arithmetic as ta.momentum.WilliamsRIndicator.
+        highest = self.rolling_feature("max", "high", self.lbp)
+        lowest = self.rolling_feature("min", "low", self.lbp)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return -100 * (highest - df["close"].to_numpy()) / (highest - lowest)
+
+    def indicators(self) -> Dict[str, np.ndarray]:
+        return {"WilliamsR": self.feature("williams_r", self._williams_r, lbp=self.lbp)}
+
+    def votes(self) -> np.ndarray:
+        williams_r = self.indicators()["WilliamsR"]
+        return select_votes(williams_r > -20, williams_r < -80)
+
+    def stream(self) -> streaming.StreamingWilliamsR:
+        return streaming.StreamingWilliamsR(self.lbp).warm_up(self.klines)
 
 
 class AwesomeOscillatorSignal(BaseSignal):
@@ -160,17 +336,31 @@ class AwesomeOscillatorSignal(BaseSignal):
         self.window1 = window1
         self.window2 = window2
 
-    def generate(self) -> DataFrame:
-        self.df["Awesome_Osc"] = ta.momentum.AwesomeOscillatorIndicator(
-            high=self.df["high"],
-            low=self.df["low"],
+    @property
+    def lookback(self) -> int:
+        return max(self.window1, self.window2)
+
+    def indicators(self) -> Dict[str, np.ndarray]:
+        awesome_oscillator = self.feature(
+            "awesome_oscillator",
+            lambda df: ta.momentum.AwesomeOscillatorIndicator(
+                high=df["high"],
+                low=df["low"],
+                window1=self.window1,
+                window2=self.window2,
+            ).awesome_oscillator(),
             window1=self.window1,
             window2=self.window2,
-        ).awesome_oscillator()
-        self.df[self.name] = 0
-        self.df.loc[self.df["Awesome_Osc"] > 0, self.name] = 1
-        self.df.loc[self.df["Awesome_Osc"] < 0, self.name] = -1
-        return self.df
+        )
+        return {"Awesome_Osc": awesome_oscillator.to_numpy()}
+
+    def votes(self) -> np.ndarray:
+        return compare_votes(self.indicators()["Awesome_Osc"], 0)
+
+    def stream(self) -> streaming.StreamingAwesomeOscillator:
+        return streaming.StreamingAwesomeOscillator(
+            self.window1, self.window2
+        ).warm_up(self.klines)
 
 
 class ADXSignal(BaseSignal):
@@ -178,38 +368,59 @@ class ADXSignal(BaseSignal):
         super().__init__(klines)
         self.window = window
 
-    def generate(self) -> DataFrame:
+    @property
+    def lookback(self) -> int:
+        return SMOOTHING_LOOKBACK * 2 * self.window
+
+    def _adx(self, df: DataFrame) -> Dict[str, np.ndarray]:
         adx = ta.trend.ADXIndicator(
-            high=self.df["high"],
-            low=self.df["low"],
-            close=self.df["close"],
-            window=self.window,
+            high=df["high"], low=df["low"], close=df["close"], window=self.window
         )
-        self.df["ADX"] = adx.adx()
-        self.df["ADX_pos"] = adx.adx_pos()
-        self.df["ADX_neg"] = adx.adx_neg()
-        self.df[self.name] = 0
-        self.df.loc[self.df["ADX_pos"] > self.df["ADX_neg"], self.name] = 1
-        self.df.loc[self.df["ADX_pos"] < self.df["ADX_neg"], self.name] = -1
-        return self.df
+        return {
+            "ADX": adx.adx().to_numpy(),
+            "ADX_pos": adx.adx_pos().to_numpy(),
+            "ADX_neg": adx.adx_neg().to_numpy(),
+        }
+
+    def indicators(self) -> Dict[str, np.ndarray]:
+        return self.feature("adx", self._adx, window=self.window)
+
+    def votes(self) -> np.ndarray:
+        adx = self.indicators()
+        return compare_votes(adx["ADX_pos"], adx["ADX_neg"])
+
+    def stream(self) -> streaming.StreamingADX:
+        return streaming.StreamingADX(self.window).warm_up(self.klines)
 
 
 class AroonSignal(BaseSignal):
     def __init__(self, klines: KLines, window: int = 25) -> None:
-        self.klines = klines
-        self.df = klines.to_dataframe()
+        super().__init__(klines)
         self.window = window
 
-    def generate(self) -> DataFrame:
-        aroon = ta.trend.AroonIndicator(
-            high=self.df["high"], low=self.df["low"], window=self.window
-        )
-        self.df["Aroon_Up"] = aroon.aroon_up()
-        self.df["Aroon_Down"] = aroon.aroon_down()
-        self.df[self.name] = 0
-        self.df.loc[self.df["Aroon_Up"] > self.df["Aroon_Down"], self.name] = 1
-        self.df.loc[self.df["Aroon_Up"] < self.df["Aroon_Down"], self.name] = -1
-        return self.df
+    @property
+    def lookback(self) -> int:
+        return self.window + 1
+
+    def _aroon(self, df: DataFrame) -> Dict[str, np.ndarray]:
+        # ta.trend.AroonIndicator looks back over window + 1 bars with a
+        # per-window np.argmax; rolling_argmax gives the same positions in O(n).
+        high = rolling.rolling_argmax(df["high"].to_numpy(), self.window + 1)
+        low = rolling.rolling_argmin(df["low"].to_numpy(), self.window + 1)
+        return {
+            "Aroon_Up": high / self.window * 100,
+            "Aroon_Down": low / self.window * 100,
+        }
+
+    def indicators(self) -> Dict[str, np.ndarray]:
+        return self.feature("aroon", self._aroon, window=self.window)
+
+    def votes(self) -> np.ndarray:
+        aroon = self.indicators()
+        return compare_votes(aroon["Aroon_Up"], aroon["Aroon_Down"])
+
+    def stream(self) -> streaming.StreamingAroon:
+        return streaming.StreamingAroon(self.window).warm_up(self.klines)
 
 
 class CCISignal(BaseSignal):
@@ -217,17 +428,26 @@ class CCISignal(BaseSignal):
         super().__init__(klines)
         self.window = window
 
-    def generate(self) -> DataFrame:
-        self.df["CCI"] = ta.trend.CCIIndicator(
-            high=self.df["high"],
-            low=self.df["low"],
-            close=self.df["close"],
+    @property
+    def lookback(self) -> int:
+        return self.window
+
+    def indicators(self) -> Dict[str, np.ndarray]:
+        cci = self.feature(
+            "cci",
+            lambda df: ta.trend.CCIIndicator(
+                high=df["high"], low=df["low"], close=df["close"], window=self.window
+            ).cci(),
             window=self.window,
-        ).cci()
-        self.df[self.name] = 0
-        self.df.loc[self.df["CCI"] > 100, self.name] = 1
-        self.df.loc[self.df["CCI"] < -100, self.name] = -1
-        return self.df
+        )
+        return {"CCI": cci.to_numpy()}
+
+    def votes(self) -> np.ndarray:
+        cci = self.indicators()["CCI"]
+        return select_votes(cci > 100, cci < -100)
+
+    def stream(self) -> streaming.StreamingCCI:
+        return streaming.StreamingCCI(self.window).warm_up(self.klines)
 
 
 class BollingerBandsSignal(BaseSignal):
@@ -238,17 +458,37 @@ class BollingerBandsSignal(BaseSignal):
         self.window = window
         self.window_dev = window_dev
 
-    def generate(self) -> DataFrame:
+    @property
+    def lookback(self) -> int:
+        return self.window
+
+    def _bollinger_bands(self, df: DataFrame) -> Dict[str, np.ndarray]:
         bollinger = ta.volatility.BollingerBands(
-            close=self.df["close"], window=self.window, window_dev=self.window_dev
+            close=df["close"], window=self.window, window_dev=self.window_dev
         )
-        self.df["BB_High"] = bollinger.bollinger_hband()
-        self.df["BB_Low"] = bollinger.bollinger_lband()
-        self.df["BB_Mid"] = bollinger.bollinger_mavg()
-        self.df[self.name] = 0
-        self.df.loc[self.df["close"] > self.df["BB_High"], self.name] = -1
-        self.df.loc[self.df["close"] < self.df["BB_Low"], self.name] = 1
-        return self.df
+        return {
+            "BB_High": bollinger.bollinger_hband().to_numpy(),
+            "BB_Low": bollinger.bollinger_lband().to_numpy(),
+            "BB_Mid": bollinger.bollinger_mavg().to_numpy(),
+        }
+
+    def indicators(self) -> Dict[str, np.ndarray]:
+        return self.feature(
+            "bollinger_bands",
+            self._bollinger_bands,
+            window=self.window,
+            window_dev=self.window_dev,
+        )
+
+    def votes(self) -> np.ndarray:
+        bollinger = self.indicators()
+        close = self.klines.close
+        return select_votes(close < bollinger["BB_Low"], close > bollinger["BB_High"])
+
+    def stream(self) -> streaming.StreamingBollingerBands:
+        return streaming.StreamingBollingerBands(
+            self.window, self.window_dev
+        ).warm_up(self.klines)
 
 
 class KeltnerChannelSignal(BaseSignal):
@@ -259,20 +499,40 @@ class KeltnerChannelSignal(BaseSignal):
         self.window = window
         self.window_atr = window_atr
 
-    def generate(self) -> DataFrame:
+    @property
+    def lookback(self) -> int:
+        return max(self.window, self.window_atr) + 1
+
+    def _keltner_channel(self, df: DataFrame) -> Dict[str, np.ndarray]:
         keltner = ta.volatility.KeltnerChannel(
-            high=self.df["high"],
-            low=self.df["low"],
-            close=self.df["close"],
+            high=df["high"],
+            low=df["low"],
+            close=df["close"],
             window=self.window,
             window_atr=self.window_atr,
         )
-        self.df["KC_High"] = keltner.keltner_channel_hband()
-        self.df["KC_Low"] = keltner.keltner_channel_lband()
-        self.df[self.name] = 0
-        self.df.loc[self.df["close"] > self.df["KC_High"], self.name] = -1
-        self.df.loc[self.df["close"] < self.df["KC_Low"], self.name] = 1
-        return self.df
+        return {
+            "KC_High": keltner.keltner_channel_hband().to_numpy(),
+            "KC_Low": keltner.keltner_channel_lband().to_numpy(),
+        }
+
+    def indicators(self) -> Dict[str, np.ndarray]:
+        return self.feature(
+            "keltner_channel",
+            self._keltner_channel,
+            window=self.window,
+            window_atr=self.window_atr,
+        )
+
+    def votes(self) -> np.ndarray:
+        keltner = self.indicators()
+        close = self.klines.close
+        return select_votes(close < keltner["KC_Low"], close > keltner["KC_High"])
+
+    def stream(self) -> streaming.StreamingKeltnerChannel:
+        return streaming.StreamingKeltnerChannel(
+            self.window, self.window_atr
+        ).warm_up(self.klines)
 
 
 class DonchianChannelSignal(BaseSignal):
@@ -280,19 +540,25 @@ class DonchianChannelSignal(BaseSignal):
         super().__init__(klines)
         self.window = window
 
-    def generate(self) -> DataFrame:
-        donchian = ta.volatility.DonchianChannel(
-            high=self.df["high"],
-            low=self.df["low"],
-            close=self.df["close"],
-            window=self.window,
+    @property
+    def lookback(self) -> int:
+        return self.window
+
+    def indicators(self) -> Dict[str, np.ndarray]:
+        return {
+            "Donchian_High": self.rolling_feature("max", "high", self.window),
+            "Donchian_Low": self.rolling_feature("min", "low", self.window),
+        }
+
+    def votes(self) -> np.ndarray:
+        donchian = self.indicators()
+        close = self.klines.close
+        return select_votes(
+            close < donchian["Donchian_Low"], close > donchian["Donchian_High"]
         )
-        self.df["Donchian_High"] = donchian.donchian_channel_hband()
-        self.df["Donchian_Low"] = donchian.donchian_channel_lband()
-        self.df[self.name] = 0
-        self.df.loc[self.df["close"] > self.df["Donchian_High"], self.name] = -1
-        self.df.loc[self.df["close"] < self.df["Donchian_Low"], self.name] = 1
-        return self.df
+
+    def stream(self) -> streaming.StreamingDonchianChannel:
+        return streaming.StreamingDonchianChannel(self.window).warm_up(self.klines)
 
 
 class ATRSignal(BaseSignal):
@@ -300,38 +566,64 @@ class ATRSignal(BaseSignal):
         super().__init__(klines)
         self.window = window
 
-    def generate(self) -> DataFrame:
-        self.df["ATR"] = ta.volatility.AverageTrueRange(
-            high=self.df["high"],
-            low=self.df["low"],
-            close=self.df["close"],
-            window=self.window,
-        ).average_true_range()
-        # ATR is typically used as a volatility measure, not a direct buy/sell signal, but we can still flag high volatility
-        self.df[self.name] = 0
-        self.df.loc[
-            self.df["ATR"] > self.df["ATR"].rolling(window=self.window).mean(),
-            self.name,
-        ] = 1  # High volatility
-        self.df.loc[
-            self.df["ATR"] < self.df["ATR"].rolling(window=self.window).mean(),
-            self.name,
-        ] = -1  # Low volatility
-        return self.df
+    @property
+    def lookback(self) -> int:
+        return (SMOOTHING_LOOKBACK + 1) * self.window
+
+    def _atr(self, df: DataFrame) -> Dict[str, np.ndarray]:
+        # Same values as ta.volatility.AverageTrueRange, whose Wilder loop
+        # indexes a Series per bar.
+        high = df["high"].to_numpy()
+        low = df["low"].to_numpy()
+        previous_close = df["close"].shift(1).to_numpy()
+        true_range = np.fmax(
+            np.fmax(high - low, np.abs(high - previous_close)),
+            np.abs(low - previous_close),
+        )
+        atr = rolling.wilder_average(true_range, self.window)
+        return {"ATR": atr, "ATR_mean": rolling.rolling_mean(atr, self.window)}
+
+    def indicators(self) -> Dict[str, np.ndarray]:
+        return {"ATR": self.feature("atr", self._atr, window=self.window)["ATR"]}
+
+    def votes(self) -> np.ndarray:
+        # ATR is typically used as a volatility measure, not a direct buy/sell
+        # signal, but we can still flag high (1) and low (-1) volatility.
+        atr = self.feature("atr", self._atr, window=self.window)
+        return compare_votes(atr["ATR"], atr["ATR_mean"])
+
+    def stream(self) -> streaming.StreamingATR:
+        return streaming.StreamingATR(self.window).warm_up(self.klines)
 
 
 class OBVSignal(BaseSignal):
     def __init__(self, klines: KLines) -> None:
         super().__init__(klines)
 
-    def generate(self) -> DataFrame:
-        self.df["OBV"] = ta.volume.OnBalanceVolumeIndicator(
-            close=self.df["close"], volume=self.df["quote_asset_volume"]
-        ).on_balance_volume()
-        self.df[self.name] = (
-            self.df["OBV"].diff().apply(lambda x: 1 if x > 0 else (-1 if x < 0 else 0))
+    @property
+    def lookback(self) -> int:
+        # Votes only use the change of OBV, which is local.
+        return 1
+
+    def column_lookback(self, column: str) -> Optional[int]:
+        # OBV itself is a running total from the first candle.
+        return None if column == "OBV" else self.lookback
+
+    def indicators(self) -> Dict[str, np.ndarray]:
+        obv = self.feature(
+            "obv",
+            lambda df: ta.volume.OnBalanceVolumeIndicator(
+                close=df["close"], volume=df["quote_asset_volume"]
+            ).on_balance_volume(),
         )
-        return self.df
+        return {"OBV": obv.to_numpy()}
+
+    def votes(self) -> np.ndarray:
+        obv = self.indicators()["OBV"]
+        return compare_votes(np.diff(obv, prepend=np.nan), 0)
+
+    def stream(self) -> streaming.StreamingOBV:
+        return streaming.StreamingOBV().warm_up(self.klines)
 
 
 class CMFSignal(BaseSignal):
@@ -339,18 +631,29 @@ class CMFSignal(BaseSignal):
         super().__init__(klines)
         self.window = window
 
-    def generate(self) -> DataFrame:
-        self.df["CMF"] = ta.volume.ChaikinMoneyFlowIndicator(
-            high=self.df["high"],
-            low=self.df["low"],
-            close=self.df["close"],
-            volume=self.df["quote_asset_volume"],
+    @property
+    def lookback(self) -> int:
+        return self.window
+
+    def indicators(self) -> Dict[str, np.ndarray]:
+        cmf = self.feature(
+            "cmf",
+            lambda df: ta.volume.ChaikinMoneyFlowIndicator(
+                high=df["high"],
+                low=df["low"],
+                close=df["close"],
+                volume=df["quote_asset_volume"],
+                window=self.window,
+            ).chaikin_money_flow(),
             window=self.window,
-        ).chaikin_money_flow()
-        self.df[self.name] = 0
-        self.df.loc[self.df["CMF"] > 0, self.name] = 1
-        self.df.loc[self.df["CMF"] < 0, self.name] = -1
-        return self.df
+        )
+        return {"CMF": cmf.to_numpy()}
+
+    def votes(self) -> np.ndarray:
+        return compare_votes(self.indicators()["CMF"], 0)
+
+    def stream(self) -> streaming.StreamingCMF:
+        return streaming.StreamingCMF(self.window).warm_up(self.klines)
 
 
 class MFISignal(BaseSignal):
@@ -358,15 +661,27 @@ class MFISignal(BaseSignal):
         super().__init__(klines)
         self.window = window
 
-    def generate(self) -> DataFrame:
-        self.df["MFI"] = ta.volume.MFIIndicator(
-            high=self.df["high"],
-            low=self.df["low"],
-            close=self.df["close"],
-            volume=self.df["quote_asset_volume"],
+    @property
+    def lookback(self) -> int:
+        return self.window + 1
+
+    def indicators(self) -> Dict[str, np.ndarray]:
+        mfi = self.feature(
+            "mfi",
+            lambda df: ta.volume.MFIIndicator(
+                high=df["high"],
+                low=df["low"],
+                close=df["close"],
+                volume=df["quote_asset_volume"],
+                window=self.window,
+            ).money_flow_index(),
             window=self.window,
-        ).money_flow_index()
-        self.df[self.name] = 0
-        self.df.loc[self.df["MFI"] < 20, self.name] = 1
-        self.df.loc[self.df["MFI"] > 80, self.name] = -1
-        return self.df
+        )
+        return {"MFI": mfi.to_numpy()}
+
+    def votes(self) -> np.ndarray:
+        mfi = self.indicators()["MFI"]
+        return select_votes(mfi < 20, mfi > 80)
+
+    def stream(self) -> streaming.StreamingMFI:
+        return streaming.StreamingMFI(self.window).warm_up(self.klines)
@@ -1,12 +1,23 @@
+import os
 from abc import ABC
-from typing import List, Literal
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
 
-from pandas import DataFrame
+import numpy as np
+from pandas import DataFrame, Index
 import signals
+from backtest import BacktestResult, run_backtest
 from data_classes import KLines
+from enums import TradeAction
+from fill_model import FillModel
+from instrumentation import count, timed
+from shared_klines import SharedKLines, init_worker, worker_klines
+from trade_log import TradeLog, to_milliseconds
 
 
 class BaseStrategy(ABC):
+    vectorized: bool = False
+
     def __init__(
         self,
         klines: KLines,
@@ -14,16 +25,38 @@ class BaseStrategy(ABC):
         allow_short: bool = False,
     ) -> None:
         self.klines: KLines = klines
-        self.df: DataFrame = klines.to_dataframe()
+        self.df: DataFrame = klines.features.frame().copy(deep=False)
         self.balance: float = initial_balance
         self.allow_short: bool = allow_short
         self.long_position: int = 0
         self.short_position: int = 0
-        self.trade_log: list = []
-        self.signal_df: DataFrame = None
+        self.trade_log: TradeLog = TradeLog()
         self.signal: signals.BaseSignal = None
+        self.backtest_result: Optional[BacktestResult] = None
+        # Fees, slippage and stops for backtests; None fills at the close.
+        self.fill_model: Optional[FillModel] = None
+        self._signal_df: Optional[DataFrame] = None
+
+    @property
+    def signal_df(self) -> DataFrame:
+        """The signal's ``generate`` frame, built on first use."""
+        if self._signal_df is None:
+            self._signal_df = self.signal.generate()
+        return self._signal_df
+
+    @signal_df.setter
+    def signal_df(self, signal_df: DataFrame) -> None:
+        self._signal_df = signal_df
+
+    @timed("strategy.apply_strategy", per_class=True)
+    def apply_strategy(self, vectorized: Optional[bool] = None) -> None:
+        # Only the vectorized backtest models fills.
+        if self.fill_model is not None or (
+            vectorized if vectorized is not None else self.vectorized
+        ):
+            self.apply_vectorized_strategy()
+            return
 
-    def apply_strategy(self) -> None:
         for _, row in self.signal_df.iterrows():
             if row[self.signal.name] == 1:
                 if self.short_position > 0:
@@ -35,12 +68,57 @@ class BaseStrategy(ABC):
                 elif self.allow_short:
                     self.sell(row["close"], row.name)
 
+    def apply_vectorized_strategy(self) -> BacktestResult:
+        return self._backtest(
+            self.signal_df[self.signal.name].to_numpy(), self.signal_df
+        )
+
+    @timed("strategy.backtest", per_class=True)
+    def _backtest(self, signal: np.ndarray, frame: DataFrame) -> BacktestResult:
+        result = run_backtest(
+            signal=signal,
+            close=frame["close"].to_numpy(),
+            initial_balance=self.balance,
+            allow_short=self.allow_short,
+            long_position=self.long_position,
+            short_position=self.short_position,
+            fill_model=self.fill_model,
+            open_=frame["open"].to_numpy(),
+            high=frame["high"].to_numpy(),
+            low=frame["low"].to_numpy(),
+        )
+        self._record(result, frame.index)
+        return result
+
+    def _record(self, result: BacktestResult, index: Index) -> None:
+        """Log the trades of a backtest over ``index`` and carry its end state."""
+        timestamps = index.values[result.trade_index].astype("datetime64[ms]")
+        self.trade_log.extend(
+            timestamps.view(np.int64),
+            result.action,
+            result.price,
+            result.position,
+            result.balance,
+        )
+
+        count("strategy.trades", result.trade_count)
+        if result.trade_count:
+            self.balance = float(result.cash[-1])
+            self.long_position = float(result.long_position[-1])
+            self.short_position = float(result.short_position[-1])
+
+        self.backtest_result = result
+
     def buy(self, price, timestamp) -> None:
         if self.long_position == 0:
             self.long_position = self.balance / price
             self.balance = 0
             self.trade_log.append(
-                (timestamp, "BUY", price, self.long_position, self.balance)
+                to_milliseconds(timestamp),
+                TradeAction.BUY.value,
+                price,
+                self.long_position,
+                self.balance,
             )
 
     def sell(self, price, timestamp) -> None:
@@ -48,26 +126,35 @@ class BaseStrategy(ABC):
             self.balance = self.long_position * price
             self.long_position = 0
             self.trade_log.append(
-                (timestamp, "SELL", price, self.long_position, self.balance)
+                to_milliseconds(timestamp),
+                TradeAction.SELL.value,
+                price,
+                self.long_position,
+                self.balance,
             )
         elif self.allow_short and self.short_position == 0:
             self.short_position = self.balance / price
             self.balance = 0
             self.trade_log.append(
-                (timestamp, "SHORT", price, self.short_position, self.balance)
+                to_milliseconds(timestamp),
+                TradeAction.SHORT.value,
+                price,
+                self.short_position,
+                self.balance,
             )
         elif self.short_position > 0:
             self.balance = self.short_position * price
             self.short_position = 0
             self.trade_log.append(
-                (timestamp, "COVER", price, self.short_position, self.balance)
+                to_milliseconds(timestamp),
+                TradeAction.COVER.value,
+                price,
+                self.short_position,
+                self.balance,
             )
 
     def get_trade_log(self) -> DataFrame:
-        return DataFrame(
-            self.trade_log,
-            columns=["timestamp", "action", "price", "position", "balance"],
-        )
+        return self.trade_log.to_dataframe()
 
 
 class CombinedStrategy(BaseStrategy):
@@ -77,46 +164,139 @@ class CombinedStrategy(BaseStrategy):
         initial_balance: float,
         strategies: List[BaseStrategy],
         allow_short: bool = False,
+        weights: Optional[Sequence[float]] = None,
+        quorum: float = 0.0,
+        n_jobs: Optional[int] = 1,
     ) -> None:
         super().__init__(klines, initial_balance, allow_short)
         self.strategies = strategies
+        self.weights = weights
+        self.quorum = quorum
+        self.n_jobs = n_jobs
 
+    @timed("strategy.apply_combined_strategy")
     def apply_combined_strategy(self) -> None:
-        combined_signals = DataFrame(index=self.df.index)
-
+        combined = self.combine_votes(self.vote_matrix(), self.weights, self.quorum)
+        self._backtest(combined, self.df)
+
+    def vote_matrix(self) -> np.ndarray:
+        """Run every member and stack its BUY (1) / SELL (-1) trades per bar.
+
+        With ``n_jobs`` other than 1 (``None`` uses every CPU) the members are
+        backtested on a process pool instead, see ``_run_members``.
+        """
+        n_jobs = self.n_jobs or os.cpu_count() or 1
+        if n_jobs == 1 or len(self.strategies) <= 1:
+            results = [
+                strategy.apply_vectorized_strategy() for strategy in self.strategies
+            ]
+        else:
+            results = self._run_members(n_jobs)
+
+        votes = np.zeros((len(self.strategies), len(self.df)), dtype=np.int8)
+        for row, strategy, result in zip(votes, self.strategies, results):
+            bars = self.df.index.get_indexer(strategy.df.index[result.trade_index])
+            found = bars >= 0
+            row[bars[found & (result.action == TradeAction.BUY.value)]] = 1
+            row[bars[found & (result.action == TradeAction.SELL.value)]] = -1
+        return votes
+
+    def _run_members(self, n_jobs: int) -> List[BacktestResult]:
+        """Backtest the members in worker processes, in member order.
+
+        The candles are copied once into shared memory and mapped by every
+        worker, which rebuilds each member from its class, signal parameters
+        and current balance and positions. Results come back in member order
+        and are recorded on the members exactly as a serial run would, so the
+        combined trade log is identical.
+        """
+        tasks = []
         for strategy in self.strategies:
-            strategy.apply_strategy()
-            signals = strategy.get_trade_log()
-            signals = signals.set_index("timestamp")[["action"]]
-            signals.columns = [type(strategy).__name__]
-            combined_signals = combined_signals.join(signals, how="outer")
-
-        combined_signals["combined_signal"] = combined_signals.apply(
-            self.combine_signals, axis=1
-        )
+            if strategy.klines is not self.klines:
+                raise ValueError("Parallel members must share the combined KLines")
+            tasks.append(
+                (
+                    type(strategy),
+                    strategy.signal.params,
+                    strategy.balance,
+                    strategy.allow_short,
+                    strategy.long_position,
+                    strategy.short_position,
+                    strategy.fill_model,
+                )
+            )
 
-        for index, row in combined_signals.iterrows():
-            if row["combined_signal"] == "BUY":
-                if self.short_position > 0:
-                    self.sell(self.df.loc[index, "close"], index)
-                self.buy(self.df.loc[index, "close"], index)
-            elif row["combined_signal"] == "SELL":
-                if self.long_position > 0:
-                    self.sell(self.df.loc[index, "close"], index)
-                elif self.allow_short:
-                    self.sell(self.df.loc[index, "close"], index)
+        with SharedKLines(self.klines) as shared:
+            with ProcessPoolExecutor(
+                max_workers=min(n_jobs, len(tasks)),
+                initializer=init_worker,
+                initargs=(shared.spec,),
+            ) as executor:
+                results = list(executor.map(_backtest_member, tasks))
+
+        for strategy, result in zip(self.strategies, results):
+            strategy._record(result, strategy.df.index)
+        return results
 
     @staticmethod
-    def combine_signals(row) -> Literal["BUY", "SELL", "HOLD"]:
-        buy_count: int = (row == "BUY").sum()
-        sell_count: int = (row == "SELL").sum()
-
-        if buy_count > sell_count:
-            return "BUY"
-        elif sell_count > buy_count:
-            return "SELL"
-        else:
-            return "HOLD"
+    def combine_votes(
+        votes: np.ndarray,
+        weights: Optional[Sequence[float]] = None,
+        quorum: float = 0.0,
+    ) -> np.ndarray:
+        """Weighted majority vote over a (members x bars) int8 matrix.
+
+        A side wins a bar when its weight is strictly greater than the other
+        side's and at least ``quorum`` times the total member weight; other
+        bars (ties included) are 0. With unit weights and no quorum the side
+        with more votes wins.
+        """
+        weights = np.ones(len(votes)) if weights is None else np.asarray(weights)
+        if weights.shape != (votes.shape[0],):
+            raise ValueError(
+                f"Expected {votes.shape[0]} weights, one per member, "
+                f"got {weights.size}"
+            )
+        buy = weights @ (votes == 1)
+        sell = weights @ (votes == -1)
+        required = quorum * weights.sum()
+        return np.select(
+            [(buy > sell) & (buy >= required), (sell > buy) & (sell >= required)],
+            [1, -1],
+            0,
+        ).astype(np.int8)
+
+
+def _backtest_member(
+    task: Tuple[
+        Type[BaseStrategy],
+        Dict[str, Any],
+        float,
+        bool,
+        float,
+        float,
+        Optional[FillModel],
+    ],
+) -> BacktestResult:
+    (
+        strategy_class,
+        params,
+        balance,
+        allow_short,
+        long_position,
+        short_position,
+        fill_model,
+    ) = task
+    strategy = strategy_class(
+        klines=worker_klines(),
+        initial_balance=balance,
+        allow_short=allow_short,
+        **params,
+    )
+    strategy.long_position = long_position
+    strategy.short_position = short_position
+    strategy.fill_model = fill_model
+    return strategy.apply_vectorized_strategy()
 
 
 class RSIStrategy(BaseStrategy):
@@ -129,7 +309,6 @@ class RSIStrategy(BaseStrategy):
     ) -> None:
         super().__init__(klines, initial_balance, allow_short)
         self.signal = signals.RSISignal(klines, rsi_period)
-        self.signal_df = self.signal.generate()
 
 
 class MACDStrategy(BaseStrategy):
@@ -144,7 +323,6 @@ class MACDStrategy(BaseStrategy):
     ) -> None:
         super().__init__(klines, initial_balance, allow_short)
         self.signal = signals.MACDSignal(klines, macd_fast, macd_slow, macd_signal)
-        self.signal_df = self.signal.generate()
 
 
 class StochasticStrategy(BaseStrategy):
@@ -158,7 +336,6 @@ class StochasticStrategy(BaseStrategy):
     ) -> None:
         super().__init__(klines, initial_balance, allow_short)
         self.signal = signals.StochasticSignal(klines, k_window, d_window)
-        self.signal_df = self.signal.generate()
 
 
 class TSIStrategy(BaseStrategy):
@@ -172,7 +349,6 @@ class TSIStrategy(BaseStrategy):
     ) -> None:
         super().__init__(klines, initial_balance, allow_short)
         self.signal = signals.TSISignal(klines, window_slow, window_fast)
-        self.signal_df = self.signal.generate()
 
 
 class UltimateOscillatorStrategy(BaseStrategy):
@@ -189,7 +365,6 @@ class UltimateOscillatorStrategy(BaseStrategy):
         self.signal = signals.UltimateOscillatorSignal(
             klines, window1, window2, window3
         )
-        self.signal_df = self.signal.generate()
 
 
 class WilliamsRStrategy(BaseStrategy):
@@ -202,7 +377,6 @@ class WilliamsRStrategy(BaseStrategy):
     ) -> None:
         super().__init__(klines, initial_balance, allow_short)
         self.signal = signals.WilliamsRSignal(klines, lbp)
-        self.signal_df = self.signal.generate()
 
 
 class AwesomeOscillatorStrategy(BaseStrategy):
@@ -216,7 +390,6 @@ class AwesomeOscillatorStrategy(BaseStrategy):
     ) -> None:
         super().__init__(klines, initial_balance, allow_short)
         self.signal = signals.AwesomeOscillatorSignal(klines, window1, window2)
-        self.signal_df = self.signal.generate()
 
 
 class ADXStrategy(BaseStrategy):
@@ -229,7 +402,6 @@ class ADXStrategy(BaseStrategy):
     ) -> None:
         super().__init__(klines, initial_balance, allow_short)
         self.signal = signals.ADXSignal(klines, window)
-        self.signal_df = self.signal.generate()
 
 
 class AroonStrategy(BaseStrategy):
@@ -242,7 +414,6 @@ class AroonStrategy(BaseStrategy):
     ) -> None:
         super().__init__(klines, initial_balance, allow_short)
         self.signal = signals.AroonSignal(klines, window)
-        self.signal_df = self.signal.generate()
 
 
 class CCIStrategy(BaseStrategy):
@@ -255,7 +426,6 @@ class CCIStrategy(BaseStrategy):
     ) -> None:
         super().__init__(klines, initial_balance, allow_short)
         self.signal = signals.CCISignal(klines, window)
-        self.signal_df = self.signal.generate()
 
 
 class BollingerBandsStrategy(BaseStrategy):
@@ -269,7 +439,6 @@ class BollingerBandsStrategy(BaseStrategy):
     ) -> None:
         super().__init__(klines, initial_balance, allow_short)
         self.signal = signals.BollingerBandsSignal(klines, window, window_dev)
-        self.signal_df = self.signal.generate()
 
 
 class KeltnerChannelStrategy(BaseStrategy):
@@ -283,7 +452,6 @@ class KeltnerChannelStrategy(BaseStrategy):
     ) -> None:
         super().__init__(klines, initial_balance, allow_short)
         self.signal = signals.KeltnerChannelSignal(klines, window, window_atr)
-        self.signal_df = self.signal.generate()
 
 
 class DonchianChannelStrategy(BaseStrategy):
@@ -296,7 +464,6 @@ class DonchianChannelStrategy(BaseStrategy):
     ) -> None:
         super().__init__(klines, initial_balance, allow_short)
         self.signal = signals.DonchianChannelSignal(klines, window)
-        self.signal_df = self.signal.generate()
 
 
 class ATRStrategy(BaseStrategy):
@@ -309,7 +476,6 @@ class ATRStrategy(BaseStrategy):
     ) -> None:
         super().__init__(klines, initial_balance, allow_short)
         self.signal = signals.ATRSignal(klines, window)
-        self.signal_df = self.signal.generate()
 
 
 class OBVStrategy(BaseStrategy):
@@ -321,7 +487,6 @@ class OBVStrategy(BaseStrategy):
     ) -> None:
         super().__init__(klines, initial_balance, allow_short)
         self.signal = signals.OBVSignal(klines)
-        self.signal_df = self.signal.generate()
 
 
 class CMFStrategy(BaseStrategy):
@@ -334,7 +499,6 @@ class CMFStrategy(BaseStrategy):
     ) -> None:
         super().__init__(klines, initial_balance, allow_short)
         self.signal = signals.CMFSignal(klines, window)
-        self.signal_df = self.signal.generate()
 
 
 class MFIStrategy(BaseStrategy):
@@ -347,4 +511,3 @@ class MFIStrategy(BaseStrategy):
     ) -> None:
         super().__init__(klines, initial_balance, allow_short)
         self.signal = signals.MFISignal(klines, window)
-        self.signal_df = self.signal.generate()
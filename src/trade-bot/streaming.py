@@ -0,0 +1,527 @@
+import math
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Deque, Dict, Tuple
+
+import numpy as np
+
+from data_classes import KLine, KLines
+from rolling import RollingExtreme, RollingStd, RollingSum
+
+
+NAN = math.nan
+
+IndicatorUpdate = Tuple[Dict[str, float], int]
+
+
+def _divide(numerator: float, denominator: float) -> float:
+    # Float division with NumPy semantics, so x/0 gives inf or nan like the
+    # batch indicators instead of raising.
+    if denominator == 0:
+        if numerator == 0 or numerator != numerator:
+            return NAN
+        return math.copysign(math.inf, numerator) * math.copysign(1.0, denominator)
+    return numerator / denominator
+
+
+def _vote(value: float, buy_above: float, sell_below: float) -> int:
+    if value > buy_above:
+        return 1
+    if value < sell_below:
+        return -1
+    return 0
+
+
+def _band_vote(close: float, upper: float, lower: float) -> int:
+    if close < lower:
+        return 1
+    if close > upper:
+        return -1
+    return 0
+
+
+class _EWMA:
+    """Exponentially weighted mean matching pandas ``ewm(adjust=False).mean()``."""
+
+    def __init__(self, com: float, min_periods: int) -> None:
+        self.alpha = 1.0 / (1.0 + com)
+        self.old_weight_factor = 1.0 - self.alpha
+        self.min_periods = min_periods
+        self.weighted = NAN
+        self.old_weight = 1.0
+        self.observations = 0
+
+    @classmethod
+    def from_span(cls, span: float, min_periods: int) -> "_EWMA":
+        return cls((span - 1) / 2.0, min_periods)
+
+    @classmethod
+    def from_alpha(cls, alpha: float, min_periods: int) -> "_EWMA":
+        return cls((1.0 - alpha) / alpha, min_periods)
+
+    def update(self, value: float) -> float:
+        observed = value == value
+        self.observations += observed
+        if self.weighted == self.weighted:
+            self.old_weight *= self.old_weight_factor
+            if observed:
+                if self.weighted != value:
+                    self.weighted = (
+                        self.old_weight * self.weighted + self.alpha * value
+                    ) / (self.old_weight + self.alpha)
+                self.old_weight = 1.0
+        elif observed:
+            self.weighted = value
+        return self.weighted if self.observations >= self.min_periods else NAN
+
+
+class StreamingIndicator(ABC):
+    """O(1)-state counterpart of a signal in ``signals.py``.
+
+    ``update`` takes the next closed KLine and returns the indicator columns
+    (named as in the batch signal frame) together with the signal vote.
+    """
+
+    signal_name: str = ""
+
+    def update(self, kline: KLine) -> IndicatorUpdate:
+        return self._update(
+            kline.high, kline.low, kline.close, kline.quote_asset_volume
+        )
+
+    def warm_up(self, klines: KLines) -> "StreamingIndicator":
+        for high, low, close, volume in zip(
+            klines.high.tolist(),
+            klines.low.tolist(),
+            klines.close.tolist(),
+            klines.quote_asset_volume.tolist(),
+        ):
+            self._update(high, low, close, volume)
+        return self
+
+    @abstractmethod
+    def _update(
+        self, high: float, low: float, close: float, volume: float
+    ) -> IndicatorUpdate:
+        pass
+
+
+class StreamingRSI(StreamingIndicator):
+    signal_name = "RSISignal"
+
+    def __init__(self, rsi_period: int = 14) -> None:
+        self.rsi_period = rsi_period
+        self._previous_close = NAN
+        self._up = _EWMA.from_alpha(1 / rsi_period, rsi_period)
+        self._down = _EWMA.from_alpha(1 / rsi_period, rsi_period)
+
+    def _update(self, high, low, close, volume) -> IndicatorUpdate:
+        diff = close - self._previous_close
+        self._previous_close = close
+        up = self._up.update(diff if diff > 0 else 0.0)
+        down = self._down.update(-diff if diff < 0 else 0.0)
+        rsi = 100.0 if down == 0 else 100 - (100 / (1 + _divide(up, down)))
+        return {"RSI": rsi}, _vote(-rsi, -30, -70)
+
+
+class StreamingMACD(StreamingIndicator):
+    signal_name = "MACDSignal"
+
+    def __init__(
+        self, macd_fast: int = 12, macd_slow: int = 26, macd_signal: int = 9
+    ) -> None:
+        self.macd_fast = macd_fast
+        self.macd_slow = macd_slow
+        self.macd_signal = macd_signal
+        self._fast = _EWMA.from_span(macd_fast, macd_fast)
+        self._slow = _EWMA.from_span(macd_slow, macd_slow)
+        self._signal = _EWMA.from_span(macd_signal, macd_signal)
+
+    def _update(self, high, low, close, volume) -> IndicatorUpdate:
+        macd = self._fast.update(close) - self._slow.update(close)
+        signal = self._signal.update(macd)
+        values = {"MACD": macd, "MACD_signal": signal, "MACD_diff": macd - signal}
+        return values, _vote(macd - signal, 0, 0)
+
+
+class StreamingStochastic(StreamingIndicator):
+    signal_name = "StochasticSignal"
+
+    def __init__(self, k_window: int = 14, d_window: int = 3) -> None:
+        self.k_window = k_window
+        self.d_window = d_window
+        self._highest = RollingExtreme(k_window, maximum=True)
+        self._lowest = RollingExtreme(k_window, maximum=False)
+        self._k = RollingSum(d_window)
+
+    def _update(self, high, low, close, volume) -> IndicatorUpdate:
+        highest, _ = self._highest.update(high)
+        lowest, _ = self._lowest.update(low)
+        stoch_k = _divide(100 * (close - lowest), highest - lowest)
+        self._k.update(stoch_k)
+        stoch_d = self._k.mean()
+        values = {"Stoch_k": stoch_k, "Stoch_d": stoch_d}
+        return values, _vote(stoch_k - stoch_d, 0, 0)
+
+
+class StreamingTSI(StreamingIndicator):
+    signal_name = "TSISignal"
+
+    def __init__(self, window_slow: int = 25, window_fast: int = 13) -> None:
+        self.window_slow = window_slow
+        self.window_fast = window_fast
+        self._previous_close = NAN
+        self._slow = _EWMA.from_span(window_slow, window_slow)
+        self._fast = _EWMA.from_span(window_fast, window_fast)
+        self._slow_abs = _EWMA.from_span(window_slow, window_slow)
+        self._fast_abs = _EWMA.from_span(window_fast, window_fast)
+
+    def _update(self, high, low, close, volume) -> IndicatorUpdate:
+        diff = close - self._previous_close
+        self._previous_close = close
+        smoothed = self._fast.update(self._slow.update(diff))
+        smoothed_abs = self._fast_abs.update(self._slow_abs.update(abs(diff)))
+        tsi = _divide(smoothed, smoothed_abs) * 100
+        return {"TSI": tsi}, _vote(tsi, 0, 0)
+
+
+class StreamingUltimateOscillator(StreamingIndicator):
+    signal_name = "UltimateOscillatorSignal"
+
+    def __init__(self, window1: int = 7, window2: int = 14, window3: int = 28) -> None:
+        self.window1 = window1
+        self.window2 = window2
+        self.window3 = window3
+        self._previous_close = NAN
+        self._pressure = [RollingSum(window) for window in (window1, window2, window3)]
+        self._range = [RollingSum(window) for window in (window1, window2, window3)]
+
+    def _update(self, high, low, close, volume) -> IndicatorUpdate:
+        previous = self._previous_close
+        self._previous_close = close
+        true_range = high - low
+        if previous == previous:
+            true_range = max(true_range, abs(high - previous), abs(low - previous))
+            buying_pressure = close - min(low, previous)
+        else:
+            buying_pressure = NAN
+
+        averages = [
+            _divide(pressure.update(buying_pressure), range_.update(true_range))
+            for pressure, range_ in zip(self._pressure, self._range)
+        ]
+        ultimate = (
+            100.0 * ((4.0 * averages[0]) + (2.0 * averages[1]) + (1.0 * averages[2]))
+        ) / (4.0 + 2.0 + 1.0)
+        return {"Ultimate_Osc": ultimate}, _vote(ultimate, 50, 50)
+
+
+class StreamingWilliamsR(StreamingIndicator):
+    signal_name = "WilliamsRSignal"
+
+    def __init__(self, lbp: int = 14) -> None:
+        self.lbp = lbp
+        self._highest = RollingExtreme(lbp, maximum=True)
+        self._lowest = RollingExtreme(lbp, maximum=False)
+
+    def _update(self, high, low, close, volume) -> IndicatorUpdate:
+        highest, _ = self._highest.update(high)
+        lowest, _ = self._lowest.update(low)
+        williams_r = _divide(-100 * (highest - close), highest - lowest)
+        return {"WilliamsR": williams_r}, _vote(williams_r, -20, -80)
+
+
+class StreamingAwesomeOscillator(StreamingIndicator):
+    signal_name = "AwesomeOscillatorSignal"
+
+    def __init__(self, window1: int = 5, window2: int = 34) -> None:
+        self.window1 = window1
+        self.window2 = window2
+        self._short = RollingSum(window1)
+        self._long = RollingSum(window2)
+
+    def _update(self, high, low, close, volume) -> IndicatorUpdate:
+        median_price = 0.5 * (high + low)
+        self._short.update(median_price)
+        self._long.update(median_price)
+        awesome = self._short.mean() - self._long.mean()
+        return {"Awesome_Osc": awesome}, _vote(awesome, 0, 0)
+
+
+class StreamingADX(StreamingIndicator):
+    """Wilder-smoothed ADX reproducing ``ta.trend.ADXIndicator`` bar for bar.
+
+    Like ``ta``, +DI/-DI stay at 0 until ``window + 1`` bars have been seen
+    and ADX stays at 0 until ``2 * window`` bars have been seen.
+    """
+
+    signal_name = "ADXSignal"
+
+    def __init__(self, window: int = 14) -> None:
+        self.window = window
+        self._count = 0
+        self._previous = (NAN, NAN, NAN)
+        self._true_range = 0.0
+        self._positive = 0.0
+        self._negative = 0.0
+        self._directional_index: list = []
+        self._adx = 0.0
+
+    def _update(self, high, low, close, volume) -> IndicatorUpdate:
+        previous_high, previous_low, previous_close = self._previous
+        self._previous = (high, low, close)
+        count = self._count
+        self._count += 1
+        window = self.window
+
+        if count == 0:
+            return {"ADX": 0.0, "ADX_pos": 0.0, "ADX_neg": 0.0}, 0
+
+        true_range = max(high, previous_close) - min(low, previous_close)
+        diff_up = high - previous_high
+        diff_down = previous_low - low
+        positive = diff_up if diff_up > diff_down and diff_up > 0 else 0.0
+        negative = diff_down if diff_down > diff_up and diff_down > 0 else 0.0
+
+        if count <= window:
+            self._true_range += true_range
+            self._positive += positive
+            self._negative += negative
+        else:
+            self._true_range = (
+                self._true_range - (self._true_range / float(window)) + true_range
+            )
+            self._positive = (
+                self._positive - (self._positive / float(window)) + positive
+            )
+            self._negative = (
+                self._negative - (self._negative / float(window)) + negative
+            )
+
+        if count < window:
+            return {"ADX": 0.0, "ADX_pos": 0.0, "ADX_neg": 0.0}, 0
+
+        if self._true_range != 0:
+            adx_pos = 100 * (self._positive / self._true_range)
+            adx_neg = 100 * (self._negative / self._true_range)
+        else:
+            adx_pos = adx_neg = 0.0
+
+        if adx_pos + adx_neg != 0:
+            directional_index = 100 * abs((adx_pos - adx_neg) / (adx_pos + adx_neg))
+        else:
+            directional_index = 0.0
+
+        if count < 2 * window - 1:
+            self._directional_index.append(directional_index)
+        elif count == 2 * window - 1:
+            self._directional_index.append(directional_index)
+            self._adx = float(np.mean(self._directional_index))
+            self._directional_index = []
+        else:
+            self._adx = ((self._adx * (window - 1)) + directional_index) / float(window)
+
+        if count == window:
+            adx_pos = adx_neg = 0.0
+
+        values = {"ADX": self._adx, "ADX_pos": adx_pos, "ADX_neg": adx_neg}
+        return values, _vote(adx_pos - adx_neg, 0, 0)
+
+
+class StreamingAroon(StreamingIndicator):
+    signal_name = "AroonSignal"
+
+    def __init__(self, window: int = 25) -> None:
+        self.window = window
+        self._highest = RollingExtreme(window + 1, maximum=True)
+        self._lowest = RollingExtreme(window + 1, maximum=False)
+
+    def _update(self, high, low, close, volume) -> IndicatorUpdate:
+        _, high_position = self._highest.update(high)
+        _, low_position = self._lowest.update(low)
+        if high_position < 0:
+            aroon_up = aroon_down = NAN
+        else:
+            aroon_up = float(high_position) / self.window * 100
+            aroon_down = float(low_position) / self.window * 100
+        values = {"Aroon_Up": aroon_up, "Aroon_Down": aroon_down}
+        return values, _vote(aroon_up - aroon_down, 0, 0)
+
+
+class StreamingCCI(StreamingIndicator):
+    """CCI over a rolling window.
+
+    The mean absolute deviation has to be taken around the current window
+    mean, so each update costs O(window) rather than O(1).
+    """
+
+    signal_name = "CCISignal"
+
+    def __init__(self, window: int = 20) -> None:
+        self.window = window
+        self._typical_price = RollingSum(window)
+        self._values: Deque[float] = deque(maxlen=window)
+
+    def _update(self, high, low, close, volume) -> IndicatorUpdate:
+        typical_price = (high + low + close) / 3.0
+        self._typical_price.update(typical_price)
+        self._values.append(typical_price)
+        if len(self._values) < self.window:
+            cci = NAN
+        else:
+            values = np.fromiter(self._values, dtype=np.float64, count=self.window)
+            deviation = np.mean(np.abs(values - np.mean(values)))
+            cci = _divide(typical_price - self._typical_price.mean(), 0.015 * deviation)
+        return {"CCI": cci}, _vote(cci, 100, -100)
+
+
+class StreamingBollingerBands(StreamingIndicator):
+    signal_name = "BollingerBandsSignal"
+
+    def __init__(self, window: int = 20, window_dev: int = 2) -> None:
+        self.window = window
+        self.window_dev = window_dev
+        self._mean = RollingSum(window)
+        self._std = RollingStd(window)
+
+    def _update(self, high, low, close, volume) -> IndicatorUpdate:
+        self._mean.update(close)
+        mean = self._mean.mean()
+        std = self._std.update(close)
+        upper = mean + self.window_dev * std
+        lower = mean - self.window_dev * std
+        values = {"BB_High": upper, "BB_Low": lower, "BB_Mid": mean}
+        return values, _band_vote(close, upper, lower)
+
+
+class StreamingKeltnerChannel(StreamingIndicator):
+    signal_name = "KeltnerChannelSignal"
+
+    def __init__(self, window: int = 20, window_atr: int = 10) -> None:
+        self.window = window
+        self.window_atr = window_atr
+        self._high = RollingSum(window, min_periods=0)
+        self._low = RollingSum(window, min_periods=0)
+
+    def _update(self, high, low, close, volume) -> IndicatorUpdate:
+        self._high.update(((4 * high) - (2 * low) + close) / 3.0)
+        self._low.update(((-2 * high) + (4 * low) + close) / 3.0)
+        upper = self._high.mean()
+        lower = self._low.mean()
+        values = {"KC_High": upper, "KC_Low": lower}
+        return values, _band_vote(close, upper, lower)
+
+
+class StreamingDonchianChannel(StreamingIndicator):
+    signal_name = "DonchianChannelSignal"
+
+    def __init__(self, window: int = 20) -> None:
+        self.window = window
+        self._highest = RollingExtreme(window, maximum=True)
+        self._lowest = RollingExtreme(window, maximum=False)
+
+    def _update(self, high, low, close, volume) -> IndicatorUpdate:
+        upper, _ = self._highest.update(high)
+        lower, _ = self._lowest.update(low)
+        values = {"Donchian_High": upper, "Donchian_Low": lower}
+        return values, _band_vote(close, upper, lower)
+
+
+class StreamingATR(StreamingIndicator):
+    """Wilder ATR reproducing ``ta.volatility.AverageTrueRange``.
+
+    ``ta`` reports 0 for the first ``window - 1`` bars, and the signal's
+    rolling mean of ATR includes those zeros, so this does the same.
+    """
+
+    signal_name = "ATRSignal"
+
+    def __init__(self, window: int = 14) -> None:
+        self.window = window
+        self._count = 0
+        self._previous_close = NAN
+        self._true_range = 0.0
+        self._atr = 0.0
+        self._atr_mean = RollingSum(window)
+
+    def _update(self, high, low, close, volume) -> IndicatorUpdate:
+        previous = self._previous_close
+        self._previous_close = close
+        true_range = high - low
+        if previous == previous:
+            true_range = max(true_range, abs(high - previous), abs(low - previous))
+
+        count = self._count
+        self._count += 1
+        if count < self.window - 1:
+            self._true_range += true_range
+        elif count == self.window - 1:
+            self._true_range += true_range
+            self._atr = self._true_range / self.window
+        else:
+            self._atr = (self._atr * (self.window - 1) + true_range) / float(
+                self.window
+            )
+
+        self._atr_mean.update(self._atr)
+        atr_mean = self._atr_mean.mean()
+        return {"ATR": self._atr}, _vote(self._atr - atr_mean, 0, 0)
+
+
+class StreamingOBV(StreamingIndicator):
+    signal_name = "OBVSignal"
+
+    def __init__(self) -> None:
+        self._previous_close = NAN
+        self._obv = NAN
+
+    def _update(self, high, low, close, volume) -> IndicatorUpdate:
+        flow = -volume if close < self._previous_close else volume
+        self._previous_close = close
+        previous_obv = self._obv
+        self._obv = flow if previous_obv != previous_obv else previous_obv + flow
+        return {"OBV": self._obv}, _vote(self._obv - previous_obv, 0, 0)
+
+
+class StreamingCMF(StreamingIndicator):
+    signal_name = "CMFSignal"
+
+    def __init__(self, window: int = 20) -> None:
+        self.window = window
+        self._flow = RollingSum(window)
+        self._volume = RollingSum(window)
+
+    def _update(self, high, low, close, volume) -> IndicatorUpdate:
+        multiplier = _divide((close - low) - (high - close), high - low)
+        if multiplier != multiplier:
+            multiplier = 0.0
+        cmf = _divide(
+            self._flow.update(multiplier * volume), self._volume.update(volume)
+        )
+        return {"CMF": cmf}, _vote(cmf, 0, 0)
+
+
+class StreamingMFI(StreamingIndicator):
+    signal_name = "MFISignal"
+
+    def __init__(self, window: int = 14) -> None:
+        self.window = window
+        self._previous_typical_price = NAN
+        self._positive = RollingSum(window)
+        self._negative = RollingSum(window)
+
+    def _update(self, high, low, close, volume) -> IndicatorUpdate:
+        typical_price = (high + low + close) / 3.0
+        previous = self._previous_typical_price
+        self._previous_typical_price = typical_price
+        if typical_price > previous:
+            direction = 1
+        elif typical_price < previous:
+            direction = -1
+        else:
+            direction = 0
+        money_flow = typical_price * volume * direction
+        positive = self._positive.update(money_flow if money_flow >= 0.0 else 0.0)
+        negative = abs(self._negative.update(money_flow if money_flow < 0.0 else 0.0))
+        mfi = 100 - (100 / (1 + _divide(positive, negative)))
+        return {"MFI": mfi}, _vote(-mfi, -20, -80)
@@ -0,0 +1,139 @@
+from typing import Any, Dict, List, Tuple, Union
+
+import numpy as np
+from pandas import Categorical, DataFrame, Timestamp
+
+from enums import TradeAction
+
+
+TRADE_LOG_COLUMNS = {
+    "timestamp": np.int64,
+    "action": np.int8,
+    "price": np.float64,
+    "position": np.float64,
+    "balance": np.float64,
+}
+
+ACTION_NAMES = [action.name for action in sorted(TradeAction, key=lambda a: a.value)]
+
+# Rows appended one at a time are staged in per-column lists and copied to the
+# typed columns in chunks of this size: a list append is cheaper than a numpy
+# scalar store, and the staging lists stay small.
+APPEND_CHUNK_SIZE = 1024
+
+
+def to_milliseconds(timestamp: Union[int, np.integer, Any]) -> int:
+    """Epoch milliseconds of an int, datetime64, datetime or pandas Timestamp."""
+    if isinstance(timestamp, (int, np.integer)):
+        return int(timestamp)
+    return Timestamp(timestamp).value // 1_000_000
+
+
+class TradeLog:
+    """Append-only trade log stored as growable typed columns.
+
+    Times are epoch milliseconds and actions ``TradeAction`` values. Columns
+    double in size when full and single appends are staged in chunks of
+    ``APPEND_CHUNK_SIZE``, so an append is amortized O(1) and only a bounded
+    number of rows ever live as Python objects. Rows are never rewritten,
+    which makes the arrays handed out by ``columns`` and ``to_dataframe``
+    stable zero-copy views.
+    """
+
+    def __init__(self, capacity: int = 64) -> None:
+        capacity = max(capacity, 1)
+        self._timestamp = np.empty(capacity, dtype=np.int64)
+        self._action = np.empty(capacity, dtype=np.int8)
+        self._price = np.empty(capacity, dtype=np.float64)
+        self._position = np.empty(capacity, dtype=np.float64)
+        self._balance = np.empty(capacity, dtype=np.float64)
+        self._length = 0
+        self._pending: Tuple[List[Any], ...] = ([], [], [], [], [])
+
+    def __len__(self) -> int:
+        return self._length + len(self._pending[0])
+
+    @property
+    def capacity(self) -> int:
+        return len(self._timestamp)
+
+    def _reserve(self, length: int) -> None:
+        capacity = self.capacity
+        if length <= capacity:
+            return
+        while capacity < length:
+            capacity *= 2
+        for name in TRADE_LOG_COLUMNS:
+            old = getattr(self, f"_{name}")
+            new = np.empty(capacity, dtype=old.dtype)
+            new[: self._length] = old[: self._length]
+            setattr(self, f"_{name}", new)
+
+    def append(
+        self,
+        timestamp: int,
+        action: int,
+        price: float,
+        position: float,
+        balance: float,
+    ) -> None:
+        timestamps, actions, prices, positions, balances = self._pending
+        timestamps.append(timestamp)
+        actions.append(action)
+        prices.append(price)
+        positions.append(position)
+        balances.append(balance)
+        if len(timestamps) == APPEND_CHUNK_SIZE:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._pending[0]:
+            self._write(*self._pending)
+            for column in self._pending:
+                column.clear()
+
+    def _write(self, timestamp, action, price, position, balance) -> None:
+        start = self._length
+        stop = start + len(timestamp)
+        self._reserve(stop)
+        self._timestamp[start:stop] = timestamp
+        self._action[start:stop] = action
+        self._price[start:stop] = price
+        self._position[start:stop] = position
+        self._balance[start:stop] = balance
+        self._length = stop
+
+    def extend(
+        self,
+        timestamp: np.ndarray,
+        action: np.ndarray,
+        price: np.ndarray,
+        position: np.ndarray,
+        balance: np.ndarray,
+    ) -> None:
+        """Append a batch of trades given as equal-length arrays."""
+        self._flush()
+        self._write(timestamp, action, price, position, balance)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Read-only views of the logged rows, keyed like ``TRADE_LOG_COLUMNS``."""
+        self._flush()
+        columns = {}
+        for name in TRADE_LOG_COLUMNS:
+            view = getattr(self, f"_{name}")[: self._length]
+            view.flags.writeable = False
+            columns[name] = view
+        return columns
+
+    def to_dataframe(self) -> DataFrame:
+        """Trades as a DataFrame sharing memory with the log.
+
+        ``timestamp`` is a datetime64[ms] view of the stored times and
+        ``action`` a categorical over the stored codes.
+        """
+        columns = self.columns()
+        columns["timestamp"] = columns["timestamp"].view("datetime64[ms]")
+        columns["action"] = Categorical.from_codes(
+            columns["action"], categories=ACTION_NAMES
+        )
+        return DataFrame(columns, copy=False)
@@ -0,0 +1,116 @@
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+import numpy as np
+from pandas import DataFrame
+
+from backtest import run_backtest
+from data_classes import KLines
+from optimizer import ParameterSpace, grid
+from performance import max_drawdown
+from strategies import BaseStrategy
+
+
+Window = Tuple[slice, slice]
+
+
+def walk_forward_windows(
+    length: int,
+    train_size: int,
+    test_size: int,
+    step: Optional[int] = None,
+    anchored: bool = False,
+) -> List[Window]:
+    """(train, test) bar slices rolling forward by ``step`` (default test size).
+
+    With ``anchored`` every train window starts at bar 0 and grows instead of
+    rolling.
+    """
+    step = step or test_size
+    windows = []
+    train_start = 0
+    while train_start + train_size + test_size <= length:
+        train_end = train_start + train_size
+        windows.append(
+            (
+                slice(0 if anchored else train_start, train_end),
+                slice(train_end, train_end + test_size),
+            )
+        )
+        train_start += step
+    return windows
+
+
+def _evaluate(
+    signal: np.ndarray,
+    close: np.ndarray,
+    window: slice,
+    initial_balance: float,
+    allow_short: bool,
+) -> Dict[str, Any]:
+    result = run_backtest(signal[window], close[window], initial_balance, allow_short)
+    return {
+        "return": result.final_equity / initial_balance - 1,
+        "trade_count": result.trade_count,
+        "max_drawdown": max_drawdown(result.equity),
+    }
+
+
+def walk_forward(
+    strategy_class: Type[BaseStrategy],
+    klines: KLines,
+    space: ParameterSpace,
+    train_size: int,
+    test_size: int,
+    initial_balance: float,
+    allow_short: bool = False,
+    step: Optional[int] = None,
+    anchored: bool = False,
+) -> DataFrame:
+    """Pick the best parameters on each train window and score them on the next.
+
+    Each parameter set's signal is computed once over all candles, sharing
+    indicators through the KLines feature cache, so test windows start with
+    fully warmed-up indicators and no window recomputes overlapping history.
+    Every window then only runs the array backtest on slices of that signal.
+    """
+    parameter_sets = grid(space)
+    close = klines.close
+    signal_arrays = []
+    for params in parameter_sets:
+        strategy = strategy_class(
+            klines=klines,
+            initial_balance=initial_balance,
+            allow_short=allow_short,
+            **params,
+        )
+        signal_arrays.append(strategy.signal_df[strategy.signal.name].to_numpy())
+
+    open_time = klines.open_time.view("datetime64[ms]")
+    rows = []
+    for number, (train, test) in enumerate(
+        walk_forward_windows(len(klines), train_size, test_size, step, anchored)
+    ):
+        train_scores = [
+            _evaluate(signal, close, train, initial_balance, allow_short)
+            for signal in signal_arrays
+        ]
+        best = max(range(len(parameter_sets)), key=lambda i: train_scores[i]["return"])
+        test_score = _evaluate(
+            signal_arrays[best], close, test, initial_balance, allow_short
+        )
+        rows.append(
+            {
+                "window": number,
+                "train_start": open_time[train.start],
+                "train_end": open_time[train.stop - 1],
+                "test_start": open_time[test.start],
+                "test_end": open_time[test.stop - 1],
+                **parameter_sets[best],
+                "train_return": train_scores[best]["return"],
+                "test_return": test_score["return"],
+                "test_trade_count": test_score["trade_count"],
+                "test_max_drawdown": test_score["max_drawdown"],
+            }
+        )
+
+    return DataFrame(rows).set_index("window") if rows else DataFrame(rows)